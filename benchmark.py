@@ -0,0 +1,212 @@
+"""
+Load benchmark for the PostgreSQL writer
+Generates synthetic Salesforce records and reports rows/sec per load method
+and number of writer connections
+
+Usage:
+  python benchmark.py --rows 20000
+  python benchmark.py --rows 50000 --object objekt --methods copy,batch
+  python benchmark.py --rows 200000 --methods copy --writers 1,2,4,8
+"""
+
+import argparse
+import os
+import random
+import re
+import string
+import time
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from mappings import MAPPINGS
+from sync_data import ParallelWriter, PostgresDB
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts', 'schema.sql')
+
+# Lookup columns are left empty so synthetic rows never trip foreign keys
+USER_ID = '005000000000001AAA'
+ID_PREFIXES = {'account': '001', 'objekt': 'a00', 'unit': 'a01'}
+
+_TABLE_PATTERN = re.compile(r'CREATE TABLE IF NOT EXISTS (\w+) \((.*?)\n\);', re.DOTALL)
+_COLUMN_PATTERN = re.compile(r'^\s*(\w+)\s+([A-Z]+)(?:\((\d+)(?:,\s*(\d+))?\))?(.*?),?\s*$')
+
+
+def load_schema(path: str = SCHEMA_FILE) -> dict:
+    """Parse column definitions from scripts/schema.sql"""
+    with open(path, encoding='utf-8') as f:
+        sql = f.read()
+
+    tables = {}
+    for table, body in _TABLE_PATTERN.findall(sql):
+        columns = {}
+        for line in body.splitlines():
+            line = line.split('--')[0]
+            match = _COLUMN_PATTERN.match(line)
+            if not match or match.group(1).upper() == 'CONSTRAINT':
+                continue
+            name, sql_type, size, scale, rest = match.groups()
+            columns[name] = {
+                'type': sql_type,
+                'size': int(size) if size else None,
+                'scale': int(scale) if scale else 0,
+                'not_null': 'NOT NULL' in rest or 'PRIMARY KEY' in rest,
+            }
+        tables[table] = columns
+    return tables
+
+
+def _text(rng: random.Random, size: int) -> str:
+    """Random text filling most of the column width"""
+    length = rng.randint(max(1, size // 2), size)
+    return ''.join(rng.choices(string.ascii_letters + ' ', k=length)).strip() or 'x'
+
+
+def make_value(rng: random.Random, column: str, spec: dict, index: int):
+    """Synthetic value that fits the column definition"""
+    sql_type, size = spec['type'], spec['size']
+
+    if sql_type == 'VARCHAR' and size == 18:
+        # Salesforce Id / lookup
+        return USER_ID if spec['not_null'] else None
+    if sql_type == 'VARCHAR':
+        return _text(rng, min(size, 120))
+    if sql_type == 'TEXT':
+        return _text(rng, 400)
+    if sql_type == 'INTEGER':
+        return rng.randint(0, 9)
+    if sql_type == 'DECIMAL':
+        digits = size - spec['scale']
+        return round(rng.uniform(0, 10 ** min(digits, 3) - 1), spec['scale'])
+    if sql_type == 'BOOLEAN':
+        return rng.random() < 0.5
+    if sql_type == 'DATE':
+        return (datetime(2020, 1, 1) + timedelta(days=index % 2000)).strftime('%Y-%m-%d')
+    if sql_type == 'TIMESTAMP':
+        stamp = datetime(2020, 1, 1) + timedelta(seconds=index)
+        return stamp.strftime('%Y-%m-%dT%H:%M:%S.000+0000')
+    return None
+
+
+def make_id(object_key: str, index: int) -> str:
+    """Deterministic 18-character Salesforce Id"""
+    return f"{ID_PREFIXES[object_key]}{index:012d}AAA"
+
+
+def make_records(object_key: str, count: int, schema: dict, seed: int = 0, offset: int = 0,
+                 parent_count: int = 1) -> list:
+    """
+    Build `count` Salesforce-shaped records for one object.
+
+    Units point at objekts 0..parent_count-1, so they load after
+    `make_records('objekt', parent_count, ...)`.
+    """
+    mapping = MAPPINGS[object_key]
+    columns = schema[mapping.table]
+    rng = random.Random(seed)
+
+    records = []
+    for i in range(offset, offset + count):
+        record = {'attributes': {'type': object_key}}
+        for column, field in zip(mapping.columns, mapping.sf_fields):
+            record[field] = make_value(rng, column, columns[column], i)
+        record['Id'] = make_id(object_key, i)
+        record['SystemModstamp'] = record['LastModifiedDate']
+        if object_key == 'unit':
+            record['Objekt__c'] = make_id('objekt', i % parent_count)
+        records.append(record)
+    return records
+
+
+def record_factory(object_key: str, schema: dict, parent_count: int = 1, templates: int = 1000, seed: int = 0):
+    """
+    `index -> record` for generating large volumes on demand.
+
+    Field values are cycled from `templates` pre-built records; Id,
+    timestamps and the unit's Objekt__c are derived from the index.
+    """
+    pool = make_records(object_key, templates, schema, seed=seed, parent_count=parent_count)
+    start = datetime(2020, 1, 1)
+
+    def factory(index: int) -> dict:
+        record = dict(pool[index % templates])
+        record['Id'] = make_id(object_key, index)
+        stamp = (start + timedelta(seconds=index)).strftime('%Y-%m-%dT%H:%M:%S.000+0000')
+        record['LastModifiedDate'] = record['SystemModstamp'] = stamp
+        if object_key == 'unit':
+            record['Objekt__c'] = make_id('objekt', index % parent_count)
+        return record
+
+    return factory
+
+
+def run(db: PostgresDB, object_key: str, records: list, method: str, batch_size: int, writers: int = 1) -> float:
+    """Write all records in batches with one load method and N connections, return rows/sec"""
+    mapping = MAPPINGS[object_key]
+
+    db.load_method = method
+    target = db
+    if writers > 1:
+        # Connections are opened before the clock starts
+        target = ParallelWriter(db, writers)
+        target.open()
+    try:
+        start = time.perf_counter()
+        for i in range(0, len(records), batch_size):
+            target.write_records(mapping, records[i:i + batch_size])
+        target.commit()
+        elapsed = time.perf_counter() - start
+    finally:
+        if target is not db:
+            target.close()
+    return len(records) / elapsed if elapsed else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--object', choices=['account', 'objekt'], default='account')
+    parser.add_argument('--methods', default='batch,copy')
+    parser.add_argument('--batch-size', type=int, default=2000, help='rows per write (one SF page)')
+    parser.add_argument('--writers', default='1', help='writer connections per run, e.g. 1,2,4,8')
+    args = parser.parse_args()
+
+    load_dotenv()
+    db = PostgresDB(
+        host=os.getenv('PG_HOST', 'localhost'),
+        port=int(os.getenv('PG_PORT', 5432)),
+        database=os.getenv('PG_DATABASE'),
+        user=os.getenv('PG_USER'),
+        password=os.getenv('PG_PASSWORD')
+    )
+    db.connect()
+
+    table = MAPPINGS[args.object].table
+    records = make_records(args.object, args.rows, load_schema())
+    results = []
+
+    try:
+        for method in args.methods.split(','):
+            for writers in (int(n) for n in args.writers.split(',')):
+                db.conn.cursor().execute(f"TRUNCATE {table} CASCADE")
+                db.commit()
+                # Fresh table: measures inserts. Second pass: measures conflict
+                # updates. Third pass: unchanged rows skipped by their hash.
+                db.skip_unchanged = False
+                insert_rate = run(db, args.object, records, method, args.batch_size, writers)
+                update_rate = run(db, args.object, records, method, args.batch_size, writers)
+                db.skip_unchanged = True
+                noop_rate = run(db, args.object, records, method, args.batch_size, writers)
+                results.append((method, writers, insert_rate, update_rate, noop_rate))
+    finally:
+        db.close()
+
+    print()
+    print(f"{args.rows} {table} rows, batch size {args.batch_size}")
+    print(f"{'method':<8} {'writers':>8} {'insert rows/s':>14} {'update rows/s':>14} {'unchanged rows/s':>17}")
+    for method, writers, insert_rate, update_rate, noop_rate in results:
+        print(f"{method:<8} {writers:>8} {insert_rate:>14,.0f} {update_rate:>14,.0f} {noop_rate:>17,.0f}")
+
+
+if __name__ == "__main__":
+    main()
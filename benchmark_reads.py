@@ -0,0 +1,159 @@
+"""
+Read latency benchmark for the unit_details read model
+Fills accounts, objekts and units with synthetic records whose objekts point
+at owner, Eigentümer, Hausverwaltung and Hausmeister accounts, rebuilds
+unit_details, and times typical lookups as joins over the synced tables and
+as reads of unit_details
+
+Usage:
+  python benchmark_reads.py
+  python benchmark_reads.py --rows 1000000 --queries 5000
+  python benchmark_reads.py --existing
+
+The synced tables are emptied and refilled unless --existing is given, in
+which case the data already synced (and unit_details) is used as is. Rows
+are split 50% accounts, 10% objekts, 40% units.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+from dotenv import load_dotenv
+
+from benchmark import load_schema, make_id, make_records
+from mappings import MAPPINGS
+from read_model import COLUMNS, SELECT_SQL, ReadModel
+from sync_data import PostgresDB
+
+# Share of the total rows per object
+SPLIT = {'account': 0.5, 'objekt': 0.1, 'unit': 0.4}
+
+# Lookups: (name, join over the synced tables, read model query, id sample query)
+LOOKUPS = [
+    (
+        'unit with objekt and accounts',
+        f"{SELECT_SQL} WHERE u.id = %s",
+        f"SELECT {', '.join(COLUMNS)} FROM unit_details WHERE unit_id = %s",
+        "SELECT id FROM units",
+    ),
+    (
+        'Eigentümer of a unit',
+        "SELECT ei.id, ei.name, ei.person_email, ei.phone FROM units u "
+        "JOIN objekts o ON o.id = u.objekt__c JOIN accounts ei ON ei.id = o.eigentumer__c WHERE u.id = %s",
+        "SELECT eigentumer_id, eigentumer_name, eigentumer_email, eigentumer_phone FROM unit_details WHERE unit_id = %s",
+        "SELECT id FROM units",
+    ),
+    (
+        'units of an objekt',
+        "SELECT u.id, u.name, u.type_of_unit__c FROM objekts o JOIN units u ON u.objekt__c = o.id WHERE o.id = %s",
+        "SELECT unit_id, unit_name, type_of_unit__c FROM unit_details WHERE objekt_id = %s",
+        "SELECT DISTINCT objekt__c FROM units",
+    ),
+    (
+        'units of an Eigentümer',
+        "SELECT u.id, u.name, o.id, o.name FROM objekts o JOIN units u ON u.objekt__c = o.id "
+        "WHERE o.eigentumer__c = %s",
+        "SELECT unit_id, unit_name, objekt_id, objekt_name FROM unit_details WHERE eigentumer_id = %s",
+        "SELECT DISTINCT eigentumer__c FROM objekts WHERE eigentumer__c IS NOT NULL",
+    ),
+]
+
+
+def seed(db: PostgresDB, rows: int, batch_size: int = 2000):
+    """Empty the synced tables and fill them with synthetic records pointing at each other"""
+    counts = {key: max(1, int(rows * share)) for key, share in SPLIT.items()}
+    schema = load_schema()
+    accounts = counts['account']
+
+    cursor = db.conn.cursor()
+    cursor.execute("TRUNCATE accounts, objekts, units, unit_details CASCADE")
+    db.commit()
+
+    for key in ('account', 'objekt', 'unit'):
+        mapping = MAPPINGS[key]
+        records = make_records(key, counts[key], schema, parent_count=counts['objekt'])
+        if key == 'objekt':
+            # Many objekts per Eigentümer; few Hausverwaltungen and Hausmeister
+            fields = {f.column: f.sf_name for f in mapping.fields}
+            for i, record in enumerate(records):
+                record[fields['owner_id']] = make_id('account', (i * 3) % accounts)
+                record[fields['eigentumer__c']] = make_id('account', i % accounts)
+                record[fields['hausverwaltung__c']] = make_id('account', (i * 7) % min(accounts, 50))
+                record[fields['hausmeister__c']] = make_id('account', (i * 13) % min(accounts, 200))
+        for i in range(0, len(records), batch_size):
+            db.write_records(mapping, records[i:i + batch_size])
+        db.commit()
+        print(f"Loaded {len(records):,} {mapping.table}")
+
+
+def measure(cursor, sql: str, ids: list) -> list:
+    """Latency of each query in milliseconds"""
+    latencies = []
+    for record_id in ids:
+        start = time.perf_counter()
+        cursor.execute(sql, (record_id,))
+        cursor.fetchall()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help='total synthetic rows')
+    parser.add_argument('--queries', type=int, default=2000, help='queries per lookup and variant')
+    parser.add_argument('--existing', action='store_true', help='use the synced data instead of synthetic rows')
+    args = parser.parse_args()
+
+    load_dotenv()
+    db = PostgresDB(
+        host=os.getenv('PG_HOST', 'localhost'),
+        port=int(os.getenv('PG_PORT', 5432)),
+        database=os.getenv('PG_DATABASE'),
+        user=os.getenv('PG_USER'),
+        password=os.getenv('PG_PASSWORD')
+    )
+    db.connect()
+    results = []
+
+    try:
+        if not args.existing:
+            seed(db, args.rows)
+            rows = ReadModel().rebuild(db.conn.cursor())
+            db.commit()
+            print(f"Rebuilt unit_details: {rows:,} rows")
+
+        # Visibility map and statistics, so covering indexes are used index-only
+        db.conn.autocommit = True
+        cursor = db.conn.cursor()
+        cursor.execute("VACUUM ANALYZE accounts, objekts, units, unit_details")
+
+        rng = random.Random(0)
+        for name, join_sql, read_sql, sample_sql in LOOKUPS:
+            cursor.execute(sample_sql)
+            candidates = [row[0] for row in cursor.fetchall()]
+            if not candidates:
+                print(f"Skipping '{name}': no rows to look up")
+                continue
+            ids = [rng.choice(candidates) for _ in range(args.queries)]
+
+            # Warm the cache; both variants then run the same ids
+            measure(cursor, join_sql, ids[:100])
+            measure(cursor, read_sql, ids[:100])
+            results.append((name, measure(cursor, join_sql, ids), measure(cursor, read_sql, ids)))
+    finally:
+        db.close()
+
+    print()
+    print(f"{args.queries} queries per lookup, latency in ms")
+    print(f"{'lookup':<32} {'join p50':>9} {'join p95':>9} {'read p50':>9} {'read p95':>9} {'speedup':>8}")
+    for name, join, read in results:
+        join_q, read_q = statistics.quantiles(join, n=100), statistics.quantiles(read, n=100)
+        speedup = statistics.mean(join) / statistics.mean(read)
+        print(f"{name:<32} {join_q[49]:>9.3f} {join_q[94]:>9.3f} {read_q[49]:>9.3f} {read_q[94]:>9.3f} {speedup:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+End-to-end sync benchmark
+Runs SalesforceSync.sync_all against a local fake Salesforce (REST query
+paging over generated records) and a local PostgreSQL, and reports fetch,
+transform and load time, peak RSS and rows/sec per data size
+
+Usage:
+  python benchmark_sync.py
+  python benchmark_sync.py --sizes 10000,100000 --page-size 2000
+  python benchmark_sync.py --sizes 1000000 --load-method batch
+  python benchmark_sync.py --sizes 1000000 --writers 4
+  python benchmark_sync.py --sizes 1000000 --shadow
+
+Each size runs in its own process against an empty database (the synced
+tables and sync_state are truncated). Rows are split 50% accounts,
+10% objekts, 40% units.
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import time
+
+from dotenv import load_dotenv
+
+# Share of the total rows per object
+SPLIT = {'account': 0.5, 'objekt': 0.1, 'unit': 0.4}
+
+
+def object_counts(rows: int) -> dict:
+    counts = {key: int(rows * share) for key, share in SPLIT.items()}
+    counts['objekt'] = max(1, counts['objekt'])
+    return counts
+
+
+def serve_fake(counts: dict, page_size: int, conn):
+    """Fake Salesforce process: send back the URL, serve until terminated"""
+    from fake_salesforce import FakeSalesforce, seed
+
+    fake = FakeSalesforce(page_size=page_size)
+    seed(fake, counts['account'], counts['objekt'], counts['unit'], generate=True)
+    conn.send(fake.url)
+    fake.server.serve_forever()
+
+
+def stage_seconds(metrics) -> dict:
+    """
+    Fetch (request + decode), transform and load seconds of the run. Load
+    is hash filter + write + read model refresh, plus for shadow loads the
+    index builds, foreign key validation, ANALYZE and swap that replace
+    per-row index upkeep.
+    """
+    load_stages = ('hash_filter', 'load', 'read_model', 'index', 'validate', 'analyze', 'swap')
+    return {
+        'fetch': metrics.seconds('http') + metrics.seconds('decode'),
+        'transform': metrics.seconds('transform'),
+        'load': sum(metrics.seconds(stage) for stage in load_stages),
+    }
+
+
+def run_sync(url: str, rows: int, shadow: bool, conn):
+    """Sync process: one full sync into emptied tables, send back the measurements"""
+    import sync_data
+    from shadow_load import ShadowLoad
+
+    os.environ.update(SF_INSTANCE_URL=url, SF_ACCESS_TOKEN='benchmark')
+    sync = sync_data.SalesforceSync()
+
+    sync.db.connect()
+    cursor = sync.db.conn.cursor()
+    tables = [table for key, table, _ in sync.OBJECTS if key in sync.object_keys]
+    cursor.execute("SELECT to_regclass('unit_details')")
+    if cursor.fetchone()[0]:
+        tables.append('unit_details')
+    cursor.execute(f"TRUNCATE {', '.join(tables)}, sync_state CASCADE")
+    sync.db.commit()
+    sync.db.close()
+
+    start = time.perf_counter()
+    if shadow:
+        ShadowLoad(sync).run()
+    else:
+        sync.sync_all()
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is in KiB on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    conn.send({'rows': rows, 'elapsed': elapsed, 'peak_rss_mb': peak_rss, **stage_seconds(sync.metrics)})
+
+
+def benchmark(rows: int, page_size: int, shadow: bool = False) -> dict:
+    """Start the fake server and the sync in separate processes for one size"""
+    counts = object_counts(rows)
+    context = multiprocessing.get_context('spawn')
+
+    server_conn, server_child = context.Pipe()
+    server = context.Process(target=serve_fake, args=(counts, page_size, server_child), daemon=True)
+    server.start()
+    try:
+        url = server_conn.recv()
+
+        sync_conn, sync_child = context.Pipe()
+        worker = context.Process(target=run_sync, args=(url, sum(counts.values()), shadow, sync_child))
+        worker.start()
+        worker.join()
+        if worker.exitcode != 0:
+            raise RuntimeError(f"Sync of {rows} rows failed (exit code {worker.exitcode})")
+        return sync_conn.recv()
+    finally:
+        server.terminate()
+        server.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='total rows per run')
+    parser.add_argument('--page-size', type=int, default=2000, help='records per REST query page')
+    parser.add_argument('--load-method', choices=['copy', 'batch'], help='overrides SYNC_LOAD_METHOD')
+    parser.add_argument('--writers', type=int, help='overrides SYNC_DB_WRITERS')
+    parser.add_argument('--shadow', action='store_true', help='load into shadow tables and swap (main.py full --shadow)')
+    args = parser.parse_args()
+
+    load_dotenv()
+    # REST paging only; deletions are not part of the measured path
+    os.environ['SF_BULK_THRESHOLD'] = '0'
+    os.environ['SYNC_DELETE_METHOD'] = 'off'
+    os.environ.setdefault('SYNC_OBJECTS', ','.join(SPLIT))
+    if args.load_method:
+        os.environ['SYNC_LOAD_METHOD'] = args.load_method
+    if args.writers:
+        os.environ['SYNC_DB_WRITERS'] = str(args.writers)
+
+    results = [benchmark(int(size), args.page_size, args.shadow) for size in args.sizes.split(',')]
+
+    print()
+    print(f"page size {args.page_size}, load method {os.getenv('SYNC_LOAD_METHOD', 'copy')}, "
+          f"writers {os.getenv('SYNC_DB_WRITERS', 1)}{', shadow tables' if args.shadow else ''}")
+    print("fetch/transform/load are seconds summed over threads; fetch overlaps load")
+    print(f"{'rows':>10} {'total s':>9} {'fetch s':>9} {'transform s':>12} {'load s':>9} "
+          f"{'peak RSS MB':>12} {'rows/s':>10}")
+    for r in results:
+        rate = r['rows'] / r['elapsed'] if r['elapsed'] else 0.0
+        print(f"{r['rows']:>10,} {r['elapsed']:>9.1f} {r['fetch']:>9.1f} {r['transform']:>12.1f} "
+              f"{r['load']:>9.1f} {r['peak_rss_mb']:>12.0f} {rate:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+"""
+Change Data Capture stream
+Subscribes to Salesforce change events of the synced objects over the
+Streaming API (CometD long polling) and applies them to PostgreSQL in
+micro-batches, resuming from the replay IDs stored in sync_state
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+
+from mappings import CONVERTERS, INSERT_ONLY, ObjectMapping
+from sync_data import SalesforceAPI, SalesforceSync, add_filter
+
+logger = logging.getLogger(__name__)
+
+# Replay ID subscribing to events published from now on
+REPLAY_NEW = -1
+
+# Pending change per record within a batch
+CREATE, UPDATE, DELETE = 'create', 'update', 'delete'
+
+# Ids per SOQL query when re-reading records (keeps the URL short)
+REFETCH_CHUNK = 200
+
+# Parts of a compound Name joined into Name (Salutation is not part of it)
+NAME_PARTS = ('FirstName', 'MiddleName', 'LastName', 'Suffix')
+
+
+class ReplayExpiredError(Exception):
+    """Events after the stored replay ID are no longer retained"""
+
+
+class BayeuxError(RuntimeError):
+    """Unsuccessful Bayeux reply"""
+
+    def __init__(self, message: str, advice: dict = None):
+        super().__init__(message)
+        self.advice = advice or {}
+
+
+def _meta_reply(replies: list, channel: str) -> dict:
+    for reply in replies:
+        if reply.get('channel') == channel:
+            return reply
+    raise BayeuxError(f"No {channel} reply")
+
+
+class CometdClient:
+    """
+    Minimal Bayeux client for the Streaming API (long-polling transport).
+
+    Session cookies from the handshake are kept by the API's requests
+    session. The last replay ID received per channel is tracked so a new
+    session resubscribes right after it.
+    """
+
+    def __init__(self, api: SalesforceAPI):
+        self.api = api
+        self.client_id = None
+        self.replay_ids = {}  # channel -> replay ID to subscribe from
+
+    def _send(self, message: dict) -> list:
+        if self.client_id:
+            message['clientId'] = self.client_id
+        return self.api.bayeux([message])
+
+    def handshake(self):
+        reply = _meta_reply(self._send({
+            'channel': '/meta/handshake',
+            'version': '1.0',
+            'minimumVersion': '1.0',
+            'supportedConnectionTypes': ['long-polling'],
+            'ext': {'replay': True},
+        }), '/meta/handshake')
+        if not reply.get('successful'):
+            raise BayeuxError(f"Handshake failed: {reply.get('error')}", reply.get('advice'))
+        self.client_id = reply['clientId']
+
+    def subscribe(self, channel: str, replay_id: int):
+        """Subscribe after `replay_id` (REPLAY_NEW: only new events)"""
+        reply = _meta_reply(self._send({
+            'channel': '/meta/subscribe',
+            'subscription': channel,
+            'ext': {'replay': {channel: replay_id}},
+        }), '/meta/subscribe')
+        if not reply.get('successful'):
+            error = reply.get('error') or ''
+            if 'replayid' in error.lower():
+                raise ReplayExpiredError(f"{channel}: {error}")
+            raise BayeuxError(f"Subscribe to {channel} failed: {error}", reply.get('advice'))
+        self.replay_ids[channel] = replay_id
+
+    def resubscribe(self):
+        """
+        New session, each channel resuming after its last received event.
+        Channels that have not received one yet were subscribed for new
+        events only: events published while the session was down cannot be
+        replayed, so this raises ReplayExpiredError.
+        """
+        unknown = [channel for channel, replay_id in self.replay_ids.items() if replay_id == REPLAY_NEW]
+        if unknown:
+            raise ReplayExpiredError(f"no event received yet on {', '.join(unknown)}")
+        self.handshake()
+        for channel, replay_id in list(self.replay_ids.items()):
+            self.subscribe(channel, replay_id)
+
+    def connect(self) -> list:
+        """Long-poll once; return the event messages received"""
+        replies = self._send({'channel': '/meta/connect', 'connectionType': 'long-polling'})
+        reply = _meta_reply(replies, '/meta/connect')
+        if not reply.get('successful'):
+            raise BayeuxError(f"Connect failed: {reply.get('error')}", reply.get('advice'))
+
+        events = [message for message in replies if message.get('channel') in self.replay_ids and 'data' in message]
+        for event in events:
+            self.replay_ids[event['channel']] = event['data']['event']['replayId']
+        return events
+
+    def disconnect(self):
+        if not self.client_id:
+            return
+        try:
+            self._send({'channel': '/meta/disconnect'})
+        except Exception as e:
+            logger.debug(f"Disconnect failed: {e}")
+        self.client_id = None
+
+
+def _field_name(name: str) -> str:
+    """
+    Compound field path to the flat field name: 'BillingAddress.City' ->
+    'BillingCity', 'Name.FirstName' -> 'FirstName', custom compounds
+    'Address__c.City' -> 'Address__City__s'
+    """
+    compound, _, component = name.partition('.')
+    if not component:
+        return name
+    if compound.endswith('__c'):
+        return f"{compound[:-len('__c')]}__{component}__s"
+    prefix = compound[:-len('Address')] if compound.endswith('Address') else ''
+    return prefix + component
+
+
+def flatten_fields(payload: dict) -> dict:
+    """
+    Event payload fields with compound values (Name, addresses) flattened.
+    A compound Name (person accounts) is kept in its parts and joined into
+    Name the way the REST and Bulk APIs return it.
+    """
+    fields = {}
+    for name, value in payload.items():
+        if name == 'ChangeEventHeader':
+            continue
+        if isinstance(value, dict):
+            for component, component_value in value.items():
+                fields[_field_name(f"{name}.{component}")] = component_value
+            if name == 'Name':
+                fields['Name'] = ' '.join(value[part] for part in NAME_PARTS if value.get(part)) or None
+        else:
+            fields[name] = value
+    return fields
+
+
+class ChangeStream:
+    """
+    Apply change events to PostgreSQL in micro-batches.
+
+    A poller thread long-polls CometD into a bounded queue; the main thread
+    collects events until SYNC_STREAM_BATCH_SIZE events arrived or
+    SYNC_STREAM_BATCH_SECONDS passed, and applies them in one transaction
+    together with each object's replay ID, so a restart resumes after the
+    last applied event. Without a stored replay ID, or when it is older than
+    the retention window, tables are first caught up with the checkpointed
+    incremental sync.
+
+    CREATE and UNDELETE events carry the whole record and are upserted with
+    their hash. UPDATE events only carry the changed fields: these columns
+    are set and the row's hash is cleared. Gap events, events with diff
+    fields, updates of a compound Name (person accounts) and updates of
+    rows not stored yet are re-read with SOQL.
+    """
+
+    def __init__(self, sync: SalesforceSync):
+        self.sync = sync
+        self.db = sync.db
+        self.metrics = sync.metrics
+
+        self.batch_size = int(os.getenv('SYNC_STREAM_BATCH_SIZE', 500))
+        self.batch_seconds = float(os.getenv('SYNC_STREAM_BATCH_SECONDS', 2))
+
+        # Dependency order: parents are written before children
+        self.mappings = [sync.MAPPINGS[key] for key, _, _ in sync.OBJECTS if key in sync.object_keys]
+        self.by_channel = {mapping.change_channel: mapping for mapping in self.mappings}
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Finish the current batch and return from run()"""
+        self._stop.set()
+
+    def run(self):
+        """Stream changes until stop() or Ctrl+C"""
+        logger.info(f"=== Starting change stream: {', '.join(self.by_channel)} ===")
+        self._stop.clear()
+        try:
+            while not self._stop.is_set():
+                client = CometdClient(self.sync.sf_api)
+                try:
+                    self._subscribe(client)
+                    self._consume(client)
+                except ReplayExpiredError as e:
+                    logger.warning(f"Replay window expired while resubscribing ({e})")
+                finally:
+                    client.disconnect()
+        except KeyboardInterrupt:
+            logger.info("Interrupted; events not yet applied are replayed on the next start")
+        finally:
+            self.db.close()
+        logger.info("=== Change stream stopped ===")
+
+    def _catch_up(self):
+        """Run the checkpointed incremental sync on its own connection"""
+        self.db.close()
+        self.sync.sync_incremental()
+        self.db.connect()
+
+    def _subscribe(self, client: CometdClient):
+        """Subscribe every channel after its stored replay ID, or catch up and subscribe for new events"""
+        # Resubscribes reuse the connection; reopen it only if it was lost
+        if not self.db.ping():
+            self.db.close()
+            self.db.connect()
+        replay_ids = self.db.get_replay_ids()
+        self.db.commit()
+
+        client.handshake()
+        try:
+            missing = [mapping.key for mapping in self.mappings if mapping.key not in replay_ids]
+            if missing:
+                raise ReplayExpiredError(f"no replay ID stored for {', '.join(missing)}")
+            for mapping in self.mappings:
+                client.subscribe(mapping.change_channel, replay_ids[mapping.key])
+            logger.info(f"Resuming after replay IDs {replay_ids}")
+            return
+        except ReplayExpiredError as e:
+            logger.warning(f"Cannot replay change events ({e}), catching up with incremental sync")
+
+        self._catch_up()
+        client.handshake()
+        for mapping in self.mappings:
+            client.subscribe(mapping.change_channel, REPLAY_NEW)
+        # Changes committed between the catch-up and the subscription;
+        # rows already written are skipped by their hash
+        self._catch_up()
+
+    def _poll(self, client: CometdClient, events: queue.Queue, done: threading.Event):
+        """Poller thread: long-poll into `events`; errors are passed on through the queue"""
+        def put(item) -> bool:
+            while not done.is_set():
+                try:
+                    events.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            while not done.is_set():
+                try:
+                    received = client.connect()
+                except BayeuxError as e:
+                    reconnect = e.advice.get('reconnect')
+                    if reconnect == 'retry':
+                        time.sleep(e.advice.get('interval', 0) / 1000)
+                        continue
+                    if reconnect != 'handshake':
+                        raise
+                    logger.info(f"Streaming session ended ({e}), resubscribing")
+                    client.resubscribe()
+                    continue
+                for event in received:
+                    if not put(event):
+                        return
+        except BaseException as e:
+            put(e)
+
+    def _consume(self, client: CometdClient):
+        """Collect events into micro-batches and apply them until stopped"""
+        events = queue.Queue(maxsize=self.batch_size * 4)
+        done = threading.Event()
+        threading.Thread(target=self._poll, args=(client, events, done), name='sf-stream', daemon=True).start()
+
+        batch = []
+        deadline = None
+        try:
+            while not self._stop.is_set():
+                timeout = 0.5 if deadline is None else min(0.5, max(0.0, deadline - time.monotonic()))
+                try:
+                    item = events.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                if isinstance(item, BaseException):
+                    if batch:
+                        self.apply(batch)
+                    raise item
+                if item is not None:
+                    batch.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.batch_seconds
+
+                if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                    self.apply(batch)
+                    batch, deadline = [], None
+
+            if batch:
+                self.apply(batch)
+        finally:
+            done.set()
+
+    def apply(self, events: list):
+        """Apply a micro-batch of change events and their replay IDs in one transaction"""
+        changes = {mapping.key: {} for mapping in self.mappings}    # id -> [kind, fields]
+        refetch = {mapping.key: set() for mapping in self.mappings}
+        replay_ids = {}
+        overflow = False
+
+        for event in events:
+            mapping = self.by_channel.get(event['channel'])
+            if mapping is None:
+                continue
+            replay_ids[mapping.key] = event['data']['event']['replayId']
+            payload = event['data']['payload']
+            overflow |= self._collect(mapping, payload, changes[mapping.key], refetch[mapping.key])
+
+        counts = {CREATE: 0, UPDATE: 0, DELETE: 0}
+        try:
+            for mapping in self.mappings:
+                written, updated = self._write_changes(mapping, changes[mapping.key], refetch[mapping.key])
+                counts[CREATE] += written
+                counts[UPDATE] += updated
+            for mapping in reversed(self.mappings):
+                ids = [record_id for record_id, (kind, _) in changes[mapping.key].items() if kind == DELETE]
+                counts[DELETE] += self.db.delete_rows(mapping, ids)
+            for key, replay_id in replay_ids.items():
+                self.db.save_replay_id(key, replay_id)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        self.metrics.count('change_events', len(events))
+        logger.info(f"Applied {len(events)} change events: {counts[CREATE]} upserted, "
+                    f"{counts[UPDATE]} updated, {counts[DELETE]} deleted")
+
+        if overflow:
+            logger.warning("Change events overflowed, catching up with incremental sync")
+            self._catch_up()
+
+    def _collect(self, mapping: ObjectMapping, payload: dict, changes: dict, refetch: set) -> bool:
+        """Merge one event into the batch's pending changes; True for GAP_OVERFLOW"""
+        header = payload['ChangeEventHeader']
+        change_type = header['changeType']
+        ids = header.get('recordIds') or []
+
+        if change_type == 'GAP_OVERFLOW':
+            return True
+        changed = header.get('changedFields', []) + header.get('nulledFields', [])
+        if (change_type.startswith('GAP_') or header.get('diffFields')
+                or (change_type == 'UPDATE' and isinstance(payload.get('Name'), dict))):
+            # No (complete) field data: read the current records instead.
+            # Updates of a compound Name only carry the changed parts.
+            refetch.update(ids)
+            for record_id in ids:
+                changes.pop(record_id, None)
+            return False
+
+        fields = flatten_fields(payload)
+        if change_type == 'UPDATE':
+            names = {_field_name(name) for name in changed}
+            fields = {name: fields.get(name) for name in names or fields}
+
+        for record_id in ids:
+            if record_id in refetch:
+                continue
+            if change_type == 'DELETE':
+                changes[record_id] = [DELETE, None]
+            elif change_type == 'UPDATE':
+                pending = changes.get(record_id)
+                if pending and pending[0] != DELETE:
+                    pending[1].update(fields)
+                else:
+                    changes[record_id] = [UPDATE, dict(fields)]
+            else:
+                # CREATE, UNDELETE: the event carries every non-null field
+                changes[record_id] = [CREATE, {**fields, mapping.id_field: record_id}]
+        return False
+
+    def _write_changes(self, mapping: ObjectMapping, changes: dict, refetch: set) -> tuple:
+        """Write one object's creates, updates and re-read records; return (upserted, updated)"""
+        creates = [fields for kind, fields in changes.values() if kind == CREATE]
+        updates = {record_id: fields for record_id, (kind, fields) in changes.items() if kind == UPDATE}
+
+        upserted = self.db.write_rows(mapping, [mapping.convert(fields) for fields in creates])
+
+        updated = 0
+        if updates:
+            stored = self.db.existing_ids(mapping, list(updates))
+            groups = {}
+            for record_id, values in updates.items():
+                if record_id not in stored:
+                    refetch.add(record_id)
+                    continue
+                fields = tuple(
+                    mapping.fields_by_name[name] for name in sorted(values)
+                    if name in mapping.fields_by_name and name != mapping.id_field
+                    and mapping.fields_by_name[name].update != INSERT_ONLY
+                )
+                if fields:
+                    row = tuple(CONVERTERS[f.type](values[f.sf_name]) for f in fields) + (record_id,)
+                    groups.setdefault(fields, []).append(row)
+            for fields, rows in groups.items():
+                updated += self.db.update_fields(mapping, list(fields), rows)
+
+        if refetch:
+            rows = self._fetch(mapping, refetch)
+            upserted += self.db.write_rows(mapping, rows)
+            found = {row[mapping.id_index] for row in rows}
+            for record_id in refetch - found:
+                changes[record_id] = [DELETE, None]
+        return upserted, updated
+
+    def _fetch(self, mapping: ObjectMapping, ids: set) -> list:
+        """Current rows of these records (deleted ones are missing)"""
+        ids = sorted(ids)
+        rows = []
+        for start in range(0, len(ids), REFETCH_CHUNK):
+            id_list = ', '.join(f"'{record_id}'" for record_id in ids[start:start + REFETCH_CHUNK])
+            soql = add_filter(mapping.soql, f"{mapping.id_field} IN ({id_list})")
+            for records in self.sync.sf_api.query_pages(soql):
+                rows.extend(mapping.convert(record) for record in records)
+        return rows
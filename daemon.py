@@ -0,0 +1,194 @@
+"""
+Sync daemon
+Keeps one process, one Salesforce session and one PostgreSQL connection
+alive and syncs each object on its own adaptive interval, with a cheap
+COUNT() probe deciding whether an incremental fetch is needed at all
+"""
+
+import logging
+import os
+import signal
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sync_data import SalesforceSync, add_filter, soql_datetime
+
+logger = logging.getLogger(__name__)
+
+
+class SyncDaemon:
+    """
+    Poll Salesforce for changes and run incremental syncs as they appear.
+
+    Every object has its own interval, starting at SYNC_DAEMON_MIN_INTERVAL
+    seconds. When an object is due, `SELECT COUNT() ... WHERE SystemModstamp
+    > checkpoint` (and the same for deleted records since the delete
+    checkpoint) tells whether anything changed. Objects with changes are
+    synced and their interval is halved; objects without are skipped and
+    their interval doubles, up to SYNC_DAEMON_MAX_INTERVAL. Parents of a
+    changed object are probed along with it, so new child rows never point
+    at parents that are not synced yet.
+
+    The database connections (and SYNC_DB_WRITERS writer connections) are
+    opened once and checked before each cycle; after a failed cycle they
+    are reopened and the objects retried after the minimum interval.
+    SIGTERM and SIGINT finish the current sync, then return from run().
+    """
+
+    def __init__(self, sync: SalesforceSync):
+        self.sync = sync
+        self.db = sync.db
+
+        self.min_interval = float(os.getenv('SYNC_DAEMON_MIN_INTERVAL', 30))
+        self.max_interval = float(os.getenv('SYNC_DAEMON_MAX_INTERVAL', 900))
+
+        # Dependency order: parents are synced before children
+        self.object_keys = [key for key, _, _ in sync.OBJECTS if key in sync.object_keys]
+        self.intervals = {key: self.min_interval for key in self.object_keys}
+        self.next_due = {key: 0.0 for key in self.object_keys}  # time.monotonic()
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Finish the current sync and return from run()"""
+        self._stop.set()
+
+    def run(self):
+        """Sync until stop(), SIGTERM or Ctrl+C"""
+        logger.info(f"=== Starting sync daemon: {', '.join(self.object_keys)} "
+                    f"(every {self.min_interval:g}-{self.max_interval:g}s) ===")
+        self._stop.clear()
+        handlers = self._install_signal_handlers()
+        try:
+            self._connect()
+            while not self._stop.is_set():
+                try:
+                    self._cycle()
+                except Exception as e:
+                    logger.error(f"Daemon cycle failed, retrying in {self.min_interval:g}s: {e}")
+                    self._disconnect()
+                    retry_at = time.monotonic() + self.min_interval
+                    self.next_due = {key: min(due, retry_at) for key, due in self.next_due.items()}
+                self._stop.wait(max(0.0, min(self.next_due.values()) - time.monotonic()))
+        finally:
+            self._disconnect()
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+        logger.info("=== Sync daemon stopped ===")
+
+    def _install_signal_handlers(self) -> dict:
+        """Stop on SIGTERM/SIGINT; return the previous handlers"""
+        if threading.current_thread() is not threading.main_thread():
+            return {}
+
+        def handle(signum, frame):
+            logger.info(f"Received {signal.Signals(signum).name}, stopping after the current sync")
+            self.stop()
+
+        return {signum: signal.signal(signum, handle) for signum in (signal.SIGTERM, signal.SIGINT)}
+
+    def _connect(self):
+        if not self.db.connected:
+            self.db.connect()
+        if self.sync.writer is not None and self.sync.writer.pool is None:
+            self.sync.writer.open()
+
+    def _disconnect(self):
+        try:
+            if self.sync.writer is not None and self.sync.writer.pool is not None:
+                self.sync.writer.close()
+        finally:
+            self.db.close()
+
+    def _cycle(self):
+        """Probe the objects that are due, sync those with changes, reschedule them"""
+        now = time.monotonic()
+        due = [key for key in self.object_keys if self.next_due[key] <= now]
+        if not due:
+            return
+
+        if not self.db.ping():
+            logger.info("Reconnecting to PostgreSQL")
+            self._disconnect()
+            self._connect()
+
+        checkpoints = self.db.get_checkpoints()
+        delete_checkpoints = self.db.get_delete_checkpoints()
+        self.db.commit()
+
+        changed = {key for key in due if self._has_changes(key, checkpoints, delete_checkpoints)}
+        probed = set(due)
+        for key in list(changed):
+            for parent in self._ancestors(key):
+                if parent not in probed:
+                    probed.add(parent)
+                    if self._has_changes(parent, checkpoints, delete_checkpoints):
+                        changed.add(parent)
+
+        if changed:
+            self.sync.sync_incremental(object_keys=[key for key in self.object_keys if key in changed])
+
+        now = time.monotonic()
+        for key in self.object_keys:
+            if key in changed:
+                self.intervals[key] = max(self.min_interval, self.intervals[key] / 2)
+            elif key in due:
+                self.intervals[key] = min(self.max_interval, self.intervals[key] * 2)
+            else:
+                continue
+            self.next_due[key] = now + self.intervals[key]
+        logger.info("Next checks: " + ", ".join(
+            f"{key} in {max(0.0, self.next_due[key] - now):.0f}s" for key in self.object_keys
+        ))
+
+    def _ancestors(self, query_key: str) -> list:
+        """Synced objects `query_key` depends on, directly or through its parents"""
+        ancestors = []
+        pending = list(self.sync.MAPPINGS[query_key].depends_on)
+        while pending:
+            parent = pending.pop()
+            if parent in self.object_keys and parent not in ancestors:
+                ancestors.append(parent)
+                pending.extend(self.sync.MAPPINGS[parent].depends_on)
+        return ancestors
+
+    def _has_changes(self, query_key: str, checkpoints: dict, delete_checkpoints: dict) -> bool:
+        """
+        Whether records were modified after the object's checkpoint or
+        deleted after its delete checkpoint. Both are compared to the
+        millisecond: the checkpoint is the newest SystemModstamp synced, so
+        only records changed since then are counted.
+        """
+        since = checkpoints.get(query_key)
+        if since is None:
+            logger.info(f"{query_key}: no checkpoint yet")
+            return True
+
+        sf_api = self.sync.sf_api
+        mapping = self.sync.MAPPINGS[query_key]
+        modified = sf_api.count(add_filter(
+            self.sync.QUERIES[query_key], f"SystemModstamp > {soql_datetime(since, milliseconds=True)}"
+        ))
+        if modified:
+            logger.info(f"{query_key}: {modified} records modified")
+            return True
+
+        deleted_since = delete_checkpoints.get(query_key)
+        if self.sync.delete_method == 'queryAll':
+            soql = mapping.deleted_soql
+            if deleted_since is not None:
+                soql = add_filter(soql, f"SystemModstamp > {soql_datetime(deleted_since, milliseconds=True)}")
+            deleted = sf_api.count(soql, include_deleted=True)
+        elif self.sync.delete_method == 'getDeleted':
+            end = datetime.utcnow()
+            start = end - timedelta(days=self.sync.GET_DELETED_DAYS)
+            if deleted_since is not None:
+                start = max(start, deleted_since)
+            after = (deleted_since or start).isoformat(timespec='milliseconds')
+            records = sf_api.get_deleted(mapping.sobject, start, end).get('deletedRecords', [])
+            deleted = sum(1 for r in records if r['deletedDate'][:23] > after)
+        else:
+            deleted = 0
+        if deleted:
+            logger.info(f"{query_key}: {deleted} records deleted")
+        return bool(deleted)
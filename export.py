@@ -0,0 +1,184 @@
+"""
+Snapshot export
+Streams the synced objects from Salesforce into one file per object,
+page by page: NDJSON (one JSON object per line) or Parquet (one row group
+per page, typed columns), written with the same queries and converters as
+the sync
+"""
+
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+
+from mappings import ObjectMapping
+from sync_data import PagePrefetcher, SalesforceSync, orjson
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional; only needed for the parquet format
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('ndjson', 'parquet')
+
+
+def _json_default(value):
+    """Datetimes as ISO 8601 UTC, dates as ISO 8601, decimals as exact strings"""
+    if isinstance(value, datetime):
+        return value.isoformat() + '+00:00'
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+class NdjsonWriter:
+    """One JSON object per row, keyed by column name"""
+
+    def __init__(self, path: str, mapping: ObjectMapping):
+        self.columns = mapping.columns
+        self.file = open(path, 'wb')
+
+    def write(self, rows: list):
+        columns = self.columns
+        if orjson is not None:
+            lines = [
+                orjson.dumps(dict(zip(columns, row)), default=_json_default,
+                             option=orjson.OPT_NAIVE_UTC | orjson.OPT_APPEND_NEWLINE)
+                for row in rows
+            ]
+        else:
+            lines = [
+                (json.dumps(dict(zip(columns, row)), default=_json_default, ensure_ascii=False,
+                            separators=(',', ':')) + '\n').encode('utf-8')
+                for row in rows
+            ]
+        self.file.write(b''.join(lines))
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """Typed columns; each page becomes one row group"""
+
+    # Salesforce numbers have at most 18 digits
+    TYPES = {
+        'text': lambda: pa.string(),
+        'bool': lambda: pa.bool_(),
+        'int': lambda: pa.int64(),
+        'decimal': lambda: pa.decimal128(38, 18),
+        'date': lambda: pa.date32(),
+        'datetime': lambda: pa.timestamp('ms', tz='UTC'),
+    }
+
+    def __init__(self, path: str, mapping: ObjectMapping):
+        if pa is None:
+            raise RuntimeError("The parquet format needs pyarrow (pip install pyarrow)")
+        self.schema = pa.schema([(f.column, self.TYPES[f.type]()) for f in mapping.fields])
+        self.writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+
+    def write(self, rows: list):
+        if not rows:
+            return
+        columns = list(zip(*rows))
+        arrays = [pa.array(values, type=field.type) for values, field in zip(columns, self.schema)]
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema), row_group_size=len(rows))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {'ndjson': NdjsonWriter, 'parquet': ParquetWriter}
+
+
+class SnapshotExport:
+    """
+    Export objects to `{output_dir}/{table}.{format}`.
+
+    Records are fetched like a full sync (REST pages, parallel ranges or
+    Bulk API 2.0 by record count) and converted to rows on the fetch
+    threads; each page is written as soon as it arrives, so memory stays
+    bounded by the page buffer whatever the org size. Files are written
+    under a temporary name and renamed when complete, so readers never see
+    a partial snapshot.
+    """
+
+    def __init__(self, sync: SalesforceSync, output_dir: str = None, file_format: str = None):
+        self.sync = sync
+        self.metrics = sync.metrics
+        self.output_dir = output_dir or os.getenv('SYNC_EXPORT_DIR', './data')
+        self.format = file_format or os.getenv('SYNC_EXPORT_FORMAT', 'ndjson')
+        if self.format not in FORMATS:
+            raise ValueError(f"Unknown export format: {self.format}")
+
+    def run(self, object_keys: list = None) -> dict:
+        """Export each object in turn, return {object: rows written}"""
+        object_keys = object_keys or self.sync.object_keys
+        unknown = [key for key in object_keys if key not in self.sync.MAPPINGS]
+        if unknown:
+            raise ValueError(f"Unknown objects: {', '.join(unknown)}")
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.metrics.reset()
+        counts = {key: self.export_object(self.sync.MAPPINGS[key]) for key in object_keys}
+        logger.info(f"Stage times: {self.metrics.summary_text()}")
+        return counts
+
+    def export_object(self, mapping: ObjectMapping) -> int:
+        """Stream one object into its file, return rows written"""
+        sync = self.sync
+        path = os.path.join(self.output_dir, f"{mapping.table}.{self.format}")
+        tmp_path = f"{path}.tmp"
+
+        parts = [
+            {'part': number, 'method': method, 'range_condition': condition, 'position': None}
+            for number, (method, condition) in enumerate(sync._plan_parts(sync.QUERIES[mapping.key]), 1)
+        ]
+        writer = WRITERS[self.format](tmp_path, mapping)
+        # Up to SYNC_CHUNK_WORKERS parts at once, as in the full sync
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(sync.chunk_workers, len(parts))), thread_name_prefix='sf-export'
+        )
+        pages = PagePrefetcher(
+            [sync._part_pages(mapping, part) for part in parts],
+            sync.max_buffered_pages,
+            executor=executor,
+            merge=True
+        )
+
+        total = 0
+        try:
+            for _, rows, _, _ in pages:
+                with self.metrics.timer('export', table=mapping.table):
+                    writer.write(rows)
+                total += len(rows)
+                logger.info(f"Exported {total} {mapping.sobject} records...")
+        except BaseException:
+            # Keep the original error; the partial file is removed regardless
+            try:
+                writer.close()
+            except Exception as e:
+                logger.debug(f"Closing {tmp_path} failed: {e}")
+            finally:
+                os.remove(tmp_path)
+            raise
+        else:
+            try:
+                writer.close()
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        finally:
+            pages.close()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        os.replace(tmp_path, path)
+        logger.info(f"✓ Exported {total} records to {path}")
+        return total
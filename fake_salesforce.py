@@ -0,0 +1,740 @@
+"""
+Fake Salesforce server for offline runs
+Serves the REST query/queryAll endpoints (with nextRecordsUrl paging), the
+deleted records endpoint, Bulk API 2.0 query jobs and Change Data Capture
+events over CometD long polling from in-memory records
+
+Usage:
+  python fake_salesforce.py --port 8765 --accounts 1000 --objekts 200 --units 2000
+  python fake_salesforce.py --port 8765 --accounts 500000 --objekts 100000 --units 400000 --generate
+  python fake_salesforce.py --port 8765 --change-interval 1   # publish a change event every second
+
+  SF_INSTANCE_URL=http://127.0.0.1:8765 SF_ACCESS_TOKEN=fake python main.py full
+"""
+
+import argparse
+import csv
+import io
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from itertools import islice
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+_SELECT_PATTERN = re.compile(
+    r'^SELECT\s+(?P<fields>.+?)\s+FROM\s+(?P<sobject>\w+)'
+    r'(?:\s+WHERE\s+(?P<where>.+?))?'
+    r'(?:\s+ORDER\s+BY\s+(?P<order>\w+)(?:\s+(?P<direction>ASC|DESC))?)?'
+    r'(?:\s+LIMIT\s+(?P<limit>\d+))?\s*$',
+    re.IGNORECASE | re.DOTALL
+)
+_CONDITION_PATTERN = re.compile(r'^(\w+)\s*(=|!=|<=|>=|<|>|\s+IN\s+)\s*(.+)$', re.IGNORECASE | re.DOTALL)
+_DATETIME_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}')
+
+
+def _change_channel(sobject: str) -> str:
+    """CDC channel of an sobject (Objekt__c -> /data/Objekt__ChangeEvent)"""
+    event = sobject[:-3] + '__ChangeEvent' if sobject.endswith('__c') else sobject + 'ChangeEvent'
+    return f"/data/{event}"
+
+
+# Components of compound address fields
+_ADDRESS_COMPONENTS = (
+    'Street', 'City', 'State', 'StateCode', 'PostalCode', 'Country', 'CountryCode',
+    'Latitude', 'Longitude', 'GeocodeAccuracy',
+)
+_STANDARD_ADDRESSES = ('Billing', 'Shipping', 'PersonMailing', 'PersonOther')
+_CUSTOM_ADDRESS_PATTERN = re.compile(r'^(\w+?)__(\w+)__s$')
+
+
+def _compound_path(field: str) -> tuple:
+    """
+    (compound, component) a flat address field belongs to in change events
+    ('BillingCity' -> ('BillingAddress', 'City'), 'Address__City__s' ->
+    ('Address__c', 'City')), or None for plain fields
+    """
+    match = _CUSTOM_ADDRESS_PATTERN.match(field)
+    if match and match.group(2) in _ADDRESS_COMPONENTS:
+        return f"{match.group(1)}__c", match.group(2)
+    for prefix in _STANDARD_ADDRESSES:
+        component = field[len(prefix):]
+        if field.startswith(prefix) and component in _ADDRESS_COMPONENTS:
+            return f"{prefix}Address", component
+    return None
+
+
+def _nest_compounds(fields: dict) -> tuple:
+    """Event payload fields with addresses nested as compound values, and the field paths"""
+    nested, paths = {}, {}
+    for field, value in fields.items():
+        compound = _compound_path(field)
+        if compound is None:
+            nested[field] = value
+            paths[field] = value
+        else:
+            nested.setdefault(compound[0], {})[compound[1]] = value
+            paths['.'.join(compound)] = value
+    return nested, paths
+
+
+def _now() -> str:
+    return datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.000+0000')
+
+
+class SOQLError(ValueError):
+    """Query the fake server does not understand (MALFORMED_QUERY)"""
+
+
+def _literal(text: str):
+    """Parse a SOQL literal"""
+    text = text.strip()
+    if text.startswith("'") and text.endswith("'"):
+        return text[1:-1].replace("\\'", "'")
+    lowered = text.lower()
+    if lowered in ('true', 'false'):
+        return lowered == 'true'
+    if lowered == 'null':
+        return None
+    if _DATETIME_PATTERN.match(text):
+        return text
+    try:
+        return float(text)
+    except ValueError:
+        raise SOQLError(f"Unsupported literal: {text}")
+
+
+def _comparable(value):
+    """Normalize datetimes ('...Z' and '...+0000') to a common prefix"""
+    if isinstance(value, str) and _DATETIME_PATTERN.match(value):
+        return value[:19]
+    return value
+
+
+def _matches(record: dict, conditions: list) -> bool:
+    for field, op, expected in conditions:
+        actual = _comparable(record.get(field))
+        if op == 'IN':
+            if actual not in expected:
+                return False
+            continue
+        expected = _comparable(expected)
+        if op == '=':
+            ok = actual == expected
+        elif op == '!=':
+            ok = actual != expected
+        elif actual is None or expected is None:
+            ok = False
+        elif op == '<':
+            ok = actual < expected
+        elif op == '<=':
+            ok = actual <= expected
+        elif op == '>':
+            ok = actual > expected
+        else:
+            ok = actual >= expected
+        if not ok:
+            return False
+    return True
+
+
+def parse_soql(soql: str) -> dict:
+    """Parse the subset of SOQL the sync issues (AND-ed comparisons only)"""
+    match = _SELECT_PATTERN.match(" ".join(soql.split()))
+    if not match:
+        raise SOQLError(f"Cannot parse query: {soql[:120]}")
+
+    conditions = []
+    where = match.group('where')
+    if where:
+        if re.search(r'\bOR\b', where, re.IGNORECASE):
+            raise SOQLError("OR is not supported by the fake server")
+        for part in re.split(r'\s+AND\s+', where.replace('(', ' ').replace(')', ' '), flags=re.IGNORECASE):
+            part = part.strip()
+            if not part:
+                continue
+            cond = _CONDITION_PATTERN.match(part)
+            if not cond:
+                raise SOQLError(f"Unsupported condition: {part}")
+            field, op, value = cond.groups()
+            op = op.strip().upper()
+            if op == 'IN':
+                value = {_comparable(_literal(v)) for v in value.split(',') if v.strip()}
+            else:
+                value = _literal(value)
+            conditions.append((field, op, value))
+
+    fields = [f.strip() for f in match.group('fields').split(',')]
+    return {
+        'fields': fields,
+        'count': fields == ['COUNT()'],
+        'sobject': match.group('sobject'),
+        'conditions': conditions,
+        'order': match.group('order'),
+        'descending': (match.group('direction') or '').upper() == 'DESC',
+        'limit': int(match.group('limit')) if match.group('limit') else None,
+    }
+
+
+class _GeneratedRows:
+    """
+    Matching rows of a generated sobject, built in Id order (or reverse
+    Id order) as pages are read.
+
+    Supports the sequential slicing done by query paging; len() is the
+    generated count (an upper bound once conditions filter rows out).
+    """
+
+    def __init__(self, count: int, factory, conditions: list, include_deleted: bool, limit: int = None,
+                 descending: bool = False):
+        indexes = range(count - 1, -1, -1) if descending else range(count)
+        rows = (factory(i) for i in indexes)
+        rows = (r for r in rows if (include_deleted or not r['IsDeleted']) and _matches(r, conditions))
+        self._rows = islice(rows, limit) if limit is not None else rows
+        self._size = count if limit is None else min(count, limit)
+        self._position = 0
+        self._next = next(self._rows, None)
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index: slice) -> list:
+        if index.start != self._position:
+            raise ValueError("Generated rows can only be read in order")
+        chunk = []
+        while self._next is not None and len(chunk) < index.stop - index.start:
+            chunk.append(self._next)
+            self._next = next(self._rows, None)
+        self._position += len(chunk)
+        return chunk
+
+    def count(self) -> int:
+        """Consume the remaining rows and return how many matched in total"""
+        remaining = sum(1 for _ in self._rows) + (self._next is not None)
+        self._next = None
+        return self._position + remaining
+
+    def has_more(self) -> bool:
+        return self._next is not None
+
+
+def _has_more(rows, offset: int) -> bool:
+    if isinstance(rows, _GeneratedRows):
+        return rows.has_more()
+    return offset < len(rows)
+
+
+class FakeSalesforce:
+    """In-memory Salesforce org served over HTTP"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, page_size: int = 2000):
+        self.page_size = page_size
+        self.records = {}   # sobject -> {Id: record}
+        self.generated = {} # sobject -> (count, factory), built on demand
+        self.cursors = {}   # query locator -> (rows, fields)
+        self.jobs = {}      # bulk job id -> job
+        self.requests = []  # (method, path) log for assertions
+        self.failures = []  # statuses returned by the next requests, in order
+        self.api_used = 0
+        self.api_limit = 100000
+        self.lock = threading.Lock()
+
+        # Change Data Capture: published events, oldest first
+        self.events = []
+        self.next_replay_id = 1
+        self.first_replay_id = 1  # older replay IDs have expired
+        self.clients = {}         # CometD client id -> {channel: last replay ID delivered}
+        self.poll_timeout = 2.0   # seconds a /meta/connect waits for events
+        self.events_ready = threading.Condition(self.lock)
+
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.fake = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_records(self, sobject: str, records: list):
+        """Insert or replace records (IsDeleted defaults to false)"""
+        with self.lock:
+            table = self.records.setdefault(sobject, {})
+            for record in records:
+                row = {k: v for k, v in record.items() if k != 'attributes'}
+                row.setdefault('IsDeleted', False)
+                table[row['Id']] = row
+
+    def add_generated(self, sobject: str, count: int, factory):
+        """
+        Serve `count` records built by `factory(index)` while they are paged.
+
+        Nothing is kept in memory, so millions of rows can be served;
+        factory must return records in ascending Id order.
+        """
+        def build(index: int) -> dict:
+            record = factory(index)
+            record.setdefault('IsDeleted', False)
+            return record
+
+        with self.lock:
+            self.generated[sobject] = (count, build)
+
+    def change_records(self, sobject: str, records: list):
+        """
+        Create or update records as a user would, publishing change events.
+
+        New Ids publish CREATE with all non-null fields; existing ones
+        publish UPDATE with the fields that changed. LastModifiedDate and
+        SystemModstamp are bumped either way.
+        """
+        for record in records:
+            stamp = _now()
+            with self.lock:
+                table = self.records.setdefault(sobject, {})
+                row = table.get(record['Id'])
+                changes = {k: v for k, v in record.items() if k not in ('attributes', 'Id')}
+                changes['LastModifiedDate'] = stamp
+                if row is None or row['IsDeleted']:
+                    row = {**changes, 'Id': record['Id'], 'IsDeleted': False, 'SystemModstamp': stamp}
+                    table[row['Id']] = row
+                    change_type = 'CREATE'
+                    changes = {k: v for k, v in row.items() if v is not None and k not in ('Id', 'IsDeleted')}
+                else:
+                    changes = {k: v for k, v in changes.items() if row.get(k) != v}
+                    row.update(changes, SystemModstamp=stamp)
+                    change_type = 'UPDATE'
+            self.publish_change(sobject, change_type, [record['Id']], changes)
+
+    def delete_records(self, sobject: str, ids: list, deleted_at: str = None):
+        """Move records to the recycle bin (IsDeleted = true, SystemModstamp bumped), publishing DELETE"""
+        deleted_at = deleted_at or _now()
+        with self.lock:
+            table = self.records.get(sobject, {})
+            deleted = [record_id for record_id in ids if record_id in table]
+            for record_id in deleted:
+                table[record_id].update(IsDeleted=True, SystemModstamp=deleted_at)
+        if deleted:
+            self.publish_change(sobject, 'DELETE', deleted)
+
+    def publish_change(self, sobject: str, change_type: str, ids: list, fields: dict = None):
+        """
+        Publish a change event on the sobject's CDC channel.
+
+        `fields` are the event's field values; for UPDATE they are the
+        changed fields (None values are reported as nulledFields). Address
+        fields are sent as compound values (BillingAddress, Address__c)
+        and listed by component path ('Address__c.City'), as Salesforce
+        does. Use change_type 'GAP_UPDATE' etc. or 'GAP_OVERFLOW' for
+        events without field data.
+        """
+        fields, paths = _nest_compounds(fields or {})
+        header = {
+            'entityName': sobject,
+            'recordIds': list(ids),
+            'changeType': change_type,
+            'changeOrigin': 'fake_salesforce',
+            'transactionKey': uuid.uuid4().hex,
+            'sequenceNumber': 1,
+            'commitTimestamp': int(time.time() * 1000),
+            'commitUser': '005000000000001AAA',
+            'changedFields': sorted(paths) if change_type == 'UPDATE' else [],
+            'nulledFields': sorted(k for k, v in paths.items() if v is None) if change_type == 'UPDATE' else [],
+            'diffFields': [],
+        }
+        with self.events_ready:
+            event = {
+                'channel': _change_channel(sobject),
+                'data': {
+                    'schema': 'fake',
+                    'payload': {'ChangeEventHeader': header, **fields},
+                    'event': {'replayId': self.next_replay_id},
+                },
+            }
+            self.next_replay_id += 1
+            self.events.append(event)
+            self.events_ready.notify_all()
+
+    def expire_events(self):
+        """Drop all retained events, as if the retention window had passed"""
+        with self.lock:
+            self.events = []
+            self.first_replay_id = self.next_replay_id
+
+    def start(self) -> str:
+        """Serve in a background thread, return the instance URL"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name='fake-sf', daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def fail_next(self, *statuses: int):
+        """Answer the next requests with these error statuses (e.g. 503, 429)"""
+        with self.lock:
+            self.failures.extend(statuses)
+
+    # --- Query evaluation ---
+
+    def run_query(self, soql: str, include_deleted: bool = False) -> tuple:
+        """Evaluate a query, return (matching rows, selected fields, count only)"""
+        query = parse_soql(soql)
+        if query['sobject'] in self.generated:
+            return self._run_generated(query, include_deleted)
+
+        with self.lock:
+            rows = [r for r in self.records.get(query['sobject'], {}).values()
+                    if (include_deleted or not r['IsDeleted']) and _matches(r, query['conditions'])]
+
+        if query['order']:
+            key = query['order']
+            rows.sort(key=lambda r: (r.get(key) is None, _comparable(r.get(key))), reverse=query['descending'])
+        else:
+            rows.sort(key=lambda r: r['Id'])
+        if query['limit'] is not None:
+            rows = rows[:query['limit']]
+        return rows, query['fields'], query['count']
+
+    def _run_generated(self, query: dict, include_deleted: bool) -> tuple:
+        if query['order'] and query['order'] != 'Id':
+            raise SOQLError("Generated objects can only be ordered by Id")
+
+        count, factory = self.generated[query['sobject']]
+        rows = _GeneratedRows(count, factory, query['conditions'], include_deleted, query['limit'],
+                              query['descending'])
+        if query['count']:
+            return range(rows.count()), query['fields'], True
+        return rows, query['fields'], False
+
+    def query_page(self, rows: list, fields: list, offset: int) -> dict:
+        """One REST query page, registering a locator if more rows remain"""
+        sobject_rows = rows[offset:offset + self.page_size]
+        records = [
+            {'attributes': {'type': 'sobject'}, **{f: row.get(f) for f in fields}}
+            for row in sobject_rows
+        ]
+        body = {'totalSize': len(rows), 'done': True, 'records': records}
+
+        next_offset = offset + len(records)
+        if _has_more(rows, next_offset):
+            locator = uuid.uuid4().hex[:15]
+            with self.lock:
+                self.cursors[locator] = (rows, fields)
+            body['done'] = False
+            body['nextRecordsUrl'] = f"/services/data/v65.0/query/{locator}-{next_offset}"
+        return body
+
+
+    # --- Streaming API (Bayeux) ---
+
+    def bayeux(self, message: dict) -> list:
+        """Handle one Bayeux message, return the replies (events first for /meta/connect)"""
+        channel = message.get('channel')
+        reply = {'channel': channel, 'successful': True}
+        if 'id' in message:
+            reply['id'] = message['id']
+
+        if channel == '/meta/handshake':
+            client_id = uuid.uuid4().hex
+            with self.lock:
+                self.clients[client_id] = {}
+            reply.update(clientId=client_id, version='1.0', supportedConnectionTypes=['long-polling'],
+                         ext={'replay': True})
+            return [reply]
+
+        with self.lock:
+            subscriptions = self.clients.get(message.get('clientId'))
+        if subscriptions is None:
+            reply.update(successful=False, error='403::Unknown client', advice={'reconnect': 'handshake'})
+            return [reply]
+
+        if channel == '/meta/subscribe':
+            subscription = message.get('subscription')
+            replay_id = ((message.get('ext') or {}).get('replay') or {}).get(subscription, -1)
+            reply['subscription'] = subscription
+            with self.lock:
+                if replay_id == -1:
+                    subscriptions[subscription] = self.next_replay_id - 1
+                elif replay_id == -2:
+                    subscriptions[subscription] = self.first_replay_id - 1
+                elif self.first_replay_id <= replay_id < self.next_replay_id:
+                    subscriptions[subscription] = replay_id
+                else:
+                    reply.update(successful=False, error=(
+                        f"400::The replayId {{{replay_id}}} you provided was invalid. Please provide a valid ID, "
+                        f"-2 to replay all events, or -1 to replay only new events."
+                    ))
+            return [reply]
+
+        if channel == '/meta/connect':
+            deadline = time.monotonic() + self.poll_timeout
+            with self.events_ready:
+                while True:
+                    events = [
+                        e for e in self.events
+                        if e['channel'] in subscriptions and e['data']['event']['replayId'] > subscriptions[e['channel']]
+                    ]
+                    remaining = deadline - time.monotonic()
+                    if events or remaining <= 0 or message.get('clientId') not in self.clients:
+                        break
+                    self.events_ready.wait(remaining)
+                for event in events:
+                    subscriptions[event['channel']] = event['data']['event']['replayId']
+            reply['advice'] = {'reconnect': 'retry', 'interval': 0, 'timeout': int(self.poll_timeout * 1000)}
+            return events + [reply]
+
+        if channel == '/meta/disconnect':
+            with self.lock:
+                self.clients.pop(message.get('clientId'), None)
+            return [reply]
+
+        reply.update(successful=False, error=f"400::Unsupported channel {channel}")
+        return [reply]
+
+
+def _csv_value(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Routes REST query and Bulk API 2.0 requests to the FakeSalesforce"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def fake(self) -> FakeSalesforce:
+        return self.server.fake
+
+    def _send(self, status: int, body, content_type: str = 'application/json', headers: dict = None):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+        with self.fake.lock:
+            self.fake.api_used += 1
+            usage = f"api-usage={self.fake.api_used}/{self.fake.api_limit}"
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Sforce-Limit-Info', usage)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, code: str, message: str):
+        self._send(status, [{'errorCode': code, 'message': message}])
+
+    def _injected_failure(self) -> bool:
+        """Send a queued failure instead of handling the request"""
+        with self.fake.lock:
+            status = self.fake.failures.pop(0) if self.fake.failures else None
+        if status is None:
+            return False
+        # Drain the request body so the connection stays usable
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        code = 'REQUEST_LIMIT_EXCEEDED' if status in (403, 429) else 'SERVER_UNAVAILABLE'
+        self._error(status, code, 'Injected failure')
+        return True
+
+    def _body(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if self._injected_failure():
+            return
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.fake.requests.append(('GET', url.path))
+
+        try:
+            match = re.match(r'^/services/data/[^/]+/(?P<endpoint>query|queryAll)/?(?P<locator>[^/]*)$', url.path)
+            if match:
+                return self._query(params, match.group('locator'), match.group('endpoint') == 'queryAll')
+
+            match = re.match(r'^/services/data/[^/]+/sobjects/(?P<sobject>\w+)/deleted/?$', url.path)
+            if match:
+                return self._deleted(match.group('sobject'), params)
+
+            match = re.match(r'^/services/data/[^/]+/jobs/query/(?P<job>\w+)(?P<results>/results)?$', url.path)
+            if match:
+                return self._bulk_get(match.group('job'), bool(match.group('results')), params)
+        except SOQLError as e:
+            return self._error(400, 'MALFORMED_QUERY', str(e))
+
+        self._error(404, 'NOT_FOUND', f"Unknown resource: {url.path}")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if self._injected_failure():
+            return
+        self.fake.requests.append(('POST', url.path))
+
+        if re.match(r'^/cometd/[\d.]+/?$', url.path):
+            replies = []
+            for message in self._body():
+                replies.extend(self.fake.bayeux(message))
+            return self._send(200, replies)
+
+        if re.match(r'^/services/data/[^/]+/jobs/query/?$', url.path):
+            body = self._body()
+            try:
+                rows, fields, _ = self.fake.run_query(body['query'], body.get('operation') == 'queryAll')
+            except SOQLError as e:
+                return self._error(400, 'MALFORMED_QUERY', str(e))
+
+            job_id = uuid.uuid4().hex[:18]
+            with self.fake.lock:
+                self.fake.jobs[job_id] = {'rows': rows, 'fields': fields, 'polls': 0}
+            return self._send(200, {'id': job_id, 'operation': 'query', 'state': 'UploadComplete'})
+
+        self._error(404, 'NOT_FOUND', f"Unknown resource: {url.path}")
+
+    def do_DELETE(self):
+        url = urlparse(self.path)
+        if self._injected_failure():
+            return
+        self.fake.requests.append(('DELETE', url.path))
+
+        match = re.match(r'^/services/data/[^/]+/jobs/query/(?P<job>\w+)$', url.path)
+        if match and self.fake.jobs.pop(match.group('job'), None) is not None:
+            return self._send(204, b'')
+        self._error(404, 'NOT_FOUND', f"Unknown resource: {url.path}")
+
+    def _query(self, params: dict, locator: str, include_deleted: bool = False):
+        if locator:
+            cursor_id, _, offset = locator.rpartition('-')
+            cursor = self.fake.cursors.get(cursor_id)
+            if cursor is None:
+                return self._error(400, 'INVALID_QUERY_LOCATOR', 'invalid query locator')
+            rows, fields = cursor
+            return self._send(200, self.fake.query_page(rows, fields, int(offset)))
+
+        if 'q' not in params:
+            return self._error(400, 'MALFORMED_QUERY', 'Missing q parameter')
+
+        rows, fields, count_only = self.fake.run_query(params['q'], include_deleted)
+        if count_only:
+            return self._send(200, {'totalSize': len(rows), 'done': True, 'records': []})
+        return self._send(200, self.fake.query_page(rows, fields, 0))
+
+    def _deleted(self, sobject: str, params: dict):
+        if 'start' not in params or 'end' not in params:
+            return self._error(400, 'MISSING_ARGUMENT', 'start and end are required')
+
+        start, end = params['start'][:19], params['end'][:19]
+        with self.fake.lock:
+            deleted = [
+                {'id': r['Id'], 'deletedDate': r['SystemModstamp']}
+                for r in self.fake.records.get(sobject, {}).values()
+                if r['IsDeleted'] and start <= _comparable(r['SystemModstamp']) <= end
+            ]
+        self._send(200, {
+            'deletedRecords': deleted,
+            'earliestDateAvailable': params['start'],
+            'latestDateCovered': params['end'],
+        })
+
+    def _bulk_get(self, job_id: str, results: bool, params: dict):
+        job = self.fake.jobs.get(job_id)
+        if job is None:
+            return self._error(404, 'NOT_FOUND', f"Unknown job: {job_id}")
+
+        if not results:
+            # Report InProgress once so clients exercise their polling loop
+            job['polls'] += 1
+            state = 'InProgress' if job['polls'] == 1 else 'JobComplete'
+            return self._send(200, {
+                'id': job_id,
+                'state': state,
+                'numberRecordsProcessed': len(job['rows']) if state == 'JobComplete' else 0
+            })
+
+        offset = int(params.get('locator') or 0)
+        limit = int(params.get('maxRecords') or 50000)
+        chunk = job['rows'][offset:offset + limit]
+
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator='\n')
+        writer.writerow(job['fields'])
+        for row in chunk:
+            writer.writerow([_csv_value(row.get(f)) for f in job['fields']])
+
+        next_offset = offset + len(chunk)
+        locator = str(next_offset) if _has_more(job['rows'], next_offset) else 'null'
+        self._send(200, buf.getvalue().encode('utf-8'), content_type='text/csv',
+                   headers={'Sforce-Locator': locator, 'Sforce-NumberOfRecords': str(len(chunk))})
+
+
+def seed(fake: FakeSalesforce, accounts: int, objekts: int, units: int, generate: bool = False):
+    """
+    Fill the fake org with synthetic records shaped like scripts/schema.sql.
+
+    With `generate`, records are built on demand instead of stored.
+    """
+    from benchmark import load_schema, make_records, record_factory
+
+    schema = load_schema()
+    if generate:
+        fake.add_generated('Account', accounts, record_factory('account', schema))
+        fake.add_generated('Objekt__c', objekts, record_factory('objekt', schema))
+        fake.add_generated('Hausunit__c', units, record_factory('unit', schema, parent_count=max(1, objekts)))
+        return
+
+    fake.add_records('Account', make_records('account', accounts, schema))
+    fake.add_records('Objekt__c', make_records('objekt', objekts, schema))
+    fake.add_records('Hausunit__c', make_records('unit', units, schema, parent_count=max(1, objekts)))
+
+
+def _publish_changes(fake: FakeSalesforce, interval: float):
+    """Touch one random stored record per object every `interval` seconds"""
+    while True:
+        time.sleep(interval)
+        for sobject in list(fake.records):
+            with fake.lock:
+                ids = [i for i, r in fake.records[sobject].items() if not r['IsDeleted']]
+            if ids:
+                fake.change_records(sobject, [{'Id': random.choice(ids)}])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--page-size', type=int, default=2000)
+    parser.add_argument('--accounts', type=int, default=1000)
+    parser.add_argument('--objekts', type=int, default=200)
+    parser.add_argument('--units', type=int, default=2000)
+    parser.add_argument('--generate', action='store_true', help='build records on demand (large volumes)')
+    parser.add_argument('--change-interval', type=float, default=0,
+                        help='touch a random stored record of each object every N seconds (change events)')
+    args = parser.parse_args()
+
+    fake = FakeSalesforce(args.host, args.port, page_size=args.page_size)
+    seed(fake, args.accounts, args.objekts, args.units, generate=args.generate)
+    if args.change_interval > 0:
+        threading.Thread(target=_publish_changes, args=(fake, args.change_interval), daemon=True).start()
+    print(f"Fake Salesforce listening on {fake.url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,44 +2,182 @@
 Main entry point for Salesforce sync
 """
 
+import cProfile
+import os
+import pstats
 import sys
+import tracemalloc
 from dotenv import load_dotenv
+from change_stream import ChangeStream
+from daemon import SyncDaemon
+from export import SnapshotExport
+from metrics import serve_prometheus
+from shadow_load import ShadowLoad
 from sync_data import SalesforceSync
+from verify import Reconciler
 
 # Load .env file
 load_dotenv()
 
 
+def pop_option(args: list, name: str, default=None):
+    """Remove `--name value` from args and return the value"""
+    if name in args:
+        index = args.index(name)
+        if index + 1 >= len(args):
+            raise SystemExit(f"Missing value for {name}")
+        value = args[index + 1]
+        del args[index:index + 2]
+        return value
+    return default
+
+
+def pop_flag(args: list, name: str) -> bool:
+    """Remove `--name` from args and return whether it was there"""
+    if name in args:
+        args.remove(name)
+        return True
+    return False
+
+
+def run_profiled(mode: str, output: str, func):
+    """Run func under cProfile ('cpu') or tracemalloc ('memory') and print a report"""
+    if mode == 'cpu':
+        # cProfile only sees the calling thread: the DB writer, not the fetchers
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            func()
+        finally:
+            profile.disable()
+            profile.dump_stats(output or 'sync.prof')
+            pstats.Stats(profile).sort_stats('cumulative').print_stats(25)
+            print(f"Profile written to {output or 'sync.prof'}")
+
+    elif mode == 'memory':
+        tracemalloc.start(25)
+        try:
+            func()
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"Traced memory: current {current / 2**20:.1f} MiB, peak {peak / 2**20:.1f} MiB")
+            for stat in snapshot.statistics('lineno')[:20]:
+                print(stat)
+            if output:
+                snapshot.dump(output)
+                print(f"Snapshot written to {output}")
+
+    else:
+        raise SystemExit(f"Unknown profile mode: {mode} (use cpu or memory)")
+
+
 def main():
     """Main function"""
-    sync = SalesforceSync()
+    args = sys.argv[1:]
 
-    if len(sys.argv) > 1:
-        command = sys.argv[1]
+    # Options
+    workers = pop_option(args, '--workers')
+    profile = pop_option(args, '--profile')
+    profile_output = pop_option(args, '--profile-output')
+    resume = pop_flag(args, '--resume')
+    shadow = pop_flag(args, '--shadow')
+    export_format = pop_option(args, '--format')
+    output_dir = pop_option(args, '--output')
+    hashes = pop_flag(args, '--hashes')
+    dry_run = pop_flag(args, '--dry-run')
 
-        if command == 'full':
-            # Full sync
-            sync.sync_all()
+    sync = SalesforceSync(workers=int(workers) if workers else None)
+
+    # /metrics of this process's runs, for as long as it runs
+    metrics_port = int(os.getenv('SYNC_METRICS_PORT', 0))
+    if metrics_port:
+        serve_prometheus(sync.metrics, metrics_port)
+
+    def run(func, *func_args):
+        if profile:
+            run_profiled(profile, profile_output, lambda: func(*func_args))
+        else:
+            func(*func_args)
+
+    if len(args) > 0:
+        command = args[0]
+
+        if command == 'full' and shadow:
+            # Full load into shadow tables, swapped in when complete
+            if resume:
+                raise SystemExit("--resume does not apply to --shadow loads")
+            run(ShadowLoad(sync).run)
+
+        elif command == 'full':
+            # Full sync, or continue an interrupted one
+            run(sync.sync_all, resume)
 
         elif command == 'incremental':
-            # Incremental sync
-            hours = int(sys.argv[2]) if len(sys.argv) > 2 else 24
-            sync.sync_incremental(hours)
+            # Incremental sync: from stored checkpoints, or a fixed window
+            hours = int(args[1]) if len(args) > 1 else None
+            run(sync.sync_incremental, hours)
+
+        elif command == 'stream':
+            # Change Data Capture: apply change events as they happen
+            run(ChangeStream(sync).run)
+
+        elif command == 'daemon':
+            # Long-running: probe each object for changes on an adaptive interval
+            run(SyncDaemon(sync).run)
+
+        elif command == 'export':
+            # Snapshot files streamed page by page, no database involved
+            object_keys = args[1].split(',') if len(args) > 1 else None
+            run(SnapshotExport(sync, output_dir, export_format).run, object_keys)
+
+        elif command == 'verify':
+            # Compare per Id range with Salesforce, re-sync only what differs
+            object_keys = args[1].split(',') if len(args) > 1 else None
+            run(Reconciler(sync, hashes=hashes, repair=not dry_run).run, object_keys)
+
+        elif command == 'read-model':
+            # Fill unit_details from scratch; syncs keep it up to date afterwards
+            run(sync.rebuild_read_model)
 
         else:
             print("Usage:")
             print("  python main.py full                 # Sync all data")
-            print("  python main.py incremental [hours]  # Sync recent changes")
+            print("  python main.py full --resume        # Continue an interrupted full sync")
+            print("  python main.py full --shadow        # Load into shadow tables, index, then swap in")
+            print("  python main.py incremental          # Sync changes since last checkpoint")
+            print("  python main.py incremental [hours]  # Sync changes of the last N hours")
+            print("  python main.py stream               # Apply change events continuously (CDC)")
+            print("  python main.py daemon               # Poll for changes and sync them, until SIGTERM")
+            print("  python main.py export [objects]     # Stream objects to NDJSON/Parquet files")
+            print("  python main.py verify [objects]     # Find and repair rows that differ from Salesforce")
+            print("  python main.py read-model           # Rebuild the unit_details read table")
+            print()
+            print("Options:")
+            print("  --workers N             Objects downloaded in parallel (default: SYNC_WORKERS or 3)")
+            print("  --profile cpu|memory    Profile the run with cProfile or tracemalloc")
+            print("  --profile-output FILE   Where to write the profile (default: sync.prof for cpu)")
+            print("  --format ndjson|parquet Export file format (default: SYNC_EXPORT_FORMAT or ndjson)")
+            print("  --output DIR            Export directory (default: SYNC_EXPORT_DIR or ./data)")
+            print("  --hashes                Verify: also compare matching ranges row by row")
+            print("  --dry-run               Verify: report differences without repairing them")
             print()
             print("Examples:")
             print("  python main.py full")
-            print("  python main.py incremental 24")
+            print("  python main.py full --workers 2")
+            print("  python main.py incremental")
             print("  python main.py incremental 6")
+            print("  python main.py stream")
+            print("  SYNC_DAEMON_MAX_INTERVAL=600 python main.py daemon")
+            print("  python main.py export account,unit --format parquet")
+            print("  python main.py verify unit --dry-run")
+            print("  python main.py full --profile cpu")
     else:
         # Default: full sync
         print("Running full sync...")
-        sync.sync_all()
+        run(sync.sync_all)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,503 @@
+"""
+Salesforce object to PostgreSQL table mappings
+One registry entry per object; the SOQL, COPY column order and upsert SQL
+are generated from it once at import time
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+# Column holding the content hash of the synced fields
+HASH_COLUMN = 'sync_hash'
+
+# Update policies for ON CONFLICT
+OVERWRITE = 'overwrite'      # column = EXCLUDED.column
+INSERT_ONLY = 'insert_only'  # never changed after the first insert
+COALESCE = 'coalesce'        # keep the stored value when Salesforce sends NULL
+
+# Fields selected for bookkeeping (checkpoints) but not stored
+SYSTEM_FIELDS = ('SystemModstamp',)
+
+
+# --- Type coercion (None passes through) ---
+
+def to_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    return str(value)
+
+
+def to_bool(value):
+    if value is None or isinstance(value, bool):
+        return value
+    return str(value).lower() == 'true'
+
+
+def to_int(value):
+    if value is None or (isinstance(value, int) and not isinstance(value, bool)):
+        return value
+    return int(float(value))
+
+
+def to_decimal(value):
+    if value is None:
+        return None
+    return Decimal(str(value))
+
+
+def to_date(value):
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(value[:10])
+
+
+def to_datetime(value):
+    """Salesforce datetimes are UTC ('2024-01-31T08:15:00.000+0000' or '...Z')"""
+    if value is None or isinstance(value, datetime):
+        return value
+    # fromisoformat is implemented in C; strptime dominated the transform stage
+    if value[19:20] == '.':
+        return datetime.fromisoformat(value[:23])
+    return datetime.fromisoformat(value[:19])
+
+
+CONVERTERS = {
+    'text': to_text,
+    'bool': to_bool,
+    'int': to_int,
+    'decimal': to_decimal,
+    'date': to_date,
+    'datetime': to_datetime,
+}
+
+
+class Field:
+    """One Salesforce field stored in one column"""
+
+    __slots__ = ('sf_name', 'column', 'type', 'update')
+
+    def __init__(self, sf_name: str, column: str, type: str = 'text', update: str = OVERWRITE):
+        if type not in CONVERTERS:
+            raise ValueError(f"Unknown field type for {sf_name}: {type}")
+        if update not in (OVERWRITE, INSERT_ONLY, COALESCE):
+            raise ValueError(f"Unknown update policy for {sf_name}: {update}")
+        self.sf_name = sf_name
+        self.column = column
+        self.type = type
+        self.update = update
+
+    def __repr__(self):
+        return f"Field({self.sf_name!r}, {self.column!r}, {self.type!r})"
+
+
+def audit_fields() -> list:
+    """Created/LastModified fields shared by every object"""
+    return [
+        Field('CreatedById', 'created_by_id', update=INSERT_ONLY),
+        Field('CreatedDate', 'created_date', 'datetime', update=INSERT_ONLY),
+        Field('LastModifiedById', 'last_modified_by_id'),
+        Field('LastModifiedDate', 'last_modified_date', 'datetime'),
+    ]
+
+
+class ObjectMapping:
+    """
+    Salesforce object synced into one table.
+
+    Everything the sync needs is derived here once: the SOQL query, the
+    column order used by COPY and the loaders, the upsert statement and a
+    compiled converter from a Salesforce record to a tuple in column order.
+    """
+
+    def __init__(self, key: str, sobject: str, table: str, fields: list,
+                 depends_on: tuple = (), where: str = 'IsDeleted = false', id_column: str = 'id'):
+        self.key = key
+        self.sobject = sobject
+        self.table = table
+        self.fields = fields
+        self.depends_on = tuple(depends_on)
+        self.where = where
+        self.id_column = id_column
+
+        self.columns = [f.column for f in fields]
+        self.sf_fields = [f.sf_name for f in fields]
+        self.fields_by_name = {f.sf_name: f for f in fields}
+        self.id_index = self.columns.index(id_column)
+        self.id_field = self.sf_fields[self.id_index]
+
+        # Rows written to the table carry the content hash as last column
+        self.write_columns = self.columns + [HASH_COLUMN]
+
+        self.soql = self._build_soql()
+        # Deleted records still in the recycle bin (queryAll)
+        self.deleted_soql = f"SELECT {self.id_field}, SystemModstamp FROM {self.sobject} WHERE IsDeleted = true"
+        # Change Data Capture channel (Objekt__c -> /data/Objekt__ChangeEvent)
+        event = self.sobject[:-3] + '__ChangeEvent' if self.sobject.endswith('__c') else self.sobject + 'ChangeEvent'
+        self.change_channel = f"/data/{event}"
+        self.on_conflict = self._build_on_conflict()
+        self.upsert_sql = self._build_upsert_sql()
+        self.convert = self._compile_converter()
+        self._csv_converters = {}
+
+    def __repr__(self):
+        return f"ObjectMapping({self.key!r}, {self.sobject!r} -> {self.table!r})"
+
+    def for_table(self, table: str) -> 'ObjectMapping':
+        """The same mapping writing into another table, e.g. a shadow copy"""
+        return ObjectMapping(self.key, self.sobject, table, self.fields, self.depends_on, self.where, self.id_column)
+
+    def _build_soql(self) -> str:
+        select = ', '.join(self.sf_fields + [f for f in SYSTEM_FIELDS if f not in self.sf_fields])
+        soql = f"SELECT {select} FROM {self.sobject}"
+        if self.where:
+            soql += f" WHERE {self.where}"
+        return soql
+
+    def _build_on_conflict(self) -> str:
+        assignments = []
+        for field in self.fields:
+            if field.column == self.id_column or field.update == INSERT_ONLY:
+                continue
+            if field.update == COALESCE:
+                assignments.append(
+                    f"{field.column} = COALESCE(EXCLUDED.{field.column}, {self.table}.{field.column})"
+                )
+            else:
+                assignments.append(f"{field.column} = EXCLUDED.{field.column}")
+        assignments.append(f"{HASH_COLUMN} = EXCLUDED.{HASH_COLUMN}")
+
+        return (
+            f"ON CONFLICT ({self.id_column}) DO UPDATE SET {', '.join(assignments)} "
+            f"WHERE {self.table}.{HASH_COLUMN} IS DISTINCT FROM EXCLUDED.{HASH_COLUMN}"
+        )
+
+    def _build_upsert_sql(self) -> str:
+        placeholders = ', '.join(['%s'] * len(self.write_columns))
+        return (
+            f"INSERT INTO {self.table} ({', '.join(self.write_columns)}) "
+            f"VALUES ({placeholders}) {self.on_conflict}"
+        )
+
+    def merge_sql(self, stage: str) -> str:
+        """INSERT ... SELECT from a staging table with the write columns"""
+        columns = ', '.join(self.write_columns)
+        return (
+            f"INSERT INTO {self.table} ({columns}) "
+            f"SELECT DISTINCT ON ({self.id_column}) {columns} FROM {stage} "
+            f"ORDER BY {self.id_column} {self.on_conflict}"
+        )
+
+    def update_sql(self, fields: list) -> str:
+        """
+        UPDATE of some fields by id, for change events carrying only the
+        changed fields. The stored hash is cleared: the row is no longer the
+        one it was computed from, so the next SOQL sync rewrites it.
+        """
+        assignments = []
+        for field in fields:
+            if field.update == COALESCE:
+                assignments.append(f"{field.column} = COALESCE(%s, {field.column})")
+            else:
+                assignments.append(f"{field.column} = %s")
+        assignments.append(f"{HASH_COLUMN} = NULL")
+        return f"UPDATE {self.table} SET {', '.join(assignments)} WHERE {self.id_column} = %s"
+
+    def _compile_converter(self):
+        """Build `record -> tuple` as a single generated lambda"""
+        namespace = {f"_{name}": func for name, func in CONVERTERS.items() if name != 'text'}
+        items = []
+        for field in self.fields:
+            getter = f"get({field.sf_name!r})"
+            items.append(getter if field.type == 'text' else f"_{field.type}({getter})")
+        source = f"lambda get: ({', '.join(items)},)"
+        row_from_getter = eval(source, namespace)  # noqa: S307 - source built from the registry only
+        return lambda record: row_from_getter(record.get)
+
+    def csv_converter(self, header: list):
+        """
+        Build `csv row -> tuple` for a Bulk API result with this header.
+
+        Values are read by position, so no dict is built per row; empty
+        strings become None before type coercion.
+        """
+        key = tuple(header)
+        convert = self._csv_converters.get(key)
+        if convert is None:
+            namespace = {f"_{name}": func for name, func in CONVERTERS.items() if name != 'text'}
+            positions = {name: i for i, name in enumerate(header)}
+            items = []
+            for field in self.fields:
+                if field.sf_name not in positions:
+                    items.append('None')
+                    continue
+                value = f"(r[{positions[field.sf_name]}] or None)"
+                items.append(value if field.type == 'text' else f"_{field.type}{value}")
+            source = f"lambda r: ({', '.join(items)},)"
+            convert = eval(source, namespace)  # noqa: S307 - source built from the registry only
+            self._csv_converters[key] = convert
+        return convert
+
+
+# =====================================================
+# REGISTRY
+# =====================================================
+
+ACCOUNT = ObjectMapping(
+    key='account', sobject='Account', table='accounts',
+    fields=[
+        Field('Id', 'id'),
+
+        # Name
+        Field('Name', 'name'),
+        Field('Salutation', 'salutation'),
+        Field('FirstName', 'first_name'),
+        Field('LastName', 'last_name'),
+        Field('MiddleName', 'middle_name'),
+        Field('Suffix', 'suffix'),
+
+        # Ownership
+        Field('OwnerId', 'owner_id'),
+        Field('RecordTypeId', 'record_type_id'),
+        Field('ParentId', 'parent_id'),
+
+        Field('Account_Balance__c', 'account_balance', 'decimal'),
+
+        # Contact
+        Field('PersonEmail', 'person_email'),
+        Field('PersonMobilePhone', 'person_mobile_phone'),
+        Field('PersonHomePhone', 'person_home_phone'),
+        Field('PersonAssistantPhone', 'person_assistant_phone'),
+        Field('Phone', 'phone'),
+        Field('Email__c', 'email__c'),
+        Field('Email_2__pc', 'email_2__pc'),
+        Field('Email_2__c', 'email_2__c'),
+        Field('Mobile_phone__c', 'mobile_phone__c'),
+        Field('Other_mobile_phone__pc', 'other_mobile_phone__pc'),
+        Field('Other_phone__c', 'other_phone__c'),
+        Field('Fax', 'fax'),
+        Field('Website', 'website'),
+
+        # Billing address
+        Field('BillingStreet', 'billing_street'),
+        Field('BillingCity', 'billing_city'),
+        Field('BillingState', 'billing_state'),
+        Field('BillingPostalCode', 'billing_postal_code'),
+        Field('BillingCountry', 'billing_country'),
+        Field('BillingLatitude', 'billing_latitude', 'decimal'),
+        Field('BillingLongitude', 'billing_longitude', 'decimal'),
+
+        # Shipping address
+        Field('ShippingStreet', 'shipping_street'),
+        Field('ShippingCity', 'shipping_city'),
+        Field('ShippingState', 'shipping_state'),
+        Field('ShippingPostalCode', 'shipping_postal_code'),
+        Field('ShippingCountry', 'shipping_country'),
+        Field('ShippingLatitude', 'shipping_latitude', 'decimal'),
+        Field('ShippingLongitude', 'shipping_longitude', 'decimal'),
+
+        # Person mailing address
+        Field('PersonMailingStreet', 'person_mailing_street'),
+        Field('PersonMailingCity', 'person_mailing_city'),
+        Field('PersonMailingState', 'person_mailing_state'),
+        Field('PersonMailingPostalCode', 'person_mailing_postal_code'),
+        Field('PersonMailingCountry', 'person_mailing_country'),
+        Field('PersonMailingLatitude', 'person_mailing_latitude', 'decimal'),
+        Field('PersonMailingLongitude', 'person_mailing_longitude', 'decimal'),
+        Field('PersonOtherPhone', 'person_other_phone'),
+
+        # Picklists
+        Field('AccountSource', 'account_source'),
+        Field('Industry', 'industry'),
+        Field('Contact_import_sourc__pc', 'contact_import_sourc__pc'),
+        Field('Account_type__c', 'account_type__c'),
+        Field('Contacttype__pc', 'contacttype__pc'),
+
+        # Personal
+        Field('PersonBirthdate', 'person_birthdate', 'date'),
+        Field('PersonTitle', 'person_title'),
+        Field('PersonDepartment', 'person_department'),
+
+        # Business
+        Field('IsCustomerPortal', 'is_customer_portal', 'bool'),
+        Field('NumberOfEmployees', 'number_of_employees', 'int'),
+        Field('SicDesc', 'sic_desc'),
+
+        # Custom / community
+        Field('Bankverbindung_IBAN__c', 'bankverbindung_iban__c'),
+        Field('Freistellungs_bescheinigung__c', 'freistellungs_bescheinigung__c'),
+        Field('Inside_ID__pc', 'inside_id__pc'),
+        Field('Community_user_ID__pc', 'community_user_id__pc'),
+        Field('Default_community_userID__c', 'default_community_userid__c'),
+        Field('Community_user_calculation__c', 'community_user_calculation__c', 'int'),
+        Field('Created_by_auto_flow__c', 'created_by_auto_flow__c', 'int'),
+
+        # Lookups
+        Field('PersonIndividualId', 'person_individual_id'),
+        Field('PersonReportsToId', 'person_reports_to_id'),
+        Field('FlowToolKit__Latest_Form_Submission__c', 'flowtoolkit__latest_form_submission__c'),
+        Field('FlowToolKit__Latest_Form_Submission__pc', 'flowtoolkit__latest_form_submission__pc'),
+        Field('Novumstate_campaign__pc', 'novumstate_campaign__pc'),
+
+        # System
+        Field('Description', 'description'),
+        Field('Jigsaw', 'jigsaw'),
+        Field('SourceSystemIdentifier', 'source_system_identifier'),
+
+        *audit_fields(),
+
+        # Stay-in-Touch
+        Field('PersonLastCURequestDate', 'person_last_cu_request_date', 'datetime'),
+        Field('PersonLastCUUpdateDate', 'person_last_cu_update_date', 'datetime'),
+    ]
+)
+
+OBJEKT = ObjectMapping(
+    key='objekt', sobject='Objekt__c', table='objekts', depends_on=('account',),
+    fields=[
+        Field('Id', 'id'),
+        Field('Name', 'name'),
+        Field('Objekt_ID__c', 'objekt_id__c'),
+
+        # Address (compound field)
+        Field('Address__Street__s', 'address_street'),
+        Field('Address__City__s', 'address_city'),
+        Field('Address__StateCode__s', 'address_state'),
+        Field('Address__PostalCode__s', 'address_postal_code'),
+        Field('Address__CountryCode__s', 'address_country'),
+        Field('Address__Latitude__s', 'address_latitude', 'decimal'),
+        Field('Address__Longitude__s', 'address_longitude', 'decimal'),
+
+        # Property details
+        Field('Anzahl_WE__c', 'anzahl_we__c', 'int'),
+        Field('Anzahl_Gew__c', 'anzahl_gew__c', 'int'),
+        Field('Anzahl_Stellplaz__c', 'anzahl_stellplaz__c', 'int'),
+        Field('Number_of_other_unit_types__c', 'number_of_other_unit_types__c', 'int'),
+
+        # Roll-up summaries
+        Field('Apartment_unit__c', 'apartment_unit__c', 'int'),
+        Field('Gewerbeeinheiten__c', 'gewerbeeinheiten__c', 'int'),
+        Field('Stellplatze__c', 'stellplatze__c', 'int'),
+
+        # Contracts
+        Field('In_management_this_year__c', 'in_management_this_year__c', 'int'),
+        Field('In_management_next_year__c', 'in_management_next_year__c', 'int'),
+        Field('Vertragsende_letzter_SEV_Vertrag__c', 'vertragsende_letzter_sev_vertrag__c', 'date'),
+        Field('Verwaltervertragsende__c', 'verwaltervertragsende__c', 'date'),
+
+        # Formulas
+        Field('Difference_WE__c', 'difference_we__c', 'int'),
+        Field('Difference_GEw__c', 'difference_gew__c', 'int'),
+        Field('Different_stellplatz__c', 'different_stellplatz__c', 'int'),
+        Field('Total_houses_and_offices__c', 'total_houses_and_offices__c', 'int'),
+        Field('Wohn_Gewerbeeinheiten__c', 'wohn_gewerbeeinheiten__c', 'int'),
+        Field('Check_today_with_last_SEV_date__c', 'check_today_with_last_sev_date__c', 'bool'),
+        Field('Check_today_with_last_vertrage_date__c', 'check_today_with_last_vertrage_date__c', 'bool'),
+        Field('City_group__c', 'city_group__c'),
+        Field('Management_level__c', 'management_level__c'),
+        Field('Property_manager__c', 'property_manager__c'),
+        Field('Verwaltungsstatus__c', 'verwaltungsstatus__c'),
+        Field('ID_Name__c', 'id_name__c'),
+        Field('view_link__c', 'view_link__c'),
+
+        # Lookups to accounts (service providers)
+        Field('Eigentumer__c', 'eigentumer__c'),
+        Field('Hausmeister__c', 'hausmeister__c'),
+        Field('Hausreinigung__c', 'hausreinigung__c'),
+        Field('Elektro__c', 'elektro__c'),
+        Field('Heizung_Sanitar__c', 'heizung_sanitar__c'),
+        Field('Messdienstleister__c', 'messdienstleister__c'),
+        Field('Schlusseldienst__c', 'schlusseldienst__c'),
+        Field('Versicherungsmakler__c', 'versicherungsmakler__c'),
+        Field('Wasserschadenbehebung__c', 'wasserschadenbehebung__c'),
+        Field('Winterdienst__c', 'winterdienst__c'),
+        Field('Management_companyold__c', 'management_companyold__c'),
+
+        # Other lookups
+        Field('Hausverwaltung__c', 'hausverwaltung__c'),
+        Field('Objektbuchhalter__c', 'objektbuchhalter__c'),
+        Field('OwnerId', 'owner_id'),
+
+        # Picklists
+        Field('Contract_origin_objekt__c', 'contract_origin_objekt__c'),
+        Field('Name_system__c', 'name_system__c'),
+        Field('Priority__c', 'priority__c'),
+        Field('Type_WEG_MV__c', 'type_weg_mv__c'),
+
+        # Email & communication
+        Field('Objekt_emailaddress__c', 'objekt_emailaddress__c'),
+        Field('Owners_emails__c', 'owners_emails__c'),
+        Field('Tenants_emails__c', 'tenants_emails__c'),
+
+        # Additional info
+        Field('Picture__c', 'picture__c'),
+        Field('Letzte_Abrechnung__c', 'letzte_abrechnung__c'),
+        Field('Allgemeine_Hinweise__c', 'allgemeine_hinweise__c'),
+        Field('Status_Objektbuchhaltung__c', 'status_objektbuchhaltung__c'),
+        Field('Checked_and_confirmed__c', 'checked_and_confirmed__c', 'bool'),
+        Field('Impower__c', 'impower__c'),
+
+        *audit_fields(),
+    ]
+)
+
+UNIT = ObjectMapping(
+    key='unit', sobject='Hausunit__c', table='units', depends_on=('objekt',),
+    fields=[
+        Field('Id', 'id'),
+        Field('Name', 'name'),
+        Field('Description__c', 'description__c'),
+        Field('Objekt__c', 'objekt__c'),
+
+        # Unit details
+        Field('Type_of_unit__c', 'type_of_unit__c'),
+        Field('Bauart__c', 'bauart__c'),
+        Field('Wohnflache__c', 'wohnflache__c', 'decimal'),
+        Field('Heizflache__c', 'heizflache__c', 'decimal'),
+
+        # IDs & integration
+        Field('AccountingID__c', 'accounting_id__c'),
+        Field('Impower_Unit_ID__c', 'impower_unit_id__c'),
+
+        # Contracts
+        Field('Count_active_SEV_contracts__c', 'count_active_sev_contracts__c', 'int'),
+        Field('Count_vertrage__c', 'count_vertrage__c', 'int'),
+        Field('Last_vertrag_start_date__c', 'last_vertrag_start_date__c', 'date'),
+        Field('Last_vertrage_end_date__c', 'last_vertrage_end_date__c', 'date'),
+
+        Field('Objekt_text__c', 'objekt_text__c'),
+        Field('Owner_note__c', 'owner_note__c'),
+        Field('Trigger__c', 'trigger__c', 'int'),
+
+        *audit_fields(),
+    ]
+)
+
+# Table from scripts/schema_test.sql; enable with SYNC_OBJECTS=...,owner_relationship
+OWNER_RELATIONSHIP = ObjectMapping(
+    key='owner_relationship', sobject='Beziehung_zur_Einheit__c', table='owner_relationships',
+    depends_on=('account', 'objekt', 'unit'),
+    fields=[
+        Field('Id', 'id'),
+        Field('Name', 'name'),
+
+        # Lookups
+        Field('Owner__c', 'owner__c'),
+        Field('Unit__c', 'unit__c'),
+        Field('Parent_Objekt__c', 'parent_objekt__c'),
+        Field('OwnerId', 'owner_id'),
+
+        Field('Start_date__c', 'start_date__c', 'date'),
+        Field('End_date__c', 'end_date__c', 'date'),
+        Field('Active__c', 'active__c', 'bool'),
+        Field('Haus_unit_description__c', 'haus_unit_description__c'),
+        Field('Objekt_name__c', 'objekt_name__c'),
+
+        *audit_fields(),
+    ]
+)
+
+# In dependency order (parents first)
+MAPPINGS = {m.key: m for m in (ACCOUNT, OBJEKT, UNIT, OWNER_RELATIONSHIP)}
+
+# Synced unless SYNC_OBJECTS says otherwise
+DEFAULT_OBJECTS = ('account', 'objekt', 'unit')
@@ -0,0 +1,171 @@
+"""
+Sync run metrics
+Per-stage timers and counters for one sync run; summarized into the
+sync_runs table and optionally exported in Prometheus text format
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Stages timed during a run, in pipeline order
+STAGES = ('http', 'decode', 'transform', 'hash_filter', 'load', 'delete', 'commit')
+
+
+class Metrics:
+    """
+    Thread-safe timers and counters.
+
+    Timers accumulate seconds and calls per (name, labels); counters
+    accumulate values. Fetch threads and the writer share one instance,
+    so stage seconds are summed over threads and can exceed wall time.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Outcome of the last finished run (kept across resets)
+        self.last_run = {}
+        self.reset()
+
+    def reset(self):
+        """Start a new run"""
+        with self.lock:
+            self.timers = {}    # (name, labels) -> [calls, seconds]
+            self.counters = {}  # (name, labels) -> value
+            self.started = time.time()
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted(labels.items()))
+
+    def add_time(self, name: str, seconds: float, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            timer = self.timers.setdefault(key, [0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Time a block: `with metrics.timer('load', table='accounts'):`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start, **labels)
+
+    def count(self, name: str, value: int = 1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def seconds(self, name: str) -> float:
+        """Seconds of a timer, summed over labels"""
+        with self.lock:
+            return sum(t[1] for (n, _), t in self.timers.items() if n == name)
+
+    def total(self, name: str) -> int:
+        """Value of a counter, summed over labels"""
+        with self.lock:
+            return sum(v for (n, _), v in self.counters.items() if n == name)
+
+    def summary(self) -> dict:
+        """Stage seconds and counter totals (without labels), JSON-serializable"""
+        with self.lock:
+            stages, counters = {}, {}
+            for (name, _), (calls, seconds) in self.timers.items():
+                stage = stages.setdefault(name, {'calls': 0, 'seconds': 0.0})
+                stage['calls'] += calls
+                stage['seconds'] += seconds
+            for (name, _), value in self.counters.items():
+                counters[name] = counters.get(name, 0) + value
+
+        for stage in stages.values():
+            stage['seconds'] = round(stage['seconds'], 3)
+        return {'stages': stages, 'counters': counters}
+
+    def summary_text(self) -> str:
+        """One line per stage, in pipeline order"""
+        stages = self.summary()['stages']
+        names = [s for s in STAGES if s in stages] + sorted(set(stages) - set(STAGES))
+        return ', '.join(f"{name} {stages[name]['seconds']:.1f}s" for name in names)
+
+    def finish_run(self, success: bool):
+        """Record the outcome of the current run"""
+        finished = time.time()
+        self.last_run = {
+            'success': int(success),
+            'timestamp_seconds': round(finished),
+            'duration_seconds': round(finished - self.started, 3),
+        }
+
+    def to_prometheus(self, prefix: str = 'sf_sync') -> str:
+        """Prometheus text exposition of the current run"""
+        def labels_text(labels: tuple) -> str:
+            if not labels:
+                return ''
+            return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+        lines = []
+        with self.lock:
+            timers = sorted(self.timers.items())
+            counters = sorted(self.counters.items())
+
+        lines.append(f"# HELP {prefix}_stage_seconds Seconds spent per stage in the last run (summed over threads)")
+        lines.append(f"# TYPE {prefix}_stage_seconds gauge")
+        for (name, labels), (_, seconds) in timers:
+            lines.append(f"{prefix}_stage_seconds{labels_text((('stage', name),) + labels)} {seconds:.6f}")
+
+        lines.append(f"# HELP {prefix}_stage_calls Timed calls per stage in the last run")
+        lines.append(f"# TYPE {prefix}_stage_calls gauge")
+        for (name, labels), (calls, _) in timers:
+            lines.append(f"{prefix}_stage_calls{labels_text((('stage', name),) + labels)} {calls}")
+
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name}{labels_text(labels)} {value}")
+
+        for name, value in self.last_run.items():
+            lines.append(f"# TYPE {prefix}_last_run_{name} gauge")
+            lines.append(f"{prefix}_last_run_{name} {value}")
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        """Write the exposition atomically (node_exporter textfile collector)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+
+def serve_prometheus(metrics: Metrics, port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """Serve /metrics for `metrics` from a background thread"""
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.rstrip('/') != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.to_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
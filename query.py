@@ -1,6 +1,7 @@
-import requests
 import json
 
+from sync_data import SalesforceAPI
+
 # --- Cấu hình ---
 INSTANCE_URL = ""
 ACCESS_TOKEN = ""
@@ -8,41 +9,29 @@ ACCESS_TOKEN = ""
 # SOQL query
 SOQL_QUERY = "SELECT Id, Name, FirstName, LastName, IsPersonAccount FROM Account"
 
-# file output
-OUTPUT_FILE = "./data/accounts_data.json"
-
-# --- Header ---
-headers = {
-    "Authorization": f"Bearer {ACCESS_TOKEN}",
-    "Content-Type": "application/json"
-}
-
-# --- URL batch đầu ---
-url = f"{INSTANCE_URL}/services/data/v65.0/query/?q={SOQL_QUERY}"
-
-all_records = []
-
-while url:
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        print("Error:", response.status_code, response.text)
-        break
+# file output: NDJSON, mỗi dòng một record (đối tượng đã map: python main.py export)
+OUTPUT_FILE = "./data/accounts_data.ndjson"
 
-    data = response.json()
+# Tải song song: > 1 chia query thành các khoảng Id rời nhau
+CHUNKS = 1
 
-    # Thêm record vào list
-    all_records.extend(data.get("records", []))
+# --- Client: pooled session, gzip, retry/backoff ---
+sf_api = SalesforceAPI(INSTANCE_URL, "v65.0", ACCESS_TOKEN)
 
-    # Kiểm tra batch tiếp theo
-    next_url = data.get("nextRecordsUrl")
-    if next_url:
-        url = f"{INSTANCE_URL}{next_url}"
-    else:
-        url = None
+# Lấy từng batch (nextRecordsUrl), hoặc song song theo khoảng Id
+if CHUNKS > 1:
+    pages = sf_api.chunked_query_pages(SOQL_QUERY, CHUNKS, workers=CHUNKS)
+else:
+    pages = sf_api.query_pages(SOQL_QUERY)
 
-# --- Lưu JSON ---
+# --- Ghi NDJSON theo từng batch: bộ nhớ không tăng theo số record ---
+total = 0
 with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-    json.dump(all_records, f, ensure_ascii=False, indent=2)
+    for records in pages:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+        total += len(records)
 
-print(f"Tổng record lấy được: {len(all_records)}")
+print(f"Tổng record lấy được: {total}")
 print(f"Lưu xong vào file: {OUTPUT_FILE}")
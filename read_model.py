@@ -0,0 +1,119 @@
+"""
+Denormalized read model
+unit_details holds one row per unit with its objekt and the accounts the
+objekt points at (owner, Eigentümer, Hausverwaltung, Hausmeister), so
+lookups read one narrow table instead of joining the wide synced tables.
+It is refreshed for the ids each commit touched, inside that commit.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'unit_details'
+
+# objekts lookup column -> unit_details column of the referenced account
+ACCOUNT_LOOKUPS = {
+    'owner_id': 'owner_id',
+    'eigentumer__c': 'eigentumer_id',
+    'hausverwaltung__c': 'hausverwaltung_id',
+    'hausmeister__c': 'hausmeister_id',
+}
+
+COLUMNS = [
+    'unit_id', 'unit_name', 'type_of_unit__c', 'wohnflache__c',
+    'objekt_id', 'objekt_name', 'address_street', 'address_postal_code', 'address_city',
+    'owner_id', 'owner_name', 'owner_email',
+    'eigentumer_id', 'eigentumer_name', 'eigentumer_email', 'eigentumer_phone',
+    'hausverwaltung_id', 'hausverwaltung_name',
+    'hausmeister_id', 'hausmeister_name',
+]
+
+# The join the read model replaces (Documents/test_sql.md)
+SELECT_SQL = """
+    SELECT
+        u.id, u.name, u.type_of_unit__c, u.wohnflache__c,
+        o.id, o.name, o.address_street, o.address_postal_code, o.address_city,
+        o.owner_id, ow.name, ow.person_email,
+        o.eigentumer__c, ei.name, ei.person_email, ei.phone,
+        o.hausverwaltung__c, hv.name,
+        o.hausmeister__c, hm.name
+    FROM units u
+    JOIN objekts o ON o.id = u.objekt__c
+    LEFT JOIN accounts ow ON ow.id = o.owner_id
+    LEFT JOIN accounts ei ON ei.id = o.eigentumer__c
+    LEFT JOIN accounts hv ON hv.id = o.hausverwaltung__c
+    LEFT JOIN accounts hm ON hm.id = o.hausmeister__c
+"""
+
+INSERT_SQL = f"INSERT INTO {TABLE} ({', '.join(COLUMNS)}) {SELECT_SQL}"
+
+# Units whose read row may change: touched units, units of touched objekts
+# and of objekts pointing at touched accounts, each looked up on the synced
+# tables (new references) and on unit_details (removed references). One
+# index-friendly branch per lookup.
+AFFECTED_SQL = " UNION ".join(
+    [
+        "SELECT unnest(%(units)s::varchar[])",
+        "SELECT id FROM units WHERE objekt__c = ANY(%(objekts)s)",
+        f"SELECT unit_id FROM {TABLE} WHERE objekt_id = ANY(%(objekts)s)",
+    ]
+    + [
+        f"SELECT u.id FROM objekts o JOIN units u ON u.objekt__c = o.id WHERE o.{lookup} = ANY(%(accounts)s)"
+        for lookup in ACCOUNT_LOOKUPS
+    ]
+    + [f"SELECT unit_id FROM {TABLE} WHERE {column} = ANY(%(accounts)s)" for column in ACCOUNT_LOOKUPS.values()]
+)
+
+
+class ReadModel:
+    """
+    Keep unit_details in step with accounts, objekts and units.
+
+    PostgresDB records the ids it writes (rows that changed by their hash)
+    and deletes per table; before each commit the affected units are
+    deleted from unit_details and re-inserted from the join, in the same
+    transaction as the data (with SYNC_DB_WRITERS > 1, right after the
+    writer connections committed it). A full rebuild is only needed after
+    shadow loads and to fill the table initially (main.py read-model).
+
+    Disabled with a warning if the table does not exist (run
+    scripts/upgrade.sql).
+    """
+
+    def __init__(self):
+        self.available = None
+
+    def _check(self, cursor) -> bool:
+        if self.available is None:
+            cursor.execute("SELECT to_regclass(%s)", (TABLE,))
+            self.available = cursor.fetchone()[0] is not None
+            if not self.available:
+                logger.warning(f"{TABLE} does not exist, the read model is not maintained (see scripts/upgrade.sql)")
+        return self.available
+
+    def refresh(self, cursor, touched: dict) -> int:
+        """Re-derive the rows of units affected by the touched ids, return units refreshed"""
+        ids = {
+            'units': list(touched.get('units', ())),
+            'objekts': list(touched.get('objekts', ())),
+            'accounts': list(touched.get('accounts', ())),
+        }
+        if not any(ids.values()) or not self._check(cursor):
+            return 0
+
+        cursor.execute(AFFECTED_SQL, ids)
+        units = [row[0] for row in cursor.fetchall()]
+        if not units:
+            return 0
+        cursor.execute(f"DELETE FROM {TABLE} WHERE unit_id = ANY(%s)", (units,))
+        cursor.execute(f"{INSERT_SQL} WHERE u.id = ANY(%s)", (units,))
+        return len(units)
+
+    def rebuild(self, cursor) -> int:
+        """Re-derive every row (readers keep seeing the old rows until commit), return rows"""
+        if not self._check(cursor):
+            return 0
+        cursor.execute(f"DELETE FROM {TABLE}")
+        cursor.execute(INSERT_SQL)
+        return cursor.rowcount
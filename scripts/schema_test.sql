@@ -150,7 +150,10 @@ CREATE TABLE IF NOT EXISTS accounts (
 
     -- Stay-in-Touch Fields
     person_last_cu_request_date TIMESTAMP,
-    person_last_cu_update_date TIMESTAMP
+    person_last_cu_update_date TIMESTAMP,
+
+    -- Sync Metadata (MD5 of the synced fields, used to skip unchanged rows)
+    sync_hash CHAR(32)
 );
 
 -- Account Indexes
@@ -266,7 +269,10 @@ CREATE TABLE IF NOT EXISTS objekts (
     created_by_id VARCHAR(18) NOT NULL,
     created_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     last_modified_by_id VARCHAR(18) NOT NULL,
-    last_modified_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    last_modified_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    -- Sync Metadata
+    sync_hash CHAR(32)
 );
 
 -- Objekt Indexes
@@ -333,6 +339,9 @@ CREATE TABLE IF NOT EXISTS units (
     last_modified_by_id VARCHAR(18) NOT NULL,
     last_modified_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
 
+    -- Sync Metadata
+    sync_hash CHAR(32),
+
     -- Foreign Key Constraint
     CONSTRAINT fk_unit_objekt FOREIGN KEY (objekt__c) REFERENCES objekts(id) ON DELETE CASCADE
 );
@@ -368,6 +377,9 @@ CREATE TABLE IF NOT EXISTS owner_relationships (
     last_modified_by_id VARCHAR(18) NOT NULL,
     last_modified_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
 
+    -- Sync Metadata
+    sync_hash CHAR(32),
+
     -- Foreign Keys cho cả 3 lookups
     CONSTRAINT fk_owner_relationship_owner
         FOREIGN KEY (owner__c) REFERENCES accounts(id),
@@ -385,6 +397,111 @@ CREATE INDEX idx_owner_relationships_unit ON owner_relationships(unit__c);
 CREATE INDEX idx_owner_relationships_objekt ON owner_relationships(parent_objekt__c);
 CREATE INDEX idx_owner_relationships_dates ON owner_relationships(start_date__c, end_date__c);
 
+-- =====================================================
+-- 5. SYNC STATE (incremental sync checkpoints)
+-- =====================================================
+CREATE TABLE IF NOT EXISTS sync_state (
+    -- Sync object key: account, objekt, unit
+    object_name VARCHAR(40) PRIMARY KEY,
+
+    -- Highest SystemModstamp committed for this object (UTC)
+    last_modstamp TIMESTAMP,
+
+    -- Highest SystemModstamp of deleted records applied (UTC)
+    last_delete_modstamp TIMESTAMP,
+
+    -- Replay ID of the last change event applied (main.py stream)
+    replay_id BIGINT,
+
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- =====================================================
+-- 6. SYNC RUNS (per-run summary and stage timings)
+-- =====================================================
+CREATE TABLE IF NOT EXISTS sync_runs (
+    id BIGSERIAL PRIMARY KEY,
+    mode VARCHAR(20) NOT NULL,          -- full, full-shadow, incremental, verify, read-model
+    started_at TIMESTAMP NOT NULL,      -- UTC
+    finished_at TIMESTAMP,              -- UTC
+    status VARCHAR(20) NOT NULL,        -- success, failed
+    error TEXT,
+
+    -- Totals
+    records_fetched BIGINT,
+    rows_inserted BIGINT,
+    rows_updated BIGINT,
+    rows_unchanged BIGINT,
+    rows_deleted BIGINT,
+
+    -- Stage timers ({"stages": {"http": {"calls", "seconds"}, ...}, "counters": {...}})
+    metrics JSONB
+);
+
+CREATE INDEX idx_sync_runs_started_at ON sync_runs(started_at);
+
+-- =====================================================
+-- 7. SYNC PROGRESS (resumable full sync, main.py full --resume)
+-- =====================================================
+CREATE TABLE IF NOT EXISTS sync_progress (
+    object_name VARCHAR(40) NOT NULL,
+    part INTEGER NOT NULL,              -- range number within the object (1 when not split)
+    method VARCHAR(10) NOT NULL,        -- rest, bulk
+    range_condition TEXT,               -- SOQL condition of the range (NULL: whole object)
+
+    -- Where to continue: last Id committed (rest, read in Id order) or
+    -- job id/next results locator (bulk)
+    position TEXT,
+    rows_done BIGINT NOT NULL DEFAULT 0,
+    max_modstamp TIMESTAMP,             -- highest SystemModstamp committed (UTC)
+    done BOOLEAN NOT NULL DEFAULT false,
+
+    started_at TIMESTAMP NOT NULL,      -- start of the run being resumed (UTC)
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (object_name, part)
+);
+
+-- =====================================================
+-- 8. READ MODEL (unit -> objekt -> accounts, see read_model.py)
+-- =====================================================
+-- Maintained by the sync for the ids each commit touched; no foreign
+-- keys, rows are re-derived from the synced tables
+CREATE TABLE IF NOT EXISTS unit_details (
+    unit_id VARCHAR(18) PRIMARY KEY,
+    unit_name VARCHAR(80),
+    type_of_unit__c VARCHAR(50),
+    wohnflache__c DECIMAL(5, 2),
+
+    objekt_id VARCHAR(18),
+    objekt_name VARCHAR(80),
+    address_street TEXT,
+    address_postal_code VARCHAR(20),
+    address_city VARCHAR(100),
+
+    -- Accounts the objekt points at (objekts.owner_id, eigentumer__c,
+    -- hausverwaltung__c, hausmeister__c); names NULL if not synced
+    owner_id VARCHAR(18),
+    owner_name VARCHAR(255),
+    owner_email VARCHAR(255),
+    eigentumer_id VARCHAR(18),
+    eigentumer_name VARCHAR(255),
+    eigentumer_email VARCHAR(255),
+    eigentumer_phone VARCHAR(40),
+    hausverwaltung_id VARCHAR(18),
+    hausverwaltung_name VARCHAR(255),
+    hausmeister_id VARCHAR(18),
+    hausmeister_name VARCHAR(255),
+
+    refreshed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Covering indexes: lookups by objekt or account are index-only scans
+CREATE INDEX idx_unit_details_objekt ON unit_details(objekt_id) INCLUDE (unit_id, unit_name, type_of_unit__c);
+CREATE INDEX idx_unit_details_owner ON unit_details(owner_id) INCLUDE (unit_id, objekt_id, objekt_name);
+CREATE INDEX idx_unit_details_eigentumer ON unit_details(eigentumer_id) INCLUDE (unit_id, unit_name, objekt_id, objekt_name);
+CREATE INDEX idx_unit_details_hausverwaltung ON unit_details(hausverwaltung_id) INCLUDE (objekt_id, objekt_name);
+CREATE INDEX idx_unit_details_hausmeister ON unit_details(hausmeister_id) INCLUDE (objekt_id, objekt_name);
+
 -- =====================================================
 -- FOREIGN KEY CONSTRAINTS
 -- =====================================================
@@ -425,6 +542,10 @@ ALTER TABLE objekts ADD CONSTRAINT fk_objekt_management_company
 
 COMMENT ON TABLE accounts IS 'Salesforce Account object - Business and Person accounts';
 COMMENT ON TABLE objekts IS 'Property/Building object - manages real estate properties';
+COMMENT ON TABLE sync_state IS 'Per-object SystemModstamp high-water mark, advanced in the same transaction as the synced rows';
+COMMENT ON TABLE sync_runs IS 'One row per sync run: outcome, row counts and per-stage timings';
+COMMENT ON TABLE sync_progress IS 'Committed position of an unfinished full sync, per object part; emptied when the full sync completes';
+COMMENT ON TABLE unit_details IS 'Denormalized unit -> objekt -> accounts read model, refreshed incrementally by the sync';
 COMMENT ON TABLE units IS 'Unit object - individual apartments, commercial spaces, or parking spots within an Objekt';
 COMMENT ON TABLE owner_relationships IS 'Junction table linking Accounts (owners) to Units with date ranges';
 
@@ -0,0 +1,88 @@
+-- =====================================================
+-- UPGRADE AN EXISTING SYNC DATABASE
+-- Safe to run more than once; brings a database created from an
+-- older scripts/schema.sql up to date
+-- =====================================================
+
+-- Incremental sync checkpoints
+CREATE TABLE IF NOT EXISTS sync_state (
+    object_name VARCHAR(40) PRIMARY KEY,
+    last_modstamp TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+ALTER TABLE sync_state ADD COLUMN IF NOT EXISTS last_delete_modstamp TIMESTAMP;
+ALTER TABLE sync_state ADD COLUMN IF NOT EXISTS replay_id BIGINT;
+
+-- Sync run history
+CREATE TABLE IF NOT EXISTS sync_runs (
+    id BIGSERIAL PRIMARY KEY,
+    mode VARCHAR(20) NOT NULL,
+    started_at TIMESTAMP NOT NULL,
+    finished_at TIMESTAMP,
+    status VARCHAR(20) NOT NULL,
+    error TEXT,
+    records_fetched BIGINT,
+    rows_inserted BIGINT,
+    rows_updated BIGINT,
+    rows_unchanged BIGINT,
+    rows_deleted BIGINT,
+    metrics JSONB
+);
+CREATE INDEX IF NOT EXISTS idx_sync_runs_started_at ON sync_runs(started_at);
+
+-- Resumable full sync progress
+CREATE TABLE IF NOT EXISTS sync_progress (
+    object_name VARCHAR(40) NOT NULL,
+    part INTEGER NOT NULL,
+    method VARCHAR(10) NOT NULL,
+    range_condition TEXT,
+    position TEXT,
+    rows_done BIGINT NOT NULL DEFAULT 0,
+    max_modstamp TIMESTAMP,
+    done BOOLEAN NOT NULL DEFAULT false,
+    started_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (object_name, part)
+);
+
+-- Change detection hashes
+ALTER TABLE accounts ADD COLUMN IF NOT EXISTS sync_hash CHAR(32);
+ALTER TABLE objekts ADD COLUMN IF NOT EXISTS sync_hash CHAR(32);
+ALTER TABLE units ADD COLUMN IF NOT EXISTS sync_hash CHAR(32);
+ALTER TABLE IF EXISTS owner_relationships ADD COLUMN IF NOT EXISTS sync_hash CHAR(32);
+
+-- Read model (fill it with: python main.py read-model)
+CREATE TABLE IF NOT EXISTS unit_details (
+    unit_id VARCHAR(18) PRIMARY KEY,
+    unit_name VARCHAR(80),
+    type_of_unit__c VARCHAR(50),
+    wohnflache__c DECIMAL(5, 2),
+
+    objekt_id VARCHAR(18),
+    objekt_name VARCHAR(80),
+    address_street TEXT,
+    address_postal_code VARCHAR(20),
+    address_city VARCHAR(100),
+
+    -- Accounts the objekt points at (objekts.owner_id, eigentumer__c,
+    -- hausverwaltung__c, hausmeister__c); names NULL if not synced
+    owner_id VARCHAR(18),
+    owner_name VARCHAR(255),
+    owner_email VARCHAR(255),
+    eigentumer_id VARCHAR(18),
+    eigentumer_name VARCHAR(255),
+    eigentumer_email VARCHAR(255),
+    eigentumer_phone VARCHAR(40),
+    hausverwaltung_id VARCHAR(18),
+    hausverwaltung_name VARCHAR(255),
+    hausmeister_id VARCHAR(18),
+    hausmeister_name VARCHAR(255),
+
+    refreshed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_unit_details_objekt ON unit_details(objekt_id) INCLUDE (unit_id, unit_name, type_of_unit__c);
+CREATE INDEX IF NOT EXISTS idx_unit_details_owner ON unit_details(owner_id) INCLUDE (unit_id, objekt_id, objekt_name);
+CREATE INDEX IF NOT EXISTS idx_unit_details_eigentumer ON unit_details(eigentumer_id) INCLUDE (unit_id, unit_name, objekt_id, objekt_name);
+CREATE INDEX IF NOT EXISTS idx_unit_details_hausverwaltung ON unit_details(hausverwaltung_id) INCLUDE (objekt_id, objekt_name);
+CREATE INDEX IF NOT EXISTS idx_unit_details_hausmeister ON unit_details(hausmeister_id) INCLUDE (objekt_id, objekt_name);
@@ -0,0 +1,389 @@
+"""
+Shadow-table full load
+Loads every synced object into a fresh copy of its table without secondary
+indexes or foreign keys, builds the indexes in parallel, adds the foreign
+keys NOT VALID and validates them, analyzes, and swaps the copies in with
+one transaction, so readers never see a half-loaded table
+"""
+
+import logging
+import os
+import queue
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import psycopg2
+import psycopg2.errors
+
+from mappings import to_datetime
+from sync_data import SalesforceSync
+
+logger = logging.getLogger(__name__)
+
+SHADOW_SUFFIX = '_shadow'
+OLD_SUFFIX = '_old'
+
+# PostgreSQL truncates longer identifiers
+MAX_IDENTIFIER = 63
+
+_INDEX_PATTERN = re.compile(r'^CREATE (UNIQUE )?INDEX (\S+) ON (ONLY )?(\S+) ')
+
+
+def shadow_name(name: str) -> str:
+    """Name of an index or key while it lives next to the live one"""
+    return name[:MAX_IDENTIFIER - len(SHADOW_SUFFIX)] + SHADOW_SUFFIX
+
+
+class ShadowLoad:
+    """
+    Full sync into shadow tables, swapped in when complete.
+
+    Each table `t` is loaded into `t_shadow`, created LIKE `t` without its
+    indexes, keys or foreign keys, so nothing is maintained row by row and
+    pages are appended with plain COPY (no hash lookup, no merge).
+    Afterwards the primary key and the other indexes are built on
+    SYNC_INDEX_WORKERS connections at once, the foreign keys are added NOT
+    VALID (no scan, short lock) and validated in parallel, and the tables
+    are analyzed. One transaction then
+    renames `t` to `t_old` and `t_shadow` to `t`, re-points the foreign keys
+    of tables that were not reloaded, drops the old tables and sets the
+    checkpoints to the start of the load: changes made in the meantime were
+    applied to the old tables and are picked up again by the next
+    incremental sync. The read model (unit_details) is rebuilt in full
+    after the swap.
+
+    Deleted records are simply absent from the new tables, so no delete
+    pass is needed.
+    """
+
+    def __init__(self, sync: SalesforceSync):
+        self.sync = sync
+        self.db = sync.db
+        self.metrics = sync.metrics
+
+        # Connections building indexes, validating and analyzing at once
+        self.index_workers = int(os.getenv('SYNC_INDEX_WORKERS', 4))
+        # Per index build connection, e.g. 1GB (default: the server's setting)
+        self.maintenance_work_mem = os.getenv('SYNC_MAINTENANCE_WORK_MEM')
+
+        # Dependency order: parents are swapped in before children
+        self.keys = [key for key, _, _ in sync.OBJECTS if key in sync.object_keys]
+        self.tables = {sync.MAPPINGS[key].table: sync.MAPPINGS[key].table + SHADOW_SUFFIX for key in self.keys}
+        self.id_columns = {sync.MAPPINGS[key].table: sync.MAPPINGS[key].id_column for key in self.keys}
+        self.definitions = {}
+        self.modstamps = {}
+        # VALIDATE statements for foreign keys re-pointed by the swap
+        self.repointed = []
+
+    def run(self):
+        """Load all objects into shadow tables and swap them in"""
+        sync = self.sync
+        with sync._run('full-shadow'):
+            logger.info("=== Starting shadow full load ===")
+            started_at = datetime.utcnow()
+            try:
+                self._create_shadows()
+                self._load()
+                self._build_indexes()
+                self._add_foreign_keys()
+                self._execute_parallel([f"ANALYZE {shadow}" for shadow in self.tables.values()], 'analyze')
+                self._swap(started_at)
+            except Exception:
+                self._drop_shadows()
+                raise
+            self._rebuild_read_model()
+            self._validate_repointed()
+
+            sync._log_stats()
+            logger.info("\n=== ✓ Shadow full load completed ===")
+
+    def _describe(self, table: str) -> dict:
+        """Keys, foreign keys, secondary indexes, comment and grants of a live table"""
+        cursor = self.db.conn.cursor()
+        cursor.execute(
+            """
+            SELECT conname, contype, pg_get_constraintdef(oid), confrelid::regclass::text
+            FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'x', 'f')
+            ORDER BY conname
+            """,
+            (table,)
+        )
+        keys, foreign_keys = [], []
+        for name, kind, definition, referenced in cursor.fetchall():
+            definition = definition.removesuffix(' NOT VALID')
+            if kind == 'f':
+                foreign_keys.append((name, definition, referenced))
+            else:
+                keys.append((name, kind, definition))
+
+        # Indexes not backing a key
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_indexdef(i.indexrelid)
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE i.indrelid = %s::regclass
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = i.indexrelid)
+            ORDER BY c.relname
+            """,
+            (table,)
+        )
+        indexes = cursor.fetchall()
+
+        # Foreign keys of other tables pointing at this one
+        cursor.execute(
+            """
+            SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+            FROM pg_constraint
+            WHERE contype = 'f' AND confrelid = %s::regclass AND conrelid <> confrelid
+            """,
+            (table,)
+        )
+        referenced_by = [(child, name, definition.removesuffix(' NOT VALID')) for child, name, definition in cursor]
+
+        cursor.execute("SELECT obj_description(%s::regclass, 'pg_class')", (table,))
+        comment = cursor.fetchone()[0]
+        cursor.execute(
+            """
+            SELECT a.privilege_type, COALESCE(quote_ident(r.rolname), 'PUBLIC')
+            FROM pg_class c
+            CROSS JOIN LATERAL aclexplode(c.relacl) a
+            LEFT JOIN pg_roles r ON r.oid = a.grantee
+            WHERE c.oid = %s::regclass AND a.grantee <> c.relowner
+            """,
+            (table,)
+        )
+        grants = cursor.fetchall()
+
+        return {
+            'keys': keys, 'foreign_keys': foreign_keys, 'indexes': indexes,
+            'referenced_by': referenced_by, 'comment': comment, 'grants': grants,
+        }
+
+    def _create_shadows(self):
+        """Empty shadow tables with columns, defaults and checks only"""
+        cursor = self.db.conn.cursor()
+        for table, shadow in self.tables.items():
+            definition = self.definitions[table] = self._describe(table)
+
+            # Left over by an interrupted run
+            cursor.execute(f"DROP TABLE IF EXISTS {shadow} CASCADE")
+            cursor.execute(f"CREATE TABLE {shadow} (LIKE {table} INCLUDING ALL EXCLUDING INDEXES)")
+            if definition['comment']:
+                cursor.execute(f"COMMENT ON TABLE {shadow} IS %s", (definition['comment'],))
+            for privilege, grantee in definition['grants']:
+                cursor.execute(f"GRANT {privilege} ON {shadow} TO {grantee}")
+        self.db.commit()
+        logger.info(f"Created shadow tables: {', '.join(self.tables.values())}")
+
+    def _drop_shadows(self):
+        """Best effort: remove the shadow tables of a failed load"""
+        try:
+            self.db.rollback()
+            cursor = self.db.conn.cursor()
+            for shadow in self.tables.values():
+                cursor.execute(f"DROP TABLE IF EXISTS {shadow} CASCADE")
+            self.db.commit()
+        except Exception as e:
+            logger.warning(f"Could not drop shadow tables: {e}")
+
+    def _load(self):
+        """Fetch every object like a full sync and write it into its shadow table"""
+        sync = self.sync
+        with ThreadPoolExecutor(max_workers=max(1, sync.workers), thread_name_prefix='sf-plan') as planner:
+            plans = list(planner.map(lambda key: sync._plan_parts(sync.QUERIES[key]), self.keys))
+
+        sources = {}
+        for key, plan in zip(self.keys, plans):
+            mapping = sync.MAPPINGS[key]
+            parts = [
+                {'part': number, 'method': method, 'range_condition': condition, 'position': None}
+                for number, (method, condition) in enumerate(plan, 1)
+            ]
+            sources[key] = [sync._part_pages(mapping, part) for part in parts]
+
+        sync._sync_objects(sources, self._write_shadow)
+
+    def _write_shadow(self, query_key: str, table_name: str, pages):
+        """Write one object into its shadow table, committing every SYNC_COMMIT_ROWS rows"""
+        sync = self.sync
+        mapping = sync.MAPPINGS[query_key].for_table(self.tables[table_name])
+        writer = sync.writer or self.db
+
+        total = 0
+        uncommitted = 0
+        max_modstamp = None
+        try:
+            for _, rows, modstamp, _ in pages:
+                total += writer.append_rows(mapping, rows)
+                if modstamp:
+                    modstamp = to_datetime(modstamp)
+                    max_modstamp = max(max_modstamp or modstamp, modstamp)
+
+                uncommitted += len(rows)
+                if sync.commit_rows and uncommitted >= sync.commit_rows:
+                    sync._commit()
+                    uncommitted = 0
+                    logger.info(f"Loaded {total} records into {mapping.table}")
+            sync._commit()
+        except Exception as e:
+            sync._rollback()
+            logger.error(f"✗ Failed to load {mapping.table}: {e}")
+            raise
+
+        self.modstamps[query_key] = max_modstamp
+        logger.info(f"✓ Loaded {total} records into {mapping.table}")
+
+    def _execute_parallel(self, statements: list, stage: str):
+        """
+        Run statements (SQL, or functions of a cursor) on up to
+        SYNC_INDEX_WORKERS autocommit connections, raise the first failure
+        """
+        if not statements:
+            return
+        jobs = queue.Queue()
+        for statement in statements:
+            jobs.put(statement)
+
+        def work():
+            conn = psycopg2.connect(**self.db.conn_params)
+            conn.autocommit = True
+            try:
+                cursor = conn.cursor()
+                if self.maintenance_work_mem:
+                    cursor.execute("SET maintenance_work_mem = %s", (self.maintenance_work_mem,))
+                while True:
+                    try:
+                        statement = jobs.get_nowait()
+                    except queue.Empty:
+                        return
+                    with self.metrics.timer(stage):
+                        if callable(statement):
+                            statement(cursor)
+                        else:
+                            cursor.execute(statement)
+            finally:
+                conn.close()
+
+        workers = max(1, min(self.index_workers, len(statements)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pg-ddl') as executor:
+            futures = [executor.submit(work) for _ in range(workers)]
+        for future in futures:
+            future.result()
+
+    def _primary_key(self, table: str, name: str, key: str):
+        """
+        Job adding a shadow table's primary key. A record changed while the
+        query paged through it can have been read twice: if the key does not
+        build, all but the last copy loaded are removed and it is retried.
+        """
+        shadow = self.tables[table]
+        id_column = self.id_columns[table]
+        statement = f"ALTER TABLE {shadow} ADD CONSTRAINT {shadow_name(name)} {key}"
+
+        def add(cursor):
+            try:
+                cursor.execute(statement)
+            except psycopg2.errors.UniqueViolation:
+                cursor.execute(
+                    f"DELETE FROM {shadow} a USING {shadow} b "
+                    f"WHERE a.{id_column} = b.{id_column} AND a.ctid < b.ctid"
+                )
+                logger.warning(f"Removed {cursor.rowcount} duplicate rows from {shadow}")
+                cursor.execute(statement)
+        return add
+
+    def _build_indexes(self):
+        """Keys and secondary indexes of every shadow table, in parallel"""
+        statements = []
+        for table, shadow in self.tables.items():
+            definition = self.definitions[table]
+            for name, kind, key in definition['keys']:
+                if kind == 'p':
+                    statements.insert(0, self._primary_key(table, name, key))
+                else:
+                    statements.append(f"ALTER TABLE {shadow} ADD CONSTRAINT {shadow_name(name)} {key}")
+            for name, index in definition['indexes']:
+                statements.append(_INDEX_PATTERN.sub(
+                    lambda m: f"CREATE {m.group(1) or ''}INDEX {shadow_name(name)} ON {m.group(3) or ''}{shadow} ",
+                    index,
+                    count=1
+                ))
+
+        logger.info(f"Building {len(statements)} indexes on {min(self.index_workers, len(statements))} connections")
+        self._execute_parallel(statements, 'index')
+
+    def _add_foreign_keys(self):
+        """
+        Foreign keys of the shadow tables: added NOT VALID in one short
+        transaction, then validated in parallel (VALIDATE only blocks
+        schema changes). References to a reloaded table point at its shadow.
+        """
+        cursor = self.db.conn.cursor()
+        validations = []
+        for table, shadow in self.tables.items():
+            for name, key, referenced in self.definitions[table]['foreign_keys']:
+                if referenced in self.tables:
+                    key = key.replace(f"REFERENCES {referenced}(", f"REFERENCES {self.tables[referenced]}(", 1)
+                cursor.execute(f"ALTER TABLE {shadow} ADD CONSTRAINT {name} {key} NOT VALID")
+                validations.append(f"ALTER TABLE {shadow} VALIDATE CONSTRAINT {name}")
+        self.db.commit()
+
+        logger.info(f"Validating {len(validations)} foreign keys")
+        self._execute_parallel(validations, 'validate')
+
+    def _swap(self, started_at: datetime):
+        """Replace the live tables with the shadow tables in one transaction"""
+        cursor = self.db.conn.cursor()
+        with self.metrics.timer('swap'):
+            for table, shadow in self.tables.items():
+                cursor.execute(f"ALTER TABLE {table} RENAME TO {table}{OLD_SUFFIX}")
+                cursor.execute(f"ALTER TABLE {shadow} RENAME TO {table}")
+
+            # Foreign keys of tables that were not reloaded still point at
+            # the old tables: re-add them by name, NOT VALID for now
+            for table in self.tables:
+                for child, name, key in self.definitions[table]['referenced_by']:
+                    if child in self.tables:
+                        continue
+                    cursor.execute(f"ALTER TABLE {child} DROP CONSTRAINT {name}")
+                    cursor.execute(f"ALTER TABLE {child} ADD CONSTRAINT {name} {key} NOT VALID")
+                    self.repointed.append(f"ALTER TABLE {child} VALIDATE CONSTRAINT {name}")
+
+            cursor.execute(f"DROP TABLE {', '.join(table + OLD_SUFFIX for table in self.tables)}")
+
+            # Indexes and keys take over the names of the dropped ones
+            for table in self.tables:
+                definition = self.definitions[table]
+                for name, _, _ in definition['keys']:
+                    cursor.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {shadow_name(name)} TO {name}")
+                for name, _ in definition['indexes']:
+                    cursor.execute(f"ALTER INDEX {shadow_name(name)} RENAME TO {name}")
+
+            for key in self.keys:
+                if self.modstamps.get(key):
+                    self.db.set_checkpoint(key, min(self.modstamps[key], started_at))
+            # An interrupted regular full sync has nothing left to resume
+            self.db.clear_progress()
+            self.db.commit()
+        logger.info(f"Swapped in {', '.join(self.tables)}")
+
+    def _rebuild_read_model(self):
+        """The swapped-in tables were never touched row by row: re-derive unit_details in full"""
+        read_model = self.db.read_model
+        if read_model is None:
+            return
+        with self.metrics.timer('read_model'):
+            rows = read_model.rebuild(self.db.conn.cursor())
+            self.db.commit()
+        logger.info(f"Rebuilt unit_details: {rows} rows")
+
+    def _validate_repointed(self):
+        """Validate re-pointed foreign keys; rows that fail leave theirs NOT VALID"""
+        for statement in self.repointed:
+            try:
+                self._execute_parallel([statement], 'validate')
+            except psycopg2.Error as e:
+                logger.warning(f"{statement} failed, the constraint stays NOT VALID: {e}")
@@ -3,12 +3,34 @@ Salesforce to PostgreSQL Sync
 Just fetch data from SF API and update to PostgreSQL
 """
 
+import csv
+import hashlib
+import io
 import os
+import re
+import json
+import random
+import time
 import requests
+from requests.adapters import HTTPAdapter
 import psycopg2
 from psycopg2.extras import execute_batch
+from psycopg2.pool import ThreadedConnectionPool
 import logging
+import queue
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from mappings import DEFAULT_OBJECTS, HASH_COLUMN, MAPPINGS, ObjectMapping, to_datetime
+from metrics import Metrics
+from read_model import ReadModel
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to the json module
+    orjson = None
 
 # Setup logging
 logging.basicConfig(
@@ -18,10 +40,131 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _sobject_name(soql: str) -> str:
+    """Object name from a SOQL query, for logging"""
+    match = re.search(r'\bFROM\s+(\w+)', soql, re.IGNORECASE)
+    return match.group(1) if match else 'query'
+
+
+def add_filter(soql: str, condition: str) -> str:
+    """Add a condition to the WHERE clause of a SOQL query"""
+    match = re.search(
+        r'\bWHERE\b(.*?)(?=\bORDER\s+BY\b|\bLIMIT\b|\bOFFSET\b|$)',
+        soql, re.IGNORECASE | re.DOTALL
+    )
+    if match:
+        where = f"WHERE ({match.group(1).strip()}) AND {condition} "
+        return soql[:match.start()] + where + soql[match.end():]
+
+    match = re.search(r'\bORDER\s+BY\b|\bLIMIT\b|\bOFFSET\b', soql, re.IGNORECASE)
+    end = match.start() if match else len(soql)
+    return f"{soql[:end].rstrip()} WHERE {condition} {soql[end:]}"
+
+
+def count_query(soql: str) -> str:
+    """Turn a SELECT query into SELECT COUNT() with the same filters"""
+    return re.sub(r'^\s*SELECT\s.*?\sFROM\s', 'SELECT COUNT() FROM ', soql,
+                  count=1, flags=re.IGNORECASE | re.DOTALL)
+
+
+def soql_datetime(value: datetime, milliseconds: bool = False) -> str:
+    """Format a UTC datetime as a SOQL literal (to the second, or the millisecond)"""
+    if milliseconds:
+        return value.strftime('%Y-%m-%dT%H:%M:%S.') + f"{value.microsecond // 1000:03d}Z"
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def probe_query(soql: str, field: str, descending: bool = False) -> str:
+    """Rewrite a query to return only its lowest (or highest) `field` value"""
+    select = re.sub(r'^\s*SELECT\s.*?\sFROM\s', f'SELECT {field} FROM ', soql,
+                    count=1, flags=re.IGNORECASE | re.DOTALL)
+    return f"{select} ORDER BY {field} {'DESC' if descending else 'ASC'} LIMIT 1"
+
+
+# Salesforce Id characters in sort order
+_ID_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+
+def split_id_range(low: str, high: str, chunks: int) -> list:
+    """Up to chunks - 1 ascending 15-character Ids evenly spaced between two Ids"""
+    def to_number(record_id: str) -> int:
+        number = 0
+        for char in record_id[:15]:
+            number = number * 62 + _ID_ALPHABET.index(char)
+        return number
+
+    def to_id(number: int) -> str:
+        chars = []
+        for _ in range(15):
+            number, digit = divmod(number, 62)
+            chars.append(_ID_ALPHABET[digit])
+        return ''.join(reversed(chars))
+
+    start, end = to_number(low), to_number(high)
+    return sorted({to_id(start + (end - start) * i // chunks) for i in range(1, chunks)} - {low[:15]})
+
+
+def split_time_range(low: datetime, high: datetime, chunks: int) -> list:
+    """Up to chunks - 1 ascending whole-second datetimes evenly spaced between two datetimes"""
+    bounds = {(low + (high - low) * i / chunks).replace(microsecond=0) for i in range(1, chunks)}
+    return sorted(b for b in bounds if b > low)
+
+
+def range_conditions(field: str, bounds: list, literal) -> list:
+    """SOQL conditions for the ranges between sorted bounds; the outer ranges are open"""
+    edges = [None] + list(bounds) + [None]
+    conditions = []
+    for low, high in zip(edges, edges[1:]):
+        parts = []
+        if low is not None:
+            parts.append(f"{field} >= {literal(low)}")
+        if high is not None:
+            parts.append(f"{field} < {literal(high)}")
+        conditions.append(' AND '.join(parts))
+    return conditions
+
+
+def decode_json(response):
+    """Response body as JSON, parsed with orjson when installed"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+# Bulk API result page kept as raw CSV rows (see bulk_query_pages); the
+# last page of each results chunk carries the position after it
+CsvPage = namedtuple('CsvPage', ['columns', 'rows', 'position'], defaults=[None])
+
+
+def _iter_lines(response, chunk_size: int = 65536):
+    """Decoded lines of a streamed response, line endings kept (for csv)"""
+    pending = ''
+    for chunk in response.iter_content(chunk_size=chunk_size, decode_unicode=True):
+        lines = (pending + chunk).splitlines(keepends=True)
+        pending = lines.pop() if lines and not lines[-1].endswith(('\n', '\r')) else ''
+        yield from lines
+    if pending:
+        yield pending
+
+
 class SalesforceAPI:
     """Salesforce API client"""
 
-    def __init__(self, instance_url: str, api_version: str, access_token: str):
+    # Bulk API 2.0 job states
+    BULK_DONE_STATES = ('JobComplete', 'Failed', 'Aborted')
+
+    # Responses worth retrying: throttling and transient server errors
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    # Fields a query can be split on for parallel extraction
+    CHUNK_FIELDS = ('Id', 'CreatedDate')
+
+    def __init__(self, instance_url: str, api_version: str, access_token: str,
+                 bulk_page_size: int = 10000, bulk_max_records: int = 50000,
+                 bulk_poll_interval: float = 2.0, bulk_timeout: float = 3600,
+                 pool_size: int = 10, max_retries: int = 5, backoff_base: float = 1.0,
+                 backoff_max: float = 60.0, timeout: tuple = (10, 300),
+                 api_slowdown: float = 0.8, api_max_delay: float = 5.0, metrics: Metrics = None):
         self.instance_url = instance_url
         self.api_version = api_version
         self.access_token = access_token
@@ -30,19 +173,119 @@ class SalesforceAPI:
             'Content-Type': 'application/json'
         }
 
-    def query(self, soql: str) -> list:
-        """Execute SOQL query and return all records"""
+        # Bulk API 2.0: records per yielded page / per results request
+        self.bulk_page_size = bulk_page_size
+        self.bulk_max_records = bulk_max_records
+        self.bulk_poll_interval = bulk_poll_interval
+        self.bulk_timeout = bulk_timeout
+
+        # One pooled session: keep-alive across pages, gzip responses
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update(self.headers)
+        self.session.headers['Accept-Encoding'] = 'gzip, deflate'
+
+        # Retry with exponential backoff and jitter
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+
+        # Daily API usage from the Sforce-Limit-Info header: above
+        # `api_slowdown` of the limit, requests are delayed up to `api_max_delay`
+        self.api_usage = None
+        self.api_slowdown = api_slowdown
+        self.api_max_delay = api_max_delay
+
+        # Stage timers: http (request + body), decode (JSON parsing)
+        self.metrics = metrics or Metrics()
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+
+    def _track_limits(self, response):
+        """Remember API usage reported as 'api-usage=used/limit'"""
+        match = re.search(r'api-usage=(\d+)/(\d+)', response.headers.get('Sforce-Limit-Info', ''))
+        if match:
+            used, limit = int(match.group(1)), int(match.group(2))
+            previous = self.api_usage
+            self.api_usage = (used, limit)
+            if limit and used / limit >= self.api_slowdown and (
+                    previous is None or previous[0] / previous[1] < self.api_slowdown):
+                logger.warning(f"API usage at {used}/{limit}, slowing down requests")
+
+    def _throttle(self):
+        """Delay requests as daily API usage approaches the org limit"""
+        if not self.api_usage or not self.api_usage[1] or self.api_slowdown >= 1:
+            return
+        used, limit = self.api_usage
+        ratio = used / limit
+        if ratio >= self.api_slowdown:
+            share = min(1.0, (ratio - self.api_slowdown) / (1 - self.api_slowdown))
+            time.sleep(self.api_max_delay * share)
+
+    def _backoff(self, attempt: int, retry_after: str = None) -> float:
+        """Seconds to wait before retry number `attempt` (0-based)"""
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return random.uniform(delay / 2, delay)
+
+    def _should_retry(self, response) -> bool:
+        if response.status_code in self.RETRY_STATUSES:
+            return True
+        # Concurrent request limit is reported as 403 REQUEST_LIMIT_EXCEEDED
+        return response.status_code == 403 and 'REQUEST_LIMIT_EXCEEDED' in response.text
+
+    def _request(self, method: str, url: str, **kwargs):
+        """Send a request on the pooled session, retrying transient failures"""
+        kwargs.setdefault('timeout', self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            self._throttle()
+            try:
+                self.metrics.count('http_requests')
+                with self.metrics.timer('http'):
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                self.metrics.count('http_retries')
+                logger.warning(f"{method} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            self._track_limits(response)
+            if attempt < self.max_retries and self._should_retry(response):
+                delay = self._backoff(attempt, response.headers.get('Retry-After'))
+                self.metrics.count('http_retries')
+                logger.warning(f"{method} returned {response.status_code}, retrying in {delay:.1f}s "
+                               f"({attempt + 1}/{self.max_retries})")
+                response.close()
+                time.sleep(delay)
+                continue
+
+            return response
+
+    def query_pages(self, soql: str, include_deleted: bool = False):
+        """Execute SOQL query and yield records page by page (queryAll with include_deleted)"""
         # Clean query string: remove newlines and extra spaces
         clean_soql = " ".join(soql.split())
+        sobject = _sobject_name(clean_soql)
 
-        url = f"{self.instance_url}/services/data/{self.api_version}/query/"
+        endpoint = 'queryAll' if include_deleted else 'query'
+        url = f"{self.instance_url}/services/data/{self.api_version}/{endpoint}/"
         params = {'q': clean_soql}
 
-        all_records = []
+        total = 0
 
         try:
             # Initial request
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self._request('GET', url, params=params)
 
             # Error handling for bad queries
             if response.status_code == 400:
@@ -50,11 +293,14 @@ class SalesforceAPI:
                 logger.error(f"Response: {response.text}")
 
             response.raise_for_status()
-            data = response.json()
+            with self.metrics.timer('decode'):
+                data = decode_json(response)
 
             # Get records
             records = data.get('records', [])
-            all_records.extend(records)
+            total += len(records)
+            self.metrics.count('records_fetched', len(records), sobject=sobject)
+            yield records
 
             # Handle pagination
             while not data.get('done', True):
@@ -62,24 +308,352 @@ class SalesforceAPI:
                 if not next_url:
                     break
 
-                logger.info(f"Fetching next batch... (total: {len(all_records)})")
-                response = requests.get(f"{self.instance_url}{next_url}", headers=self.headers)
+                logger.info(f"Fetching next {sobject} batch... (total: {total})")
+                # Drop the previous page before the next one arrives
+                data = records = None
+                response = self._request('GET', f"{self.instance_url}{next_url}")
                 response.raise_for_status()
-                data = response.json()
-                all_records.extend(data.get('records', []))
+                with self.metrics.timer('decode'):
+                    data = decode_json(response)
+                records = data.get('records', [])
+                total += len(records)
+                self.metrics.count('records_fetched', len(records), sobject=sobject)
+                yield records
 
-            logger.info(f"Fetched {len(all_records)} records")
-            return all_records
+            logger.info(f"Fetched {total} {sobject} records")
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Query failed: {e}")
             raise
 
+    def count(self, soql: str, include_deleted: bool = False) -> int:
+        """Number of records a query would return (queryAll with `include_deleted`)"""
+        clean_soql = " ".join(count_query(soql).split())
+        endpoint = 'queryAll' if include_deleted else 'query'
+        url = f"{self.instance_url}/services/data/{self.api_version}/{endpoint}/"
+
+        response = self._request('GET', url, params={'q': clean_soql})
+        if response.status_code == 400:
+            logger.error(f"Bad Request (400). Query sent: {clean_soql}")
+        response.raise_for_status()
+        return response.json().get('totalSize', 0)
+
+    def chunk_conditions(self, soql: str, chunks: int, field: str = 'Id') -> list:
+        """
+        Split a query into up to `chunks` disjoint `field` ranges.
+
+        The lowest and highest values are found with two boundary probes
+        (ORDER BY field LIMIT 1) and the span between them is split evenly.
+        The outer ranges are open-ended, so every record, including ones
+        created meanwhile, falls in exactly one range. An empty condition
+        means the whole query; it is returned without probing when
+        `chunks` is below 2.
+        """
+        if field not in self.CHUNK_FIELDS:
+            raise ValueError(f"Cannot split queries by {field}")
+
+        if chunks < 2:
+            return ['']
+        low = self.query(probe_query(soql, field))
+        if not low:
+            return ['']
+        high = self.query(probe_query(soql, field, descending=True)) or low
+
+        low, high = low[0][field], high[0][field]
+        if field == 'Id':
+            return range_conditions(field, split_id_range(low, high, chunks), lambda v: f"'{v}'")
+        return range_conditions(field, split_time_range(to_datetime(low), to_datetime(high), chunks), soql_datetime)
+
+    def chunked_query_pages(self, soql: str, chunks: int, workers: int, field: str = 'Id',
+                            max_pages: int = 4):
+        """
+        Fetch a query as disjoint `field` ranges in parallel, yield pages as they arrive.
+
+        Each range is its own nextRecordsUrl chain; up to `workers` ranges
+        are fetched at once and at most `max_pages` pages are buffered.
+        """
+        clean_soql = " ".join(soql.split())
+        sobject = _sobject_name(clean_soql)
+        conditions = self.chunk_conditions(clean_soql, chunks, field)
+        logger.info(f"{sobject}: fetching {len(conditions)} {field} ranges with {workers} workers")
+
+        def chunk_pages(number: int, condition: str):
+            total = 0
+            for records in self.query_pages(add_filter(clean_soql, condition) if condition else clean_soql):
+                total += len(records)
+                yield records
+            logger.info(f"{sobject} chunk {number}/{len(conditions)} done: {total} records ({condition or 'all'})")
+
+        executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='sf-chunk')
+        pages = PagePrefetcher(
+            [chunk_pages(number, condition) for number, condition in enumerate(conditions, 1)],
+            max_pages,
+            executor=executor,
+            merge=True
+        )
+        try:
+            yield from pages
+        finally:
+            pages.close()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def get_deleted(self, sobject: str, start: datetime, end: datetime) -> dict:
+        """
+        Records of `sobject` deleted between start and end (UTC).
+
+        Returns the sobjects/{type}/deleted response: `deletedRecords`
+        ([{'id', 'deletedDate'}]), `earliestDateAvailable` and
+        `latestDateCovered`. Salesforce only serves the last 30 days.
+        """
+        url = f"{self.instance_url}/services/data/{self.api_version}/sobjects/{sobject}/deleted/"
+        params = {
+            'start': start.strftime('%Y-%m-%dT%H:%M:%S+00:00'),
+            'end': end.strftime('%Y-%m-%dT%H:%M:%S+00:00'),
+        }
+
+        response = self._request('GET', url, params=params)
+        if response.status_code == 400:
+            logger.error(f"Bad Request (400) for deleted {sobject}: {response.text}")
+        response.raise_for_status()
+        return response.json()
+
+    def bayeux(self, messages: list) -> list:
+        """POST Bayeux messages to the Streaming API (CometD) endpoint, return the replies"""
+        url = f"{self.instance_url}/cometd/{self.api_version.lstrip('v')}"
+        response = self._request('POST', url, json=messages)
+        response.raise_for_status()
+        with self.metrics.timer('decode'):
+            return decode_json(response)
+
+    def bulk_query_pages(self, soql: str, raw: bool = False, resume: str = None):
+        """
+        Execute SOQL as a Bulk API 2.0 query job and yield records page by page.
+
+        The CSV result is streamed chunk by chunk (following Sforce-Locator)
+        and parsed row by row, so only one page is held in memory. Empty CSV
+        values become None; everything else stays a string. With `raw`, pages
+        are `CsvPage`s of the header and the CSV rows as parsed; the last page
+        of each results chunk but the last (possibly empty) has a 'job id/locator' position.
+        Passing that position as `resume` continues reading the job's results
+        from there, as long as Salesforce still keeps the job.
+        """
+        clean_soql = " ".join(soql.split())
+        sobject = _sobject_name(clean_soql)
+        jobs_url = f"{self.instance_url}/services/data/{self.api_version}/jobs/query"
+
+        try:
+            job_id = locator = None
+            if resume:
+                job_id, _, locator = resume.partition('/')
+                response = self._request('GET', f"{jobs_url}/{job_id}")
+                if response.status_code == 404:
+                    logger.warning(f"Bulk query job {job_id} no longer exists, starting a new one")
+                    job_id = locator = None
+                else:
+                    response.raise_for_status()
+                    logger.info(f"Resuming bulk query job {job_id} for {sobject}")
+
+            if job_id is None:
+                job_id = self._create_bulk_job(clean_soql)
+                logger.info(f"Bulk query job {job_id} created for {sobject}")
+            job_url = f"{jobs_url}/{job_id}"
+
+            # Wait for the job to finish
+            started = time.monotonic()
+            interval = self.bulk_poll_interval
+            while True:
+                response = self._request('GET', job_url)
+                response.raise_for_status()
+                job = response.json()
+                state = job.get('state')
+                if state in self.BULK_DONE_STATES:
+                    break
+                if time.monotonic() - started > self.bulk_timeout:
+                    raise TimeoutError(f"Bulk query job {job_id} still {state} after {self.bulk_timeout}s")
+                time.sleep(interval)
+                interval = min(interval * 1.5, 30)
+
+            if state != 'JobComplete':
+                raise RuntimeError(f"Bulk query job {job_id} {state}: {job.get('errorMessage')}")
+            logger.info(f"Bulk query job {job_id} complete ({job.get('numberRecordsProcessed')} records)")
+
+            # Stream result chunks
+            total = 0
+            locator = locator or None
+            while True:
+                params = {'maxRecords': self.bulk_max_records}
+                if locator:
+                    params['locator'] = locator
+
+                with self._request('GET', f"{job_url}/results", params=params, stream=True,
+                                   headers={'Accept': 'text/csv'}) as response:
+                    response.raise_for_status()
+                    response.encoding = 'utf-8'
+                    reader = csv.reader(_iter_lines(response))
+                    columns = next(reader, None) or []
+
+                    next_locator = response.headers.get('Sforce-Locator')
+                    if not next_locator or next_locator == 'null':
+                        next_locator = None
+
+                    page = []
+                    for row in reader:
+                        page.append(row if raw else {k: (v if v != '' else None) for k, v in zip(columns, row)})
+                        if len(page) >= self.bulk_page_size:
+                            total += len(page)
+                            self.metrics.count('records_fetched', len(page), sobject=sobject)
+                            yield CsvPage(columns, page) if raw else page
+                            page = []
+                    if page or (raw and next_locator):
+                        total += len(page)
+                        self.metrics.count('records_fetched', len(page), sobject=sobject)
+                        if raw:
+                            yield CsvPage(columns, page, f"{job_id}/{next_locator}" if next_locator else None)
+                        else:
+                            yield page
+
+                    locator = next_locator
+
+                if not locator:
+                    break
+                logger.info(f"Fetching next {sobject} bulk chunk... (total: {total})")
+
+            logger.info(f"Fetched {total} {sobject} records (Bulk API)")
+
+            # Results are kept by Salesforce for days; clean up
+            self._request('DELETE', job_url)
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Bulk query failed: {e}")
+            raise
+
+    def _create_bulk_job(self, soql: str) -> str:
+        """Start a Bulk API 2.0 query job, return its id"""
+        response = self._request('POST', f"{self.instance_url}/services/data/{self.api_version}/jobs/query", json={
+            'operation': 'query',
+            'query': soql,
+            'contentType': 'CSV',
+            'columnDelimiter': 'COMMA',
+            'lineEnding': 'LF'
+        })
+        if response.status_code == 400:
+            logger.error(f"Bad Request (400). Query sent: {soql}")
+            logger.error(f"Response: {response.text}")
+        response.raise_for_status()
+        return response.json()['id']
+
+    def query(self, soql: str) -> list:
+        """Execute SOQL query and return all records"""
+        all_records = []
+        for records in self.query_pages(soql):
+            all_records.extend(records)
+        return all_records
+
+
+class PagePrefetcher:
+    """
+    Fetch pages in the background and iterate over them in order.
+
+    Fetching starts immediately, on `executor` if given or on a dedicated
+    thread. At most `max_pages` pages are buffered, so memory stays bounded
+    while the producer (HTTP) and the consumer (DB writes) overlap.
+
+    With `merge`, `pages` is a list of page iterables, each fetched as its
+    own task; their pages are yielded in arrival order.
+    """
+
+    _DONE = object()
+
+    def __init__(self, pages, max_pages: int, executor=None, merge: bool = False):
+        self._sources = list(pages) if merge else [pages]
+        self._buffer = queue.Queue(maxsize=max(1, max_pages))
+        self._stop = threading.Event()
+        self._threads = []
+
+        for source in self._sources:
+            if executor is not None:
+                executor.submit(self._produce, source)
+            else:
+                thread = threading.Thread(target=self._produce, args=(source,), name='sf-prefetch', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _put(self, item) -> bool:
+        """Block until there is room in the buffer, unless closed"""
+        while not self._stop.is_set():
+            try:
+                self._buffer.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self, pages):
+        try:
+            for page in pages:
+                if not self._put(page):
+                    return
+            self._put(self._DONE)
+        except BaseException as e:
+            self._put(e)
+
+    def __iter__(self):
+        remaining = len(self._sources)
+        while remaining:
+            item = self._buffer.get()
+            if item is self._DONE:
+                remaining -= 1
+                continue
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def close(self):
+        """Stop fetching; pages not yet consumed are dropped"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def row_hash(row: tuple) -> str:
+    """Content hash of a converted row"""
+    return hashlib.md5(repr(row).encode('utf-8')).hexdigest()
+
+
+def copy_value(value) -> str:
+    """Format a value for COPY ... FROM STDIN (text format)"""
+    if type(value) is str:
+        return value.translate(_COPY_ESCAPES)
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def copy_buffer(rows: list) -> io.StringIO:
+    """Rows as COPY ... FROM STDIN text, ready to read"""
+    buf = io.StringIO()
+    for row in rows:
+        buf.write('\t'.join([copy_value(v) for v in row]))
+        buf.write('\n')
+    buf.seek(0)
+    return buf
+
 
 class PostgresDB:
     """PostgreSQL client"""
 
-    def __init__(self, host: str, port: int, database: str, user: str, password: str):
+    LOAD_METHODS = ('copy', 'batch')
+
+    def __init__(self, host: str, port: int, database: str, user: str, password: str,
+                 load_method: str = 'copy', skip_unchanged: bool = True, metrics: Metrics = None,
+                 pool: ThreadedConnectionPool = None, read_model: ReadModel = None):
         self.conn_params = {
             'host': host,
             'port': port,
@@ -88,359 +662,1204 @@ class PostgresDB:
             'password': password
         }
         self.conn = None
+        # Connections come from `pool` if given (see ParallelWriter)
+        self.pool = pool
+
+        if load_method not in self.LOAD_METHODS:
+            raise ValueError(f"Unknown load method: {load_method}")
+        self.load_method = load_method
+
+        # Change detection: rows whose hash matches the stored one are not sent
+        self.skip_unchanged = skip_unchanged
+        self.stats = {}
+
+        # Non-cascading foreign keys per referenced table, see delete_rows
+        self._references = {}
+
+        # Ids written or deleted per table since the last commit; the read
+        # model is refreshed for them as part of that commit
+        self.read_model = read_model
+        self.touched = {}
+
+        # Stage timers: transform, hash_filter, load, delete, commit
+        self.metrics = metrics or Metrics()
 
     def connect(self):
         """Connect to database"""
+        if self.pool is not None:
+            self.conn = self.pool.getconn()
+            self.conn.autocommit = False
+            return
         self.conn = psycopg2.connect(**self.conn_params)
         self.conn.autocommit = False
         logger.info(f"Connected to PostgreSQL: {self.conn_params['database']}")
 
     def close(self):
         """Close connection"""
-        if self.conn:
+        if self.conn and self.pool is not None:
+            self.pool.putconn(self.conn)
+            self.conn = None
+        elif self.conn:
             self.conn.close()
             logger.info("Database connection closed")
 
-    def upsert_records(self, table: str, records: list, upsert_sql: str):
+    @property
+    def connected(self) -> bool:
+        return self.conn is not None and not self.conn.closed
+
+    def ping(self) -> bool:
+        """Whether the connection still answers (ends the current transaction)"""
+        if not self.connected:
+            return False
+        try:
+            self.conn.rollback()
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            self.conn.rollback()
+            return True
+        except psycopg2.Error as e:
+            logger.warning(f"Database connection lost: {e}")
+            return False
+
+    def commit(self):
+        """Refresh the read model for the touched ids, commit current transaction"""
+        if self.read_model is not None and self.touched:
+            with self.metrics.timer('read_model'):
+                self.read_model.refresh(self.conn.cursor(), self.touched)
+        with self.metrics.timer('commit'):
+            self.conn.commit()
+        self.touched = {}
+
+    def rollback(self):
+        """Rollback current transaction"""
+        self.conn.rollback()
+        self.touched = {}
+
+    def touch(self, table: str, ids):
+        """Record ids written or deleted in the current transaction"""
+        self.touched.setdefault(table, set()).update(ids)
+
+    def get_checkpoints(self) -> dict:
+        """Last committed SystemModstamp per object"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT object_name, last_modstamp FROM sync_state")
+        return dict(cursor.fetchall())
+
+    def save_checkpoint(self, object_name: str, modstamp: str):
+        """Advance an object's checkpoint (part of the current transaction)"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO sync_state (object_name, last_modstamp, updated_at)
+            VALUES (%s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (object_name) DO UPDATE SET
+                last_modstamp = GREATEST(sync_state.last_modstamp, EXCLUDED.last_modstamp),
+                updated_at = EXCLUDED.updated_at
+            """,
+            (object_name, modstamp)
+        )
+
+    def set_checkpoint(self, object_name: str, modstamp: datetime):
+        """Replace an object's checkpoint, also with an earlier one (part of the current transaction)"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO sync_state (object_name, last_modstamp, updated_at)
+            VALUES (%s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (object_name) DO UPDATE SET
+                last_modstamp = EXCLUDED.last_modstamp,
+                updated_at = EXCLUDED.updated_at
+            """,
+            (object_name, modstamp)
+        )
+
+    def get_delete_checkpoints(self) -> dict:
+        """Highest SystemModstamp of deleted records applied, per object"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT object_name, last_delete_modstamp FROM sync_state WHERE last_delete_modstamp IS NOT NULL"
+        )
+        return dict(cursor.fetchall())
+
+    def save_delete_checkpoint(self, object_name: str, modstamp: str):
+        """Advance an object's delete checkpoint (part of the current transaction)"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO sync_state (object_name, last_delete_modstamp, updated_at)
+            VALUES (%s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (object_name) DO UPDATE SET
+                last_delete_modstamp = GREATEST(sync_state.last_delete_modstamp, EXCLUDED.last_delete_modstamp),
+                updated_at = EXCLUDED.updated_at
+            """,
+            (object_name, modstamp)
+        )
+
+    def get_replay_ids(self) -> dict:
+        """Replay ID of the last change event applied, per object"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT object_name, replay_id FROM sync_state WHERE replay_id IS NOT NULL")
+        return dict(cursor.fetchall())
+
+    def save_replay_id(self, object_name: str, replay_id: int):
+        """Store an object's replay ID (part of the current transaction)"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO sync_state (object_name, replay_id, updated_at)
+            VALUES (%s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (object_name) DO UPDATE SET
+                replay_id = EXCLUDED.replay_id,
+                updated_at = EXCLUDED.updated_at
+            """,
+            (object_name, replay_id)
+        )
+
+    def get_progress(self) -> dict:
+        """Parts of an unfinished full sync: {object: {part number: part}}"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            SELECT object_name, part, method, range_condition, position, rows_done, max_modstamp, done, started_at
+            FROM sync_progress ORDER BY object_name, part
+            """
+        )
+        progress = {}
+        for object_name, part, method, condition, position, rows_done, max_modstamp, done, started_at in cursor:
+            progress.setdefault(object_name, {})[part] = {
+                'part': part, 'method': method, 'range_condition': condition, 'position': position,
+                'rows_done': rows_done, 'max_modstamp': max_modstamp, 'done': done, 'started_at': started_at,
+            }
+        return progress
+
+    def save_progress(self, object_name: str, parts, started_at: datetime):
+        """Store an object's full sync parts (part of the current transaction)"""
+        cursor = self.conn.cursor()
+        execute_batch(
+            cursor,
+            """
+            INSERT INTO sync_progress (
+                object_name, part, method, range_condition, position, rows_done, max_modstamp, done,
+                started_at, updated_at
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (object_name, part) DO UPDATE SET
+                position = EXCLUDED.position,
+                rows_done = EXCLUDED.rows_done,
+                max_modstamp = EXCLUDED.max_modstamp,
+                done = EXCLUDED.done,
+                updated_at = EXCLUDED.updated_at
+            """,
+            [
+                (object_name, part['part'], part['method'], part['range_condition'], part['position'],
+                 part['rows_done'], part['max_modstamp'], part['done'], started_at)
+                for part in parts
+            ]
+        )
+
+    def clear_progress(self):
+        """Forget the progress of a full sync (part of the current transaction)"""
+        self.conn.cursor().execute("DELETE FROM sync_progress")
+
+    def record_run(self, mode: str, started_at: datetime, status: str, error: str = None):
+        """Store a run's summary in sync_runs and commit"""
+        summary = self.metrics.summary()
+        counters = summary['counters']
+        changes = {
+            key: sum(stats[key] for stats in self.stats.values())
+            for key in ('inserted', 'updated', 'unchanged')
+        }
+
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO sync_runs (
+                mode, started_at, finished_at, status, error,
+                records_fetched, rows_inserted, rows_updated, rows_unchanged, rows_deleted,
+                metrics
+            ) VALUES (%s, %s, CURRENT_TIMESTAMP AT TIME ZONE 'UTC', %s, %s, %s, %s, %s, %s, %s, %s)
+            """,
+            (
+                mode, started_at, status, error,
+                counters.get('records_fetched', 0), changes['inserted'], changes['updated'],
+                changes['unchanged'], counters.get('rows_deleted', 0),
+                json.dumps(summary)
+            )
+        )
+        self.conn.commit()
+
+    def reset_stats(self):
+        """Start new per-table inserted/updated/unchanged counters"""
+        self.stats = {}
+
+    def filter_changed(self, mapping: ObjectMapping, rows: list) -> list:
+        """
+        Append each row's content hash and drop unchanged rows.
+
+        Stored hashes are looked up for the page's ids; counts of inserted,
+        updated and unchanged rows are kept per table in `stats`.
+        """
+        rows = [row + (row_hash(row),) for row in rows]
+        if not self.skip_unchanged:
+            return rows
+
+        id_index = mapping.id_index
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"SELECT {mapping.id_column}, {HASH_COLUMN} FROM {mapping.table} "
+            f"WHERE {mapping.id_column} = ANY(%s)",
+            ([row[id_index] for row in rows],)
+        )
+        existing = dict(cursor.fetchall())
+
+        stats = self.stats.setdefault(mapping.table, {'inserted': 0, 'updated': 0, 'unchanged': 0})
+        changed = []
+        for row in rows:
+            stored = existing.get(row[id_index], False)
+            if stored is False:
+                stats['inserted'] += 1
+            elif stored != row[-1]:
+                stats['updated'] += 1
+            else:
+                stats['unchanged'] += 1
+                continue
+            changed.append(row)
+        return changed
+
+    def write_records(self, mapping: ObjectMapping, records: list) -> int:
+        """Write one batch of Salesforce records without committing, return rows processed"""
+        with self.metrics.timer('transform', table=mapping.table):
+            rows = [mapping.convert(r) for r in records]
+        return self.write_rows(mapping, rows)
+
+    def write_rows(self, mapping: ObjectMapping, rows: list) -> int:
+        """Write one batch of converted rows without committing, return rows processed"""
+        if not rows:
+            return 0
+
+        count = len(rows)
+        with self.metrics.timer('hash_filter', table=mapping.table):
+            rows = self.filter_changed(mapping, rows)
+        if not rows:
+            return count
+
+        self.touch(mapping.table, [row[mapping.id_index] for row in rows])
+        self.metrics.count('rows_written', len(rows), table=mapping.table)
+        if self.load_method == 'copy':
+            with self.metrics.timer('load', table=mapping.table):
+                self.copy_rows(mapping, rows)
+            return count
+
+        try:
+            cursor = self.conn.cursor()
+            with self.metrics.timer('load', table=mapping.table):
+                execute_batch(cursor, mapping.upsert_sql, rows, page_size=100)
+            return count
+        except Exception:
+            # Print first row to help debug column types
+            logger.error(f"Sample row for {mapping.table}: {dict(zip(mapping.write_columns, rows[0]))}")
+            raise
+
+    def copy_rows(self, mapping: ObjectMapping, rows: list) -> int:
+        """
+        Bulk write one batch of rows (with hash) without committing.
+
+        Rows are streamed with COPY into a temporary staging table shaped
+        like the target, then merged with one INSERT ... SELECT using the
+        mapping's ON CONFLICT clause.
+        """
+        if not rows:
+            return 0
+
+        table = mapping.table
+        columns = ', '.join(mapping.write_columns)
+        stage = f"stage_{table}"
+        buf = copy_buffer(rows)
+
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {stage} ON COMMIT DROP AS "
+                f"SELECT {columns} FROM {table} WITH NO DATA"
+            )
+            cursor.copy_expert(f"COPY {stage} ({columns}) FROM STDIN", buf)
+            cursor.execute(mapping.merge_sql(stage))
+            cursor.execute(f"TRUNCATE {stage}")
+            return len(rows)
+        except Exception:
+            logger.error(f"COPY into {table} failed. Expected columns: {mapping.write_columns}")
+            raise
+
+    def append_rows(self, mapping: ObjectMapping, rows: list) -> int:
+        """
+        COPY one batch of converted rows (with hash) straight into the
+        mapping's table without committing: no hash lookup, no merge. For
+        filling a new table without a key on the id (see ShadowLoad).
+        """
+        if not rows:
+            return 0
+
+        rows = [row + (row_hash(row),) for row in rows]
+        stats = self.stats.setdefault(mapping.table, {'inserted': 0, 'updated': 0, 'unchanged': 0})
+        stats['inserted'] += len(rows)
+        self.metrics.count('rows_written', len(rows), table=mapping.table)
+
+        cursor = self.conn.cursor()
+        with self.metrics.timer('load', table=mapping.table):
+            cursor.copy_expert(
+                f"COPY {mapping.table} ({', '.join(mapping.write_columns)}) FROM STDIN",
+                copy_buffer(rows)
+            )
+        return len(rows)
+
+    def existing_ids(self, mapping: ObjectMapping, ids: list) -> set:
+        """Which of these ids are stored in the mapping's table"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"SELECT {mapping.id_column} FROM {mapping.table} WHERE {mapping.id_column} = ANY(%s)",
+            (list(ids),)
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+    def update_fields(self, mapping: ObjectMapping, fields: list, rows: list) -> int:
+        """
+        Set some fields of stored rows without committing.
+
+        `rows` are tuples of the new values in `fields` order followed by
+        the id; see ObjectMapping.update_sql.
+        """
+        if not rows:
+            return 0
+        cursor = self.conn.cursor()
+        with self.metrics.timer('load', table=mapping.table):
+            execute_batch(cursor, mapping.update_sql(fields), rows, page_size=100)
+        self.touch(mapping.table, [row[-1] for row in rows])
+        self.metrics.count('rows_written', len(rows), table=mapping.table)
+        return len(rows)
+
+    def referencing_columns(self, table: str) -> list:
+        """(table, column) pairs with a foreign key to `table` that does not cascade"""
+        if table not in self._references:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                """
+                SELECT c.conrelid::regclass::text, a.attname
+                FROM pg_constraint c
+                JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+                WHERE c.contype = 'f'
+                  AND c.confrelid = %s::regclass
+                  AND c.confdeltype NOT IN ('c', 'n')
+                """,
+                (table,)
+            )
+            self._references[table] = cursor.fetchall()
+        return self._references[table]
+
+    def self_referencing_columns(self, table: str) -> list:
+        """Columns of `table` with a foreign key to `table` itself (e.g. accounts.parent_id)"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            SELECT a.attname
+            FROM pg_constraint c
+            JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+            WHERE c.contype = 'f'
+              AND c.conrelid = %s::regclass
+              AND c.confrelid = c.conrelid
+            """,
+            (table,)
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+    def delete_rows(self, mapping: ObjectMapping, ids: list) -> int:
+        """
+        Delete rows by id without committing, return rows deleted.
+
+        Lookups still pointing at these rows are cleared first, as
+        Salesforce does when a lookup target is deleted; cascading
+        foreign keys (e.g. units -> objekts) are left to PostgreSQL.
+        """
+        if not ids:
+            return 0
+
+        cursor = self.conn.cursor()
+        with self.metrics.timer('delete', table=mapping.table):
+            for ref_table, ref_column in self.referencing_columns(mapping.table):
+                cursor.execute(
+                    f"UPDATE {ref_table} SET {ref_column} = NULL WHERE {ref_column} = ANY(%s)",
+                    (ids,)
+                )
+            cursor.execute(
+                f"DELETE FROM {mapping.table} WHERE {mapping.id_column} = ANY(%s)",
+                (ids,)
+            )
+        self.touch(mapping.table, ids)
+        self.metrics.count('rows_deleted', cursor.rowcount, table=mapping.table)
+        return cursor.rowcount
+
+    def upsert_records(self, mapping: ObjectMapping, records: list):
         """Insert or update records"""
+        table = mapping.table
         if not records:
             logger.warning(f"No records to sync for {table}")
             return
 
         logger.info(f"Upserting {len(records)} records to {table}...")
 
-        # Clean records (remove Salesforce metadata)
-        clean_records = []
-        for record in records:
-            # Remove 'attributes' which contains URL and Type info
-            clean = {k: v for k, v in record.items() if not k.startswith('attributes')}
-            clean_records.append(clean)
-
         try:
-            cursor = self.conn.cursor()
-            execute_batch(cursor, upsert_sql, clean_records, page_size=100)
+            self.write_records(mapping, records)
             self.conn.commit()
             logger.info(f"✓ Successfully synced {len(records)} records to {table}")
         except Exception as e:
             self.conn.rollback()
             logger.error(f"✗ Failed to sync {table}: {e}")
-            # Print first record to help debug keys
-            if clean_records:
-                logger.error(f"Sample record keys: {clean_records[0].keys()}")
             raise
 
 
-class SalesforceSync:
-    """Main sync orchestrator"""
+class ParallelWriter:
+    """
+    Write rows over several pooled connections, partitioned by id.
 
-    # SOQL Queries - STRICTLY MATCHING USER DUMP
-    QUERIES = {
-        'account': """
-            SELECT 
-                Id, Name, Salutation, FirstName, LastName, MiddleName, Suffix,
-                OwnerId, RecordTypeId, ParentId,
-                Account_Balance__c,
-                PersonEmail, PersonMobilePhone, PersonHomePhone, 
-                PersonAssistantPhone,
-                Phone, Email__c, Email_2__pc, Email_2__c, Mobile_phone__c,
-                Other_mobile_phone__pc, Other_phone__c, Fax, Website,
-                BillingStreet, BillingCity, BillingState, BillingPostalCode, BillingCountry,
-                BillingLatitude, BillingLongitude,
-                ShippingStreet, ShippingCity, ShippingState, ShippingPostalCode, ShippingCountry,
-                ShippingLatitude, ShippingLongitude,
-                PersonMailingStreet, PersonMailingCity, PersonMailingState,
-                PersonMailingPostalCode, PersonMailingCountry, PersonMailingLatitude, PersonMailingLongitude,
-                PersonOtherPhone,
-                AccountSource, Industry,
-                Contact_import_sourc__pc, Account_type__c, Contacttype__pc,
-                PersonBirthdate, PersonTitle, PersonDepartment,
-                IsCustomerPortal, NumberOfEmployees, SicDesc,
-                Bankverbindung_IBAN__c, Freistellungs_bescheinigung__c,
-                Inside_ID__pc, Community_user_ID__pc, Default_community_userID__c,
-                Community_user_calculation__c, Created_by_auto_flow__c,
-                PersonIndividualId, PersonReportsToId,
-                FlowToolKit__Latest_Form_Submission__c, FlowToolKit__Latest_Form_Submission__pc,
-                Novumstate_campaign__pc,
-                Description, Jigsaw, SourceSystemIdentifier,
-                CreatedById, CreatedDate, LastModifiedById, LastModifiedDate,
-                PersonLastCURequestDate, PersonLastCUUpdateDate
-            FROM Account
-            WHERE IsDeleted = false
-        """,
-
-        'objekt': """
-            SELECT 
-                Id, Name, Objekt_ID__c,
-                Address__Street__s, Address__City__s, Address__StateCode__s, 
-                Address__PostalCode__s, Address__CountryCode__s, 
-                Address__Latitude__s, Address__Longitude__s,
-                Anzahl_WE__c, Anzahl_Gew__c, Anzahl_Stellplaz__c, Number_of_other_unit_types__c,
-                Apartment_unit__c, Gewerbeeinheiten__c, Stellplatze__c,
-                In_management_this_year__c, In_management_next_year__c,
-                Vertragsende_letzter_SEV_Vertrag__c, Verwaltervertragsende__c,
-                Difference_WE__c, Difference_GEw__c, Different_stellplatz__c,
-                Total_houses_and_offices__c, Wohn_Gewerbeeinheiten__c,
-                Check_today_with_last_SEV_date__c, Check_today_with_last_vertrage_date__c,
-                City_group__c, Management_level__c, Property_manager__c, Verwaltungsstatus__c,
-                ID_Name__c, view_link__c,
-                Eigentumer__c, Hausmeister__c, Hausreinigung__c, Elektro__c, 
-                Heizung_Sanitar__c, Messdienstleister__c, Schlusseldienst__c, 
-                Versicherungsmakler__c, Wasserschadenbehebung__c, Winterdienst__c, 
-                Management_companyold__c,
-                Hausverwaltung__c, Objektbuchhalter__c, OwnerId,
-                Contract_origin_objekt__c, Name_system__c, Priority__c, Type_WEG_MV__c,
-                Objekt_emailaddress__c, Owners_emails__c, Tenants_emails__c,
-                Picture__c, Letzte_Abrechnung__c, Allgemeine_Hinweise__c, 
-                Status_Objektbuchhaltung__c, Checked_and_confirmed__c,
-                Impower__c,
-                CreatedById, CreatedDate, LastModifiedById, LastModifiedDate
-            FROM Objekt__c
-            WHERE IsDeleted = false
-        """,
-
-        'unit': """
-            SELECT 
-                Id, Name, Description__c, Objekt__c,
-                Type_of_unit__c, Bauart__c, Wohnflache__c, Heizflache__c,
-                AccountingID__c, Impower_Unit_ID__c,
-                Count_active_SEV_contracts__c, Count_vertrage__c,
-                Last_vertrag_start_date__c, Last_vertrage_end_date__c,
-                Objekt_text__c, Owner_note__c, Trigger__c,
-                CreatedById, CreatedDate, LastModifiedById, LastModifiedDate
-            FROM Hausunit__c
-            WHERE IsDeleted = false
-        """
-    }
-
-    # Upsert SQL - Matched strictly to the simplified queries above
-    UPSERT_SQL = {
-        'account': """
-            INSERT INTO accounts (
-                id, name, salutation, first_name, last_name, middle_name, suffix,
-                owner_id, record_type_id, parent_id,
-                account_balance,
-                person_email, person_mobile_phone, person_home_phone,
-                person_assistant_phone,
-                phone, email__c, email_2__pc, email_2__c, mobile_phone__c,
-                other_mobile_phone__pc, other_phone__c, fax, website,
-                billing_street, billing_city, billing_state, billing_postal_code, billing_country,
-                billing_latitude, billing_longitude,
-                shipping_street, shipping_city, shipping_state, shipping_postal_code, shipping_country,
-                shipping_latitude, shipping_longitude,
-                person_mailing_street, person_mailing_city, person_mailing_state,
-                person_mailing_postal_code, person_mailing_country,
-                person_mailing_latitude, person_mailing_longitude,
-                person_other_phone,
-                account_source, industry,
-                contact_import_sourc__pc,
-                account_type__c, contacttype__pc,
-                person_birthdate, person_title, person_department,
-                is_customer_portal, number_of_employees, sic_desc,
-                bankverbindung_iban__c, freistellungs_bescheinigung__c,
-                inside_id__pc, community_user_id__pc, default_community_userid__c,
-                community_user_calculation__c, created_by_auto_flow__c,
-                person_individual_id, person_reports_to_id,
-                flowtoolkit__latest_form_submission__c, flowtoolkit__latest_form_submission__pc,
-                novumstate_campaign__pc,
-                description, jigsaw, source_system_identifier,
-                created_by_id, created_date, last_modified_by_id, last_modified_date,
-                person_last_cu_request_date, person_last_cu_update_date
-            ) VALUES (
-                %(Id)s, %(Name)s, %(Salutation)s, %(FirstName)s, %(LastName)s, %(MiddleName)s, %(Suffix)s,
-                %(OwnerId)s, %(RecordTypeId)s, %(ParentId)s,
-                %(Account_Balance__c)s,
-                %(PersonEmail)s, %(PersonMobilePhone)s, %(PersonHomePhone)s,
-                %(PersonAssistantPhone)s,
-                %(Phone)s, %(Email__c)s, %(Email_2__pc)s, %(Email_2__c)s, %(Mobile_phone__c)s,
-                %(Other_mobile_phone__pc)s, %(Other_phone__c)s, %(Fax)s, %(Website)s,
-                %(BillingStreet)s, %(BillingCity)s, %(BillingState)s, %(BillingPostalCode)s, %(BillingCountry)s,
-                %(BillingLatitude)s, %(BillingLongitude)s,
-                %(ShippingStreet)s, %(ShippingCity)s, %(ShippingState)s, %(ShippingPostalCode)s, %(ShippingCountry)s,
-                %(ShippingLatitude)s, %(ShippingLongitude)s,
-                %(PersonMailingStreet)s, %(PersonMailingCity)s, %(PersonMailingState)s,
-                %(PersonMailingPostalCode)s, %(PersonMailingCountry)s,
-                %(PersonMailingLatitude)s, %(PersonMailingLongitude)s,
-                %(PersonOtherPhone)s,
-                %(AccountSource)s, %(Industry)s,
-                %(Contact_import_sourc__pc)s,
-                %(Account_type__c)s, %(Contacttype__pc)s,
-                %(PersonBirthdate)s, %(PersonTitle)s, %(PersonDepartment)s,
-                %(IsCustomerPortal)s, %(NumberOfEmployees)s, %(SicDesc)s,
-                %(Bankverbindung_IBAN__c)s, %(Freistellungs_bescheinigung__c)s,
-                %(Inside_ID__pc)s, %(Community_user_ID__pc)s, %(Default_community_userID__c)s,
-                %(Community_user_calculation__c)s, %(Created_by_auto_flow__c)s,
-                %(PersonIndividualId)s, %(PersonReportsToId)s,
-                %(FlowToolKit__Latest_Form_Submission__c)s, %(FlowToolKit__Latest_Form_Submission__pc)s,
-                %(Novumstate_campaign__pc)s,
-                %(Description)s, %(Jigsaw)s, %(SourceSystemIdentifier)s,
-                %(CreatedById)s, %(CreatedDate)s, %(LastModifiedById)s, %(LastModifiedDate)s,
-                %(PersonLastCURequestDate)s, %(PersonLastCUUpdateDate)s
-            )
-            ON CONFLICT (id) DO UPDATE SET
-                name = EXCLUDED.name,
-                last_modified_by_id = EXCLUDED.last_modified_by_id,
-                last_modified_date = EXCLUDED.last_modified_date
-        """,
-
-        'objekt': """
-            INSERT INTO objekts (
-                id, name, objekt_id__c,
-                address_street, address_city, address_state, address_postal_code, address_country,
-                address_latitude, address_longitude,
-                anzahl_we__c, anzahl_gew__c, anzahl_stellplaz__c, number_of_other_unit_types__c,
-                apartment_unit__c, gewerbeeinheiten__c, stellplatze__c,
-                in_management_this_year__c, in_management_next_year__c,
-                vertragsende_letzter_sev_vertrag__c, verwaltervertragsende__c,
-                difference_we__c, difference_gew__c, different_stellplatz__c,
-                total_houses_and_offices__c, wohn_gewerbeeinheiten__c,
-                check_today_with_last_sev_date__c, check_today_with_last_vertrage_date__c,
-                city_group__c, management_level__c, property_manager__c, verwaltungsstatus__c,
-                id_name__c, view_link__c,
-                eigentumer__c, hausmeister__c, hausreinigung__c, elektro__c,
-                heizung_sanitar__c, messdienstleister__c, schlusseldienst__c,
-                versicherungsmakler__c, wasserschadenbehebung__c, winterdienst__c,
-                management_companyold__c,
-                hausverwaltung__c, objektbuchhalter__c, owner_id,
-                contract_origin_objekt__c, name_system__c, priority__c, type_weg_mv__c,
-                objekt_emailaddress__c, owners_emails__c, tenants_emails__c,
-                picture__c, letzte_abrechnung__c, allgemeine_hinweise__c,
-                status_objektbuchhaltung__c, checked_and_confirmed__c,
-                impower__c,
-                created_by_id, created_date, last_modified_by_id, last_modified_date
-            ) VALUES (
-                %(Id)s, %(Name)s, %(Objekt_ID__c)s,
-                %(Address__Street__s)s, %(Address__City__s)s, %(Address__StateCode__s)s,
-                %(Address__PostalCode__s)s, %(Address__CountryCode__s)s,
-                %(Address__Latitude__s)s, %(Address__Longitude__s)s,
-                %(Anzahl_WE__c)s, %(Anzahl_Gew__c)s, %(Anzahl_Stellplaz__c)s, %(Number_of_other_unit_types__c)s,
-                %(Apartment_unit__c)s, %(Gewerbeeinheiten__c)s, %(Stellplatze__c)s,
-                %(In_management_this_year__c)s, %(In_management_next_year__c)s,
-                %(Vertragsende_letzter_SEV_Vertrag__c)s, %(Verwaltervertragsende__c)s,
-                %(Difference_WE__c)s, %(Difference_GEw__c)s, %(Different_stellplatz__c)s,
-                %(Total_houses_and_offices__c)s, %(Wohn_Gewerbeeinheiten__c)s,
-                %(Check_today_with_last_SEV_date__c)s, %(Check_today_with_last_vertrage_date__c)s,
-                %(City_group__c)s, %(Management_level__c)s, %(Property_manager__c)s, %(Verwaltungsstatus__c)s,
-                %(ID_Name__c)s, %(view_link__c)s,
-                %(Eigentumer__c)s, %(Hausmeister__c)s, %(Hausreinigung__c)s, %(Elektro__c)s,
-                %(Heizung_Sanitar__c)s, %(Messdienstleister__c)s, %(Schlusseldienst__c)s,
-                %(Versicherungsmakler__c)s, %(Wasserschadenbehebung__c)s, %(Winterdienst__c)s,
-                %(Management_companyold__c)s,
-                %(Hausverwaltung__c)s, %(Objektbuchhalter__c)s, %(OwnerId)s,
-                %(Contract_origin_objekt__c)s, %(Name_system__c)s, %(Priority__c)s, %(Type_WEG_MV__c)s,
-                %(Objekt_emailaddress__c)s, %(Owners_emails__c)s, %(Tenants_emails__c)s,
-                %(Picture__c)s, %(Letzte_Abrechnung__c)s, %(Allgemeine_Hinweise__c)s,
-                %(Status_Objektbuchhaltung__c)s, %(Checked_and_confirmed__c)s,
-                %(Impower__c)s,
-                %(CreatedById)s, %(CreatedDate)s, %(LastModifiedById)s, %(LastModifiedDate)s
-            )
-            ON CONFLICT (id) DO UPDATE SET
-                name = EXCLUDED.name,
-                last_modified_by_id = EXCLUDED.last_modified_by_id,
-                last_modified_date = EXCLUDED.last_modified_date
-        """,
-
-        'unit': """
-            INSERT INTO units (
-                id, name, description__c, objekt__c,
-                type_of_unit__c, bauart__c, wohnflache__c, heizflache__c,
-                accounting_id__c, impower_unit_id__c,
-                count_active_sev_contracts__c, count_vertrage__c,
-                last_vertrag_start_date__c, last_vertrage_end_date__c,
-                objekt_text__c, owner_note__c, trigger__c,
-                created_by_id, created_date, last_modified_by_id, last_modified_date
-            ) VALUES (
-                %(Id)s, %(Name)s, %(Description__c)s, %(Objekt__c)s,
-                %(Type_of_unit__c)s, %(Bauart__c)s, %(Wohnflache__c)s, %(Heizflache__c)s,
-                %(AccountingID__c)s, %(Impower_Unit_ID__c)s,
-                %(Count_active_SEV_contracts__c)s, %(Count_vertrage__c)s,
-                %(Last_vertrag_start_date__c)s, %(Last_vertrage_end_date__c)s,
-                %(Objekt_text__c)s, %(Owner_note__c)s, %(Trigger__c)s,
-                %(CreatedById)s, %(CreatedDate)s, %(LastModifiedById)s, %(LastModifiedDate)s
+    Each connection has a writer thread with a bounded queue of batches
+    and its own transaction, so hash lookups, COPY and merges of one
+    object run on several backends at once. A record's id always hashes
+    to the same connection: two connections never write the same row.
+
+    `commit` is a barrier: it waits until every queued batch is written,
+    then commits all connections. Callers commit their checkpoint after
+    it, so the checkpoint never gets ahead of the data, and only start a
+    child table once its parents are committed (see
+    SalesforceSync._sync_objects). Rows of a table with a foreign key to
+    itself (accounts.parent_id) that point at another row are held back
+    until the next commit and then written level by level: first those
+    whose parent is not held, partitioned by id over all connections and
+    committed, then their children, and so on. Rows in a reference cycle
+    are written in one statement on one connection. The foreign key is
+    not deferrable, so this only covers parents that are committed or
+    arrive in the same commit window; a child whose parent only arrives
+    in a later window still fails.
+    """
+
+    def __init__(self, db: PostgresDB, connections: int, max_batches: int = 4):
+        self.db = db
+        self.connections = connections
+        self.max_batches = max_batches
+        self.pool = None
+        self.writers = []
+        self._queues = []
+        self._threads = []
+        self._errors = []
+        self._discard = threading.Event()
+        # table -> (mapping, rows held until the next commit)
+        self._held = {}
+        self._self_references = {}
+
+    def open(self):
+        """Open the connection pool and start one writer thread per connection"""
+        self.pool = ThreadedConnectionPool(self.connections, self.connections, **self.db.conn_params)
+        for number in range(self.connections):
+            writer = PostgresDB(
+                **self.db.conn_params,
+                load_method=self.db.load_method,
+                skip_unchanged=self.db.skip_unchanged,
+                metrics=self.db.metrics,
+                pool=self.pool
             )
-            ON CONFLICT (id) DO UPDATE SET
-                name = EXCLUDED.name,
-                last_modified_by_id = EXCLUDED.last_modified_by_id,
-                last_modified_date = EXCLUDED.last_modified_date
+            writer.connect()
+            batches = queue.Queue(maxsize=max(1, self.max_batches))
+            thread = threading.Thread(target=self._work, args=(writer, batches), name=f'pg-writer-{number}', daemon=True)
+            thread.start()
+            self.writers.append(writer)
+            self._queues.append(batches)
+            self._threads.append(thread)
+        logger.info(f"Opened {self.connections} writer connections")
+
+    def close(self):
+        """Stop the writer threads and close the pool; uncommitted rows are rolled back"""
+        for batches in self._queues:
+            batches.put(None)
+        for thread in self._threads:
+            thread.join()
+        for writer in self.writers:
+            writer.close()
+        if self.pool is not None:
+            self.pool.closeall()
+        self.pool = None
+        self.writers, self._queues, self._threads = [], [], []
+        self._errors.clear()
+        self._held.clear()
+        self._self_references.clear()
+
+    def _work(self, writer: PostgresDB, batches: queue.Queue):
+        while True:
+            batch = batches.get()
+            try:
+                if batch is None:
+                    return
+                # After a failure, drain the queue without writing
+                if not self._errors and not self._discard.is_set():
+                    method, mapping, rows = batch
+                    getattr(writer, method)(mapping, rows)
+            except Exception as e:
+                self._errors.append(e)
+            finally:
+                batches.task_done()
+
+    def _self_reference_indexes(self, mapping: ObjectMapping) -> list:
+        if mapping.table not in self._self_references:
+            columns = self.db.self_referencing_columns(mapping.table)
+            self._self_references[mapping.table] = [mapping.columns.index(c) for c in columns if c in mapping.columns]
+        return self._self_references[mapping.table]
+
+    def write_records(self, mapping: ObjectMapping, records: list) -> int:
+        """Queue one batch of Salesforce records, return rows queued"""
+        with self.db.metrics.timer('transform', table=mapping.table):
+            rows = [mapping.convert(r) for r in records]
+        return self.write_rows(mapping, rows)
+
+    def write_rows(self, mapping: ObjectMapping, rows: list) -> int:
+        """Queue one batch of converted rows, split by a hash of the id; return rows queued"""
+        if self._errors:
+            raise self._errors[0]
+        count = len(rows)
+
+        references = self._self_reference_indexes(mapping)
+        if references:
+            held = [row for row in rows if any(row[i] is not None for i in references)]
+            if held:
+                self._held.setdefault(mapping.table, (mapping, []))[1].extend(held)
+                rows = [row for row in rows if all(row[i] is None for i in references)]
+
+        self._partition('write_rows', mapping, rows)
+        return count
+
+    def append_rows(self, mapping: ObjectMapping, rows: list) -> int:
+        """Queue one batch for PostgresDB.append_rows, split by a hash of the id; return rows queued"""
+        if self._errors:
+            raise self._errors[0]
+        self._partition('append_rows', mapping, rows)
+        return len(rows)
+
+    def _partition(self, method: str, mapping: ObjectMapping, rows: list):
+        partitions = [[] for _ in self._queues]
+        id_index = mapping.id_index
+        for row in rows:
+            partitions[hash(row[id_index]) % len(partitions)].append(row)
+        for batches, partition in zip(self._queues, partitions):
+            if partition:
+                batches.put((method, mapping, partition))
+
+    def _flush(self):
+        """Wait until every queued batch is written, raise the first failure"""
+        for batches in self._queues:
+            batches.join()
+        for writer in self.writers:
+            for table, counts in writer.stats.items():
+                stats = self.db.stats.setdefault(table, {'inserted': 0, 'updated': 0, 'unchanged': 0})
+                for key, value in counts.items():
+                    stats[key] += value
+            writer.reset_stats()
+            # Committed by the writers, refreshed in the read model by db.commit
+            for table, ids in writer.touched.items():
+                self.db.touch(table, ids)
+            writer.touched = {}
+        if self._errors:
+            raise self._errors[0]
+
+    def commit(self):
+        """Write everything queued and commit every connection, then the held rows"""
+        self._flush()
+        for writer in self.writers:
+            writer.commit()
+
+        held, self._held = self._held, {}
+        for mapping, rows in held.values():
+            for level, cycle in self._levels(mapping, rows):
+                if cycle:
+                    # A single merge statement, so the rows may point at each other
+                    self._queues[0].put(('write_rows', mapping, level))
+                else:
+                    self._partition('write_rows', mapping, level)
+                self._flush()
+                for writer in self.writers:
+                    writer.commit()
+
+    def _levels(self, mapping: ObjectMapping, rows: list) -> list:
+        """
+        Split held rows into [(rows, cycle)] levels whose rows only point at
+        rows outside the held ones or in earlier levels; rows left in a
+        reference cycle form the last level, with `cycle` set
         """
-    }
+        references = self._self_reference_indexes(mapping)
+        id_index = mapping.id_index
+        pending = {row[id_index]: row for row in rows}
+        levels = []
+        while pending:
+            level = [
+                row for row in pending.values()
+                if not any(row[i] in pending and row[i] != row[id_index] for i in references)
+            ]
+            cycle = not level
+            if cycle:
+                level = list(pending.values())
+            for row in level:
+                del pending[row[id_index]]
+            levels.append((level, cycle))
+        return levels
+
+    def rollback(self):
+        """Drop queued and held rows and roll back every connection"""
+        self._discard.set()
+        try:
+            for batches in self._queues:
+                batches.join()
+        finally:
+            self._discard.clear()
+        for writer in self.writers:
+            writer.rollback()
+            writer.reset_stats()
+        self._errors.clear()
+        self._held.clear()
+
+
+class SalesforceSync:
+    """Main sync orchestrator"""
 
-    def __init__(self):
+    DELETE_METHODS = ('queryAll', 'getDeleted', 'off')
+
+    # sobjects/{type}/deleted only serves the last 30 days
+    GET_DELETED_DAYS = 29
+
+    # Field mappings per object, see mappings.py
+    MAPPINGS = MAPPINGS
+
+    # Sync objects: (query key, table, objects that must be committed first)
+    # Downloads run concurrently; only DB writes follow these FK dependencies.
+    OBJECTS = [(m.key, m.table, m.depends_on) for m in MAPPINGS.values()]
+
+    # Generated from the mappings
+    QUERIES = {key: m.soql for key, m in MAPPINGS.items()}
+    UPSERT_SQL = {key: m.upsert_sql for key, m in MAPPINGS.items()}
+
+    def __init__(self, workers: int = None):
         """Initialize from environment variables"""
+        # Parallel extraction: full syncs of objects with at least
+        # SYNC_CHUNK_THRESHOLD records (below the Bulk API threshold) are
+        # fetched as SYNC_CHUNKS disjoint Id or CreatedDate ranges (<= 1 = off)
+        self.chunks = int(os.getenv('SYNC_CHUNKS', 1))
+        self.chunk_field = os.getenv('SYNC_CHUNK_FIELD', 'Id')
+        self.chunk_threshold = int(os.getenv('SYNC_CHUNK_THRESHOLD', 20000))
+        self.chunk_workers = int(os.getenv('SYNC_CHUNK_WORKERS', self.chunks))
+
+        # Per-run stage timers and counters, shared by the API and DB clients;
+        # summarized into sync_runs and optionally exported for Prometheus
+        # (main.py serves them on SYNC_METRICS_PORT)
+        self.metrics = Metrics()
+        self.metrics_file = os.getenv('SYNC_METRICS_FILE')
+
         # Salesforce config
         self.sf_api = SalesforceAPI(
             instance_url=os.getenv('SF_INSTANCE_URL', 'https://novumstate.my.salesforce.com'),
             api_version=os.getenv('SF_API_VERSION', 'v65.0'),
-            access_token=os.getenv('SF_ACCESS_TOKEN')
+            access_token=os.getenv('SF_ACCESS_TOKEN'),
+            bulk_page_size=int(os.getenv('SF_BULK_PAGE_SIZE', 10000)),
+            bulk_max_records=int(os.getenv('SF_BULK_MAX_RECORDS', 50000)),
+            max_retries=int(os.getenv('SF_MAX_RETRIES', 5)),
+            api_slowdown=float(os.getenv('SF_API_SLOWDOWN', 0.8)),
+            # Enough pooled connections for every concurrent fetcher
+            pool_size=max(10, (workers or int(os.getenv('SYNC_WORKERS', len(self.OBJECTS)))) * max(1, self.chunk_workers)),
+            metrics=self.metrics
         )
 
+        # Full syncs of objects with at least this many records use
+        # Bulk API 2.0 instead of the REST query endpoint (0 = never)
+        self.bulk_threshold = int(os.getenv('SF_BULK_THRESHOLD', 50000))
+
         # PostgreSQL config
         self.db = PostgresDB(
             host=os.getenv('PG_HOST', 'localhost'),
             port=int(os.getenv('PG_PORT', 5432)),
             database=os.getenv('PG_DATABASE'),
             user=os.getenv('PG_USER'),
-            password=os.getenv('PG_PASSWORD')
+            password=os.getenv('PG_PASSWORD'),
+            # 'copy' (COPY + staging merge) or 'batch' (execute_batch fallback)
+            load_method=os.getenv('SYNC_LOAD_METHOD', 'copy'),
+            skip_unchanged=os.getenv('SYNC_SKIP_UNCHANGED', 'true').lower() != 'false',
+            metrics=self.metrics,
+            # unit_details, refreshed on commit for the ids written (see read_model.py)
+            read_model=ReadModel() if os.getenv('SYNC_READ_MODEL', 'true').lower() != 'false' else None
         )
 
-    def sync_all(self):
-        """Sync all tables"""
+        # Streaming config: pages fetched ahead while the previous one is written
+        self.max_buffered_pages = int(os.getenv('SYNC_MAX_BUFFERED_PAGES', 4))
+
+        # Rows are written over this many pooled connections, split by id
+        # (1 = on the sync connection only)
+        self.db_writers = int(os.getenv('SYNC_DB_WRITERS', 1))
+        self.writer = None
+        if self.db_writers > 1:
+            self.writer = ParallelWriter(self.db, self.db_writers, max_batches=self.max_buffered_pages)
+
+        # Full syncs commit (with their progress, see --resume) every this
+        # many rows per object (0 = once per object)
+        self.commit_rows = int(os.getenv('SYNC_COMMIT_ROWS', 50000))
+
+        # Objects to sync (registry keys), e.g. account,objekt,unit,owner_relationship
+        self.object_keys = [
+            key.strip() for key in os.getenv('SYNC_OBJECTS', ','.join(DEFAULT_OBJECTS)).split(',') if key.strip()
+        ]
+        unknown = [key for key in self.object_keys if key not in self.MAPPINGS]
+        if unknown:
+            raise ValueError(f"Unknown SYNC_OBJECTS: {', '.join(unknown)}")
+
+        # Deleted records: 'queryAll' (IsDeleted = true rows in the recycle bin),
+        # 'getDeleted' (sobjects/{type}/deleted endpoint) or 'off'
+        self.delete_method = os.getenv('SYNC_DELETE_METHOD', 'queryAll')
+        if self.delete_method not in self.DELETE_METHODS:
+            raise ValueError(f"Unknown SYNC_DELETE_METHOD: {self.delete_method}")
+
+        # Number of objects downloaded concurrently
+        self.workers = workers or int(os.getenv('SYNC_WORKERS', len(self.object_keys)))
+
+    def _write_table(self, query_key: str, table_name: str, pages):
+        """Write one object page by page into its table, commit at the end"""
+        mapping = self.MAPPINGS[query_key]
+        writer = self.writer or self.db
+
+        total = 0
+        max_modstamp = ''
         try:
-            self.db.connect()
-            logger.info("=== Starting full sync ===")
-
-            # Sync in order (foreign key dependencies)
-            tables = [
-                ('account', 'accounts'),
-                ('objekt', 'objekts'),
-                ('unit', 'units')
-            ]
+            for _, rows, modstamp, _ in pages:
+                total += writer.write_rows(mapping, rows)
+                max_modstamp = max(max_modstamp, modstamp)
+                logger.info(f"Upserted {total} records to {table_name}...")
 
-            for query_key, table_name in tables:
-                logger.info(f"\n--- Syncing {table_name} ---")
-                records = self.sf_api.query(self.QUERIES[query_key])
-                self.db.upsert_records(table_name, records, self.UPSERT_SQL[query_key])
+            if not total:
+                logger.warning(f"No records to sync for {table_name}")
+                return
 
-            logger.info("\n=== ✓ Full sync completed ===")
+            # Watermark advances in the same transaction as the data
+            if max_modstamp:
+                self.db.save_checkpoint(query_key, max_modstamp)
 
+            self._commit()
+            logger.info(f"✓ Successfully synced {total} records to {table_name}{self._stats_text(table_name)}")
         except Exception as e:
-            logger.error(f"Sync failed: {e}")
+            self._rollback()
+            logger.error(f"✗ Failed to sync {table_name}: {e}")
             raise
-        finally:
-            self.db.close()
 
-    def sync_incremental(self, hours: int = 24):
-        """Sync only recent changes"""
+    def _write_parts(self, query_key: str, table_name: str, pages, parts: dict, started_at: datetime):
+        """
+        Write a full sync of one object, committing every SYNC_COMMIT_ROWS rows.
+
+        Each commit stores the parts' positions in sync_progress, so an
+        interrupted run resumes after the last commit. The SystemModstamp
+        checkpoint is only saved once the object is complete, and is capped
+        at the start of the run: records changed while it was under way may
+        have been passed already and are left to the next incremental sync.
+        """
+        mapping = self.MAPPINGS[query_key]
+        writer = self.writer or self.db
+
+        total = 0
+        uncommitted = 0
         try:
-            self.db.connect()
-            logger.info(f"=== Starting incremental sync (last {hours}h) ===")
-
-            # Calculate cutoff datetime
-            cutoff = datetime.utcnow() - timedelta(hours=hours)
-            cutoff_str = cutoff.strftime('%Y-%m-%dT%H:%M:%SZ')
-
-            # Sync in order
-            tables = [
-                ('account', 'accounts'),
-                ('objekt', 'objekts'),
-                ('unit', 'units')
-            ]
+            for number, rows, modstamp, position in pages:
+                part = parts[number]
+                total += writer.write_rows(mapping, rows)
+                part['rows_done'] += len(rows)
+                if position:
+                    part['position'] = position
+                if modstamp:
+                    modstamp = to_datetime(modstamp)
+                    part['max_modstamp'] = max(part['max_modstamp'] or modstamp, modstamp)
+
+                uncommitted += len(rows)
+                if self.commit_rows and uncommitted >= self.commit_rows:
+                    self.db.save_progress(query_key, parts.values(), started_at)
+                    self._commit()
+                    uncommitted = 0
+                    logger.info(f"Committed {sum(p['rows_done'] for p in parts.values())} records to {table_name}")
+                else:
+                    logger.info(f"Upserted {total} records to {table_name}...")
+
+            for part in parts.values():
+                part['done'] = True
+            self.db.save_progress(query_key, parts.values(), started_at)
+
+            modstamps = [part['max_modstamp'] for part in parts.values() if part['max_modstamp']]
+            if modstamps:
+                self.db.save_checkpoint(query_key, min(max(modstamps), started_at))
+            self._commit()
+        except Exception as e:
+            self._rollback()
+            logger.error(f"✗ Failed to sync {table_name}: {e}")
+            raise
+
+        rows_done = sum(part['rows_done'] for part in parts.values())
+        if not rows_done:
+            logger.warning(f"No records to sync for {table_name}")
+            return
+        logger.info(f"✓ Successfully synced {rows_done} records to {table_name}{self._stats_text(table_name)}")
 
-            for query_key, table_name in tables:
-                logger.info(f"\n--- Syncing {table_name} (modified since {cutoff_str}) ---")
+    def _commit(self):
+        """Commit written rows, then the sync connection (checkpoint, progress)"""
+        if self.writer is not None:
+            self.writer.commit()
+        self.db.commit()
 
-                # Add time filter to query
-                query = self.QUERIES[query_key].replace(
-                    'WHERE IsDeleted = false',
-                    f'WHERE IsDeleted = false AND LastModifiedDate > {cutoff_str}'
+    def _rollback(self):
+        if self.writer is not None:
+            self.writer.rollback()
+        self.db.rollback()
+
+    def _stats_text(self, table_name: str) -> str:
+        """' (inserted X, updated Y, unchanged Z)' for a table, if counted"""
+        stats = self.db.stats.get(table_name)
+        if not stats:
+            return ''
+        return f" (inserted {stats['inserted']}, updated {stats['updated']}, unchanged {stats['unchanged']})"
+
+    def _log_stats(self):
+        """Per-run summary of change detection"""
+        for _, table_name, _ in self.OBJECTS:
+            if table_name in self.db.stats:
+                logger.info(f"{table_name}:{self._stats_text(table_name)}")
+
+    def _plan_parts(self, soql: str) -> list:
+        """
+        Split a full query into (method, range condition) parts, picked by
+        record count: one Bulk API 2.0 part, SYNC_CHUNKS REST ranges or one
+        REST part. An empty condition means the whole query.
+        """
+        use_bulk = self.bulk_threshold > 0
+        use_chunks = self.chunks > 1
+        if use_bulk or use_chunks:
+            count = self.sf_api.count(soql)
+            if use_bulk and count >= self.bulk_threshold:
+                logger.info(f"{_sobject_name(soql)}: {count} records, using Bulk API 2.0")
+                return [('bulk', '')]
+            if use_chunks and count >= self.chunk_threshold:
+                logger.info(f"{_sobject_name(soql)}: {count} records, using parallel {self.chunk_field} ranges")
+                conditions = self.sf_api.chunk_conditions(soql, self.chunks, self.chunk_field)
+                return [('rest', condition) for condition in conditions]
+        return [('rest', '')]
+
+    def _part_pages(self, mapping: ObjectMapping, part: dict):
+        """Row pages of one part of a full sync, continuing after its committed position"""
+        soql = self.QUERIES[mapping.key]
+        if part['range_condition']:
+            soql = add_filter(soql, part['range_condition'])
+
+        if part['method'] == 'bulk':
+            pages = self.sf_api.bulk_query_pages(soql, raw=True, resume=part['position'])
+        else:
+            # Read in Id order, so the last committed Id is where to continue
+            if part['position']:
+                soql = add_filter(soql, f"{mapping.id_field} > '{part['position']}'")
+            pages = self.sf_api.query_pages(f"{soql} ORDER BY {mapping.id_field}")
+        return self._row_pages(mapping, pages, part['part'])
+
+    def _row_pages(self, mapping: ObjectMapping, pages, part: int = 1):
+        """
+        Project fetched pages to (part, rows, max SystemModstamp, position).
+
+        Runs on the fetch thread: records become tuples in column order with
+        their types coerced once, so the page buffer holds compact rows
+        instead of decoded JSON dicts or CSV rows. The position is the last
+        record's Id for REST pages and the results locator for Bulk API pages.
+        """
+        for page in pages:
+            with self.metrics.timer('transform', table=mapping.table):
+                if isinstance(page, CsvPage):
+                    convert = mapping.csv_converter(page.columns)
+                    rows = [convert(row) for row in page.rows]
+                    if 'SystemModstamp' in page.columns:
+                        index = page.columns.index('SystemModstamp')
+                        modstamp = max((row[index] for row in page.rows), default='')
+                    else:
+                        modstamp = ''
+                    position = page.position
+                else:
+                    convert = mapping.convert
+                    rows = [convert(record) for record in page]
+                    modstamp = max((r.get('SystemModstamp') or '' for r in page), default='')
+                    position = page[-1].get(mapping.id_field) if page else None
+            # Drop the decoded page before waiting on the buffer
+            page = None
+            yield part, rows, modstamp, position
+
+    def _sync_objects(self, sources: dict, write):
+        """
+        Download all objects concurrently and write them in dependency order.
+
+        `sources` maps query keys to the object's row page iterables, one per
+        part (see _row_pages). Parts are fetched on the worker pool into one
+        bounded page buffer per object. `write(query_key, table_name, pages)`
+        runs on the calling thread, one object at a time: the next object
+        written is the first one whose parents have been committed, so
+        children never wait on their parents' download.
+        """
+        objects = [obj for obj in self.OBJECTS if obj[0] in sources]
+        keys = {key for key, _, _ in objects}
+        self.db.reset_stats()
+        committed = set()
+        fetchers = {}
+
+        # Up to SYNC_WORKERS objects, each with up to SYNC_CHUNK_WORKERS parts
+        parts = max((len(pages) for pages in sources.values()), default=1)
+        workers = max(1, self.workers) * max(1, min(self.chunk_workers, parts))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sf-fetch')
+        try:
+            # Submitted in dependency order, so the object being written is
+            # never queued behind a fetcher that is blocked on a full buffer
+            for query_key, _, _ in objects:
+                fetchers[query_key] = PagePrefetcher(
+                    sources[query_key],
+                    self.max_buffered_pages,
+                    executor=executor,
+                    merge=True
                 )
 
-                records = self.sf_api.query(query)
-                self.db.upsert_records(table_name, records, self.UPSERT_SQL[query_key])
+            pending = list(objects)
+            while pending:
+                ready = [
+                    obj for obj in pending
+                    if all(parent in committed or parent not in keys for parent in obj[2])
+                ]
+                if not ready:
+                    raise RuntimeError(f"Circular dependencies between: {[obj[0] for obj in pending]}")
 
-            logger.info("\n=== ✓ Incremental sync completed ===")
+                query_key, table_name, _ = ready[0]
+                logger.info(f"\n--- Syncing {table_name} ---")
+                write(query_key, table_name, fetchers[query_key])
+                committed.add(query_key)
+                pending.remove(ready[0])
+        finally:
+            for fetcher in fetchers.values():
+                fetcher.close()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _sync_full(self, resume: bool = False):
+        """
+        Fetch and write every object in resumable parts.
+
+        Parts are planned once per run and stored in sync_progress along with
+        their committed position; with `resume`, the parts of an interrupted
+        run continue from there and completed objects are skipped.
+        """
+        progress = self.db.get_progress() if resume else {}
+        if resume and not progress:
+            logger.info("No interrupted full sync found, starting a new one")
+        if progress:
+            started_at = min(part['started_at'] for parts in progress.values() for part in parts.values())
+            logger.info(f"Resuming the full sync started at {started_at:%Y-%m-%d %H:%M:%S} UTC")
+        else:
+            self.db.clear_progress()
+            started_at = datetime.utcnow()
+
+        # Count and range probes for objects without stored parts
+        unplanned = [key for key in self.object_keys if key not in progress]
+        with ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix='sf-plan') as planner:
+            plans = list(planner.map(lambda key: self._plan_parts(self.QUERIES[key]), unplanned))
+        for query_key, plan in zip(unplanned, plans):
+            progress[query_key] = {
+                number: {
+                    'part': number, 'method': method, 'range_condition': condition or None,
+                    'position': None, 'rows_done': 0, 'max_modstamp': None, 'done': False,
+                }
+                for number, (method, condition) in enumerate(plan, 1)
+            }
+            self.db.save_progress(query_key, progress[query_key].values(), started_at)
+        self.db.commit()
+
+        sources = {}
+        for query_key in self.object_keys:
+            parts = progress[query_key]
+            if all(part['done'] for part in parts.values()):
+                logger.info(f"{query_key}: completed before the interruption, skipping")
+                continue
+            mapping = self.MAPPINGS[query_key]
+            sources[query_key] = [self._part_pages(mapping, part) for part in parts.values() if not part['done']]
+
+        self._sync_objects(
+            sources,
+            lambda query_key, table_name, pages: self._write_parts(
+                query_key, table_name, pages, progress[query_key], started_at
+            )
+        )
+
+    def _deleted_pages(self, mapping: ObjectMapping, since):
+        """Yield pages of {'Id', 'SystemModstamp'} for records deleted since `since`"""
+        if self.delete_method == 'queryAll':
+            soql = mapping.deleted_soql
+            if since is not None:
+                soql = add_filter(soql, f"SystemModstamp >= {soql_datetime(since)}")
+            yield from self.sf_api.query_pages(soql, include_deleted=True)
+            return
+
+        end = datetime.utcnow()
+        earliest = end - timedelta(days=self.GET_DELETED_DAYS)
+        start = max(since, earliest) if since is not None else earliest
+        data = self.sf_api.get_deleted(mapping.sobject, start, end)
+        yield [
+            {'Id': r['id'], 'SystemModstamp': r['deletedDate']}
+            for r in data.get('deletedRecords', [])
+        ]
 
+    def _sync_deletes(self, object_keys: list):
+        """
+        Remove rows deleted in Salesforce since each object's delete checkpoint.
+
+        Objects are processed children first (units -> objekts -> accounts),
+        one transaction each, so no row is deleted while a child still
+        references it. The checkpoint advances with the deletes.
+        """
+        if self.delete_method == 'off':
+            return
+
+        checkpoints = self.db.get_delete_checkpoints()
+        self.db.commit()
+
+        for query_key, table_name, _ in reversed(self.OBJECTS):
+            if query_key not in object_keys:
+                continue
+
+            mapping = self.MAPPINGS[query_key]
+            total = 0
+            max_modstamp = ''
+            try:
+                for records in self._deleted_pages(mapping, checkpoints.get(query_key)):
+                    ids = [r['Id'] for r in records]
+                    total += self.db.delete_rows(mapping, ids)
+                    max_modstamp = max(
+                        max_modstamp,
+                        max((r.get('SystemModstamp') or '' for r in records), default='')
+                    )
+
+                if max_modstamp:
+                    self.db.save_delete_checkpoint(query_key, max_modstamp)
+                self.db.commit()
+                if total:
+                    logger.info(f"✓ Deleted {total} rows from {table_name}")
+            except Exception as e:
+                self.db.rollback()
+                logger.error(f"✗ Failed to delete from {table_name}: {e}")
+                raise
+
+    @contextmanager
+    def _run(self, mode: str):
+        """
+        Connect for one sync run and record its outcome. Connections that
+        are already open (see SyncDaemon) are used and left open.
+        """
+        self.metrics.reset()
+        started_at = datetime.utcnow()
+        close_db = not self.db.connected
+        close_writer = self.writer is not None and self.writer.pool is None
+        try:
+            if close_db:
+                self.db.connect()
+            if close_writer:
+                self.writer.open()
+            yield
         except Exception as e:
             logger.error(f"Sync failed: {e}")
+            self._finish_run(mode, started_at, 'failed', str(e))
             raise
+        else:
+            self._finish_run(mode, started_at, 'success')
         finally:
-            self.db.close()
\ No newline at end of file
+            if close_writer:
+                self.writer.close()
+            if close_db:
+                self.db.close()
+
+    def _finish_run(self, mode: str, started_at: datetime, status: str, error: str = None):
+        """Log stage times, store the run in sync_runs, write the metrics file"""
+        self.metrics.finish_run(status == 'success')
+        logger.info(f"Stage times: {self.metrics.summary_text()}")
+
+        try:
+            if self.db.conn is not None and not self.db.conn.closed:
+                self.db.rollback()
+                self.db.record_run(mode, started_at, status, error)
+        except Exception as e:
+            logger.warning(f"Could not record sync run: {e}")
+
+        if self.metrics_file:
+            try:
+                self.metrics.write_prometheus(self.metrics_file)
+            except OSError as e:
+                logger.warning(f"Could not write metrics file {self.metrics_file}: {e}")
+
+    def sync_all(self, resume: bool = False):
+        """Sync all tables; with `resume`, continue an interrupted full sync"""
+        with self._run('full'):
+            logger.info("=== Resuming full sync ===" if resume else "=== Starting full sync ===")
+
+            self._sync_full(resume)
+            self._sync_deletes(self.object_keys)
+            self.db.clear_progress()
+            self.db.commit()
+
+            self._log_stats()
+            logger.info("\n=== ✓ Full sync completed ===")
+
+    def sync_incremental(self, hours: int = None, object_keys: list = None):
+        """
+        Sync only recent changes of `object_keys` (default: all synced objects).
+
+        Without `hours`, each object resumes from the SystemModstamp stored in
+        sync_state by the last committed run (objects without a checkpoint
+        are synced in full). With `hours`, a fixed window is used instead.
+        Records deleted in Salesforce are removed afterwards.
+        """
+        object_keys = object_keys or self.object_keys
+        with self._run('incremental'):
+            if hours is None:
+                logger.info("=== Starting incremental sync (from checkpoints) ===")
+                checkpoints = self.db.get_checkpoints()
+                self.db.commit()
+            else:
+                logger.info(f"=== Starting incremental sync (last {hours}h) ===")
+                cutoff = datetime.utcnow() - timedelta(hours=hours)
+                checkpoints = {query_key: cutoff for query_key in object_keys}
+
+            queries = {}
+            for query_key in object_keys:
+                soql = self.QUERIES[query_key]
+                since = checkpoints.get(query_key)
+                if since is None:
+                    logger.info(f"{query_key}: no checkpoint, syncing all records")
+                    queries[query_key] = soql
+                    continue
+
+                # >= so rows sharing the checkpoint's second are not missed;
+                # re-upserting them is harmless
+                logger.info(f"{query_key}: modified since {soql_datetime(since)}")
+                queries[query_key] = add_filter(soql, f"SystemModstamp >= {soql_datetime(since)}")
+
+            self._sync_objects(
+                {
+                    query_key: [self._row_pages(self.MAPPINGS[query_key], self.sf_api.query_pages(soql))]
+                    for query_key, soql in queries.items()
+                },
+                self._write_table
+            )
+            self._sync_deletes(object_keys)
+
+            self._log_stats()
+            logger.info("\n=== ✓ Incremental sync completed ===")
+
+    def rebuild_read_model(self):
+        """Re-derive unit_details from the synced tables"""
+        read_model = self.db.read_model
+        if read_model is None:
+            raise RuntimeError("The read model is disabled (SYNC_READ_MODEL=false)")
+        with self._run('read-model'):
+            with self.metrics.timer('read_model'):
+                rows = read_model.rebuild(self.db.conn.cursor())
+            self.db.commit()
+            logger.info(f"✓ Rebuilt unit_details: {rows} rows")
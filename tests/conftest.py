@@ -0,0 +1,50 @@
+import os
+import sys
+import uuid
+
+import psycopg2
+import pytest
+
+# The modules live at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCHEMA = os.path.join(ROOT, 'scripts', 'schema.sql')
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """
+    A scratch database with scripts/schema.sql, on the server from PG_HOST,
+    PG_PORT, PG_USER and PG_PASSWORD; skipped if it cannot be created
+    """
+    params = {
+        'host': os.getenv('PG_HOST', 'localhost'),
+        'port': int(os.getenv('PG_PORT', 5432)),
+        'user': os.getenv('PG_USER', 'postgres'),
+        'password': os.getenv('PG_PASSWORD', ''),
+    }
+    name = f"sync_test_{uuid.uuid4().hex[:8]}"
+    try:
+        admin = psycopg2.connect(dbname='postgres', connect_timeout=3, **params)
+        admin.autocommit = True
+        admin.cursor().execute(f"CREATE DATABASE {name} ENCODING 'UTF8' TEMPLATE template0")
+    except psycopg2.Error as e:
+        pytest.skip(f"PostgreSQL not available: {e}")
+
+    try:
+        conn = psycopg2.connect(dbname=name, **params)
+        with open(SCHEMA, encoding='utf-8') as f:
+            conn.cursor().execute(f.read())
+        conn.commit()
+        conn.close()
+
+        monkeypatch.setenv('PG_HOST', params['host'])
+        monkeypatch.setenv('PG_PORT', str(params['port']))
+        monkeypatch.setenv('PG_USER', params['user'])
+        monkeypatch.setenv('PG_PASSWORD', params['password'])
+        monkeypatch.setenv('PG_DATABASE', name)
+        yield {**params, 'dbname': name}
+    finally:
+        admin.cursor().execute(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)")
+        admin.close()
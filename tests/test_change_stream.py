@@ -0,0 +1,195 @@
+"""Change event handling against the fake CometD source (fake_salesforce.py)"""
+
+import threading
+import time
+
+import psycopg2
+import pytest
+
+import fake_salesforce
+from change_stream import ChangeStream, _field_name, flatten_fields
+from mappings import ACCOUNT, OBJEKT
+from sync_data import SalesforceSync
+
+OBJEKT_ADDRESS = {
+    'Address__Street__s': 'Hauptstraße 1',
+    'Address__City__s': 'Berlin',
+    'Address__StateCode__s': 'BE',
+    'Address__PostalCode__s': '10115',
+    'Address__CountryCode__s': 'DE',
+    'Address__Latitude__s': 52.53,
+    'Address__Longitude__s': 13.38,
+}
+
+
+@pytest.fixture
+def fake():
+    fake = fake_salesforce.FakeSalesforce()
+    yield fake
+    fake.server.server_close()
+
+
+def last_payload(fake) -> dict:
+    return fake.events[-1]['data']['payload']
+
+
+def test_field_name():
+    assert _field_name('BillingAddress.City') == 'BillingCity'
+    assert _field_name('PersonMailingAddress.PostalCode') == 'PersonMailingPostalCode'
+    assert _field_name('Name.FirstName') == 'FirstName'
+    assert _field_name('Address__c.City') == 'Address__City__s'
+    assert _field_name('Address__c.StateCode') == 'Address__StateCode__s'
+    assert _field_name('Phone') == 'Phone'
+
+
+def test_objekt_address_create(fake):
+    fake.change_records('Objekt__c', [{'Id': 'a00000000000001AAA', 'Name': 'Objekt', **OBJEKT_ADDRESS}])
+    payload = last_payload(fake)
+    assert payload['Address__c']['City'] == 'Berlin'
+    assert 'Address__City__s' not in payload
+
+    fields = flatten_fields(payload)
+    objekt_fields = {field.sf_name for field in OBJEKT.fields}
+    assert {name for name in fields if name.startswith('Address')} <= objekt_fields
+    assert {name: fields[name] for name in OBJEKT_ADDRESS} == OBJEKT_ADDRESS
+
+
+def test_objekt_address_update(fake):
+    fake.change_records('Objekt__c', [{'Id': 'a00000000000001AAA', 'Name': 'Objekt', **OBJEKT_ADDRESS}])
+    fake.change_records('Objekt__c', [{'Id': 'a00000000000001AAA', 'Address__City__s': 'Hamburg',
+                                       'Address__Street__s': None}])
+    payload = last_payload(fake)
+    header = payload['ChangeEventHeader']
+    assert {'Address__c.City', 'Address__c.Street'} <= set(header['changedFields'])
+    assert header['nulledFields'] == ['Address__c.Street']
+
+    names = {_field_name(name) for name in header['changedFields']}
+    assert names <= {field.sf_name for field in OBJEKT.fields}
+    fields = flatten_fields(payload)
+    assert fields['Address__City__s'] == 'Hamburg'
+    assert fields['Address__Street__s'] is None
+
+
+def test_account_compound_fields(fake):
+    fake.change_records('Account', [{'Id': '001000000000001AAA', 'BillingCity': 'Köln'}])
+    fields = flatten_fields(last_payload(fake))
+    assert fields['BillingCity'] == 'Köln'
+
+    payload = {'ChangeEventHeader': {}, 'Name': {'Salutation': 'Herr', 'FirstName': 'Max', 'LastName': 'Muster'}}
+    fields = flatten_fields(payload)
+    assert fields['Name'] == 'Max Muster'
+    assert set(fields) <= {field.sf_name for field in ACCOUNT.fields}
+
+
+# --- Full path: fake CometD source -> ChangeStream -> PostgreSQL ---
+
+def wait_for(condition, timeout: float = 20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return
+        time.sleep(0.1)
+    raise AssertionError("condition not met in time")
+
+
+class Stream:
+    """A ChangeStream running in a thread"""
+
+    def __init__(self, sync, fake):
+        self.fake = fake
+        self.stream = ChangeStream(sync)
+        self.thread = threading.Thread(target=self.stream.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        # Subscribed to every object's channel
+        channels = set(self.stream.by_channel)
+        wait_for(lambda: any(channels <= set(s) for s in list(self.fake.clients.values())))
+        return self
+
+    def __exit__(self, *exc):
+        self.stream.stop()
+        self.thread.join(timeout=30)
+        assert not self.thread.is_alive()
+
+
+@pytest.fixture
+def streaming(database, monkeypatch):
+    fake = fake_salesforce.FakeSalesforce(page_size=50)
+    fake.poll_timeout = 0.5
+    fake_salesforce.seed(fake, 30, 10, 20)
+    url = fake.start()
+    monkeypatch.setenv('SF_INSTANCE_URL', url)
+    monkeypatch.setenv('SF_ACCESS_TOKEN', 'fake')
+    monkeypatch.setenv('SF_BULK_THRESHOLD', '0')
+    monkeypatch.setenv('SYNC_STREAM_BATCH_SECONDS', '0.2')
+
+    conn = psycopg2.connect(**database)
+    conn.autocommit = True
+
+    def query(sql: str, params: tuple = ()) -> list:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+    yield fake, SalesforceSync(), query
+    conn.close()
+    fake.stop()
+
+
+def test_stream_applies_events_and_falls_back(streaming):
+    fake, sync, query = streaming
+    account = sorted(fake.records['Account'])[0]
+    objekt = sorted(fake.records['Objekt__c'])[0]
+    unit = sorted(fake.records['Hausunit__c'])[0]
+
+    # No replay ID stored: caught up with the incremental sync, then subscribed
+    with Stream(sync, fake):
+        assert query("SELECT count(*) FROM units") == [(20,)]
+
+        fake.change_records('Account', [{'Id': account, 'Name': 'Streamed'}])
+        fake.change_records('Objekt__c', [{'Id': objekt, **OBJEKT_ADDRESS}])
+        fake.delete_records('Hausunit__c', [unit])
+        # The catch-up after subscribing may already have synced some of
+        # these; the replay IDs are stored once every event is applied
+        wait_for(lambda: len(query("SELECT replay_id FROM sync_state WHERE replay_id IS NOT NULL")) == 3)
+        wait_for(lambda: query("SELECT count(*) FROM units WHERE id = %s", (unit,)) == [(0,)])
+        wait_for(lambda: query("SELECT name FROM accounts WHERE id = %s", (account,)) == [('Streamed',)])
+        assert query("SELECT address_street, address_city, address_postal_code FROM objekts WHERE id = %s",
+                     (objekt,)) == [('Hauptstraße 1', 'Berlin', '10115')]
+        replay_ids = dict(query("SELECT object_name, replay_id FROM sync_state WHERE replay_id IS NOT NULL"))
+
+    # Stored replay ID: events published while stopped are replayed
+    fake.change_records('Objekt__c', [{'Id': objekt, 'Address__City__s': 'Hamburg'}])
+    with Stream(sync, fake):
+        wait_for(lambda: query("SELECT address_city FROM objekts WHERE id = %s", (objekt,)) == [('Hamburg',)])
+    stored = dict(query("SELECT object_name, replay_id FROM sync_state WHERE replay_id IS NOT NULL"))
+    assert stored['objekt'] > replay_ids['objekt']
+
+    # Replay window expired: caught up with the incremental sync
+    fake.change_records('Account', [{'Id': account, 'Name': 'While down'}])
+    fake.expire_events()
+    with Stream(sync, fake):
+        assert query("SELECT name FROM accounts WHERE id = %s", (account,)) == [('While down',)]
+        fake.change_records('Account', [{'Id': account, 'Name': 'After fallback'}])
+        wait_for(lambda: query("SELECT name FROM accounts WHERE id = %s", (account,)) == [('After fallback',)])
+
+
+def test_stream_recovers_dropped_sessions(streaming):
+    fake, sync, query = streaming
+    account = sorted(fake.records['Account'])[0]
+
+    def backends() -> int:
+        return query("SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()")[0][0]
+
+    with Stream(sync, fake):
+        before = backends()
+        for attempt in range(3):
+            # Session dropped and events expired: resubscribing fails, the stream catches up
+            fake.expire_events()
+            with fake.lock:
+                fake.clients.clear()
+            fake.change_records('Account', [{'Id': account, 'Name': f"Resubscribed {attempt}"}])
+            wait_for(lambda: query("SELECT name FROM accounts WHERE id = %s",
+                                   (account,)) == [(f"Resubscribed {attempt}",)])
+        assert backends() == before
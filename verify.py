@@ -0,0 +1,243 @@
+"""
+Reconciliation
+Compares Salesforce and PostgreSQL per Id range (record count and newest
+LastModifiedDate), narrows mismatching ranges down recursively and
+re-syncs only the records that differ
+"""
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from mappings import HASH_COLUMN, ObjectMapping, to_datetime
+from sync_data import SalesforceSync, add_filter, probe_query, row_hash, split_id_range
+
+logger = logging.getLogger(__name__)
+
+# Newest modification per range; SystemModstamp is not stored per row
+MODIFIED_FIELD = 'LastModifiedDate'
+
+
+def id_condition(bucket: tuple) -> str:
+    """SOQL condition of an Id range (low, high); None is open-ended"""
+    low, high = bucket
+    parts = []
+    if low is not None:
+        parts.append(f"Id >= '{low}'")
+    if high is not None:
+        parts.append(f"Id < '{high}'")
+    return ' AND '.join(parts)
+
+
+def split_bucket(bucket: tuple, low: str, high: str, parts: int) -> list:
+    """Split an Id range into up to `parts` ranges; open ends stop at low/high"""
+    start, end = bucket[0] or low, bucket[1] or high
+    bounds = [bound for bound in split_id_range(start, end, parts) if bucket[0] is None or bound > bucket[0]]
+    edges = [bucket[0]] + bounds + [bucket[1]]
+    return list(zip(edges, edges[1:]))
+
+
+class Reconciler:
+    """
+    Find and repair drift between Salesforce and the synced tables.
+
+    The Id space between the lowest and highest Id (on either side) is
+    split into SYNC_VERIFY_BUCKETS ranges. For each range Salesforce
+    returns COUNT() and the newest LastModifiedDate of the synced query;
+    PostgreSQL computes the same for all ranges in one scan (ranges are
+    compared by byte order, COLLATE "C", like Salesforce Ids). Ranges that
+    differ are split into SYNC_VERIFY_SPLIT parts and compared again until
+    they hold at most SYNC_VERIFY_LEAF_ROWS records. Those are fetched in
+    full and compared row by row with the stored sync hashes: missing and
+    changed rows are written, rows no longer in Salesforce deleted.
+
+    With `hashes`, ranges whose aggregates match are compared row by row
+    as well, which catches Salesforce changes that did not update
+    LastModifiedDate (formula fields, system updates) at the cost of
+    reading every record. Edits made in PostgreSQL that keep both the
+    sync hash and last_modified_date are not detected.
+    """
+
+    def __init__(self, sync: SalesforceSync, hashes: bool = False, repair: bool = True):
+        self.sync = sync
+        self.db = sync.db
+        self.metrics = sync.metrics
+        self.hashes = hashes
+        self.repair = repair
+
+        self.buckets = int(os.getenv('SYNC_VERIFY_BUCKETS', 16))
+        self.split = int(os.getenv('SYNC_VERIFY_SPLIT', 4))
+        self.leaf_rows = int(os.getenv('SYNC_VERIFY_LEAF_ROWS', 2000))
+
+    def run(self, object_keys: list = None) -> dict:
+        """Verify (and repair) each object in dependency order, return {object: counts}"""
+        object_keys = object_keys or self.sync.object_keys
+        unknown = [key for key in object_keys if key not in self.sync.MAPPINGS]
+        if unknown:
+            raise ValueError(f"Unknown objects: {', '.join(unknown)}")
+
+        results = {}
+        with self.sync._run('verify'):
+            logger.info(f"=== Starting verification{'' if self.repair else ' (dry run)'} ===")
+            self.db.reset_stats()
+            for query_key, _, _ in self.sync.OBJECTS:
+                if query_key in object_keys:
+                    results[query_key] = self.verify_object(self.sync.MAPPINGS[query_key])
+            logger.info("\n=== ✓ Verification completed ===")
+        return results
+
+    def verify_object(self, mapping: ObjectMapping) -> dict:
+        """Compare one object range by range, repair the rows that differ"""
+        soql = self.sync.QUERIES[mapping.key]
+        result = {'ranges': 0, 'mismatched': 0, 'missing': 0, 'changed': 0, 'extra': 0}
+
+        low, high = self._id_bounds(mapping, soql)
+        if low is None:
+            logger.info(f"{mapping.table}: empty in Salesforce and PostgreSQL")
+            return result
+
+        buckets = split_bucket((None, None), low, high, self.buckets)
+        leaves = []
+        while buckets:
+            subdivided = []
+            for bucket, (sf_count, sf_modified), (pg_count, pg_modified) in self._compare(mapping, soql, buckets):
+                result['ranges'] += 1
+                if sf_count == pg_count and sf_modified == pg_modified:
+                    if self.hashes:
+                        leaves.append(bucket)
+                    continue
+
+                result['mismatched'] += 1
+                logger.info(f"{mapping.table} [{id_condition(bucket) or 'all'}]: "
+                            f"Salesforce {sf_count} rows (newest {sf_modified}), "
+                            f"PostgreSQL {pg_count} rows (newest {pg_modified})")
+                parts = split_bucket(bucket, low, high, self.split)
+                if max(sf_count, pg_count) > self.leaf_rows and len(parts) > 1:
+                    subdivided.extend(parts)
+                else:
+                    leaves.append(bucket)
+            buckets = subdivided
+
+        for bucket in leaves:
+            for name, count in self._reconcile(mapping, soql, bucket).items():
+                result[name] += count
+
+        logger.info(
+            f"{'✓' if not (result['missing'] or result['changed'] or result['extra']) else '✗'} "
+            f"{mapping.table}: {result['ranges']} ranges compared, {result['mismatched']} mismatched; "
+            f"{result['missing']} missing, {result['changed']} changed, {result['extra']} extra rows"
+            f"{' repaired' if self.repair else ''}"
+        )
+        return result
+
+    def _id_bounds(self, mapping: ObjectMapping, soql: str) -> tuple:
+        """Lowest and highest Id in Salesforce or PostgreSQL, (None, None) if both are empty"""
+        sf_api = self.sync.sf_api
+        ids = [r['Id'] for r in sf_api.query(probe_query(soql, 'Id')) + sf_api.query(probe_query(soql, 'Id', True))]
+
+        cursor = self.db.conn.cursor()
+        cursor.execute(
+            f'SELECT min({mapping.id_column} COLLATE "C"), max({mapping.id_column} COLLATE "C") FROM {mapping.table}'
+        )
+        ids += [record_id for record_id in cursor.fetchone() if record_id is not None]
+        self.db.rollback()
+        return (min(ids), max(ids)) if ids else (None, None)
+
+    def _compare(self, mapping: ObjectMapping, soql: str, buckets: list) -> list:
+        """[(bucket, Salesforce (count, newest), PostgreSQL (count, newest))] for disjoint buckets"""
+        with ThreadPoolExecutor(max_workers=max(1, self.sync.workers), thread_name_prefix='sf-verify') as executor:
+            remote = executor.map(lambda bucket: self._sf_aggregate(soql, bucket), buckets)
+
+            # Bucket i lies between consecutive thresholds; width_bucket
+            # returns the number of thresholds <= id
+            thresholds = sorted({edge for bucket in buckets for edge in bucket if edge is not None})
+            position = {threshold: number for number, threshold in enumerate(thresholds, 1)}
+            modified = mapping.fields_by_name[MODIFIED_FIELD].column
+            cursor = self.db.conn.cursor()
+            with self.metrics.timer('verify', table=mapping.table):
+                cursor.execute(
+                    f'SELECT width_bucket({mapping.id_column} COLLATE "C", %s::text[]), count(*), max({modified}) '
+                    f'FROM {mapping.table} GROUP BY 1',
+                    (thresholds,)
+                )
+                local = {number: (count, newest) for number, count, newest in cursor.fetchall()}
+            self.db.rollback()
+
+            return [
+                (bucket, sf, local.get(0 if bucket[0] is None else position[bucket[0]], (0, None)))
+                for bucket, sf in zip(buckets, remote)
+            ]
+
+    def _sf_aggregate(self, soql: str, bucket: tuple) -> tuple:
+        """(COUNT(), newest LastModifiedDate) of the query within an Id range"""
+        condition = id_condition(bucket)
+        filtered = add_filter(soql, condition) if condition else soql
+        count = self.sync.sf_api.count(filtered)
+        if not count:
+            return 0, None
+        newest = self.sync.sf_api.query(probe_query(filtered, MODIFIED_FIELD, descending=True))
+        return count, to_datetime(newest[0][MODIFIED_FIELD]) if newest else None
+
+    def _reconcile(self, mapping: ObjectMapping, soql: str, bucket: tuple) -> dict:
+        """
+        Compare an Id range row by row; unless dry run, write and delete the
+        rows that differ. A row differs if its sync hash or its
+        LastModifiedDate does not match Salesforce; rows edited in
+        PostgreSQL keep their hash, so theirs is cleared before the write.
+        """
+        sync = self.sync
+        condition = id_condition(bucket)
+        id_index = mapping.id_index
+        modified = mapping.fields_by_name[MODIFIED_FIELD].column
+        modified_index = mapping.columns.index(modified)
+
+        conditions, params = [], []
+        for operator, edge in zip(('>=', '<'), bucket):
+            if edge is not None:
+                conditions.append(f'{mapping.id_column} COLLATE "C" {operator} %s')
+                params.append(edge)
+        cursor = self.db.conn.cursor()
+        cursor.execute(
+            f"SELECT {mapping.id_column}, {HASH_COLUMN}, {modified} FROM {mapping.table}"
+            + (f" WHERE {' AND '.join(conditions)}" if conditions else ""),
+            params
+        )
+        stored = {record_id: (stored_hash, newest) for record_id, stored_hash, newest in cursor.fetchall()}
+
+        counts = {'missing': 0, 'changed': 0, 'extra': 0}
+        writer = sync.writer or self.db
+        pages = sync._row_pages(mapping, sync.sf_api.query_pages(add_filter(soql, condition) if condition else soql))
+        try:
+            for _, rows, _, _ in pages:
+                differing, edited = [], []
+                for row in rows:
+                    stored_hash, newest = stored.pop(row[id_index], (False, None))
+                    if stored_hash is False:
+                        counts['missing'] += 1
+                    elif stored_hash != row_hash(row):
+                        counts['changed'] += 1
+                    elif newest != row[modified_index]:
+                        counts['changed'] += 1
+                        edited.append(row[id_index])
+                    else:
+                        continue
+                    differing.append(row)
+                if differing and self.repair:
+                    if edited:
+                        # Committed first: writer connections must not wait on these row locks
+                        cursor.execute(
+                            f"UPDATE {mapping.table} SET {HASH_COLUMN} = NULL WHERE {mapping.id_column} = ANY(%s)",
+                            (edited,)
+                        )
+                        self.db.commit()
+                    writer.write_rows(mapping, differing)
+
+            # Left over: stored rows Salesforce no longer returns
+            counts['extra'] = len(stored)
+            if stored and self.repair:
+                self.db.delete_rows(mapping, list(stored))
+            sync._commit()
+        except Exception:
+            sync._rollback()
+            raise
+        return counts